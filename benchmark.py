@@ -0,0 +1,641 @@
+"""Benchmarks for the serial logger.
+
+    python benchmark.py store --lines 1000000 --length 80
+    python benchmark.py mmap --size-mb 3072 [--sparse]
+    python benchmark.py macro --iterations 10000
+    python benchmark.py highlight --rules 20
+    python benchmark.py fields --lines 1000000 --every 4 --format csv parquet
+    python benchmark.py archive --size-mb 4096 --files 16 --workers 1 2 4 8
+    python benchmark.py pipeline --rate 10000 50000 0 --seconds 5 --json results.json
+    python benchmark.py share --clients 100 --slow 5 --rate 20000 --seconds 5
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import re
+import select
+import selectors
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from array import array
+
+from serial_core import (
+    LogStore, MappedLog, CaptureEngine, MacroRunner, HighlightRules, ArchiveSearch, FieldExtractor, FieldTable, ShareServer,
+    export_fields, format_records, parse_macro, KIND_RX,
+)
+
+
+def rss_bytes():
+    """Resident memory of this process not backed by files (Linux), or 0 if unknown.
+
+    Pages of memory-mapped files are left out: they belong to the page cache and the
+    kernel can drop them at any time.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            fields = f.read().split()
+            return (int(fields[1]) - int(fields[2])) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def make_lines(count, length):
+    """Distinct lines of ``length`` characters, like a chatty firmware would print."""
+    pad = "x" * length
+    return [(f"[{i:08d}] sensor=ok " + pad)[:length] for i in range(count)]
+
+
+def bench_store(args):
+    lines = make_lines(args.batch, args.length)
+    gc.collect()
+    rss_before = rss_bytes()
+
+    store = LogStore(max_lines=args.max_lines or args.lines)
+    appended = 0
+    start = time.perf_counter()
+    while appended < args.lines:
+        store.extend(lines)
+        appended += len(lines)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    rss_growth = rss_bytes() - rss_before
+    print(f"store: {appended} lines of {args.length} B appended in {elapsed:.2f} s "
+          f"({appended / elapsed / 1e6:.2f} M lines/s)")
+    print(f"       {len(store)} lines kept, {store.nbytes() / 1e6:.1f} MB in store "
+          f"({store.nbytes() / len(store):.1f} B/line), RSS +{rss_growth / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    for i in range(0, len(store), max(1, len(store) // 100000)):
+        store[i]
+    print(f"       random access: {(time.perf_counter() - start) * 1e6 / 100000:.2f} us/line")
+
+    if args.compare:
+        del store
+        gc.collect()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        baseline = []
+        for _ in range(args.lines // len(lines)):
+            baseline.extend({'text': line[:-1] + "!"} for line in lines)
+        elapsed = time.perf_counter() - start
+        rss_growth = rss_bytes() - rss_before
+        print(f"list of dicts: {len(baseline)} lines in {elapsed:.2f} s "
+              f"({len(baseline) / elapsed / 1e6:.2f} M lines/s), RSS +{rss_growth / 1e6:.1f} MB "
+              f"({rss_growth / len(baseline):.1f} B/line)")
+
+
+def make_capture_file(path, size, length, sparse):
+    """Writes a ``size``-byte capture file ending with one marker line.
+
+    A sparse file is a hole full of zero bytes (one enormous line) and costs no disk
+    space; otherwise the same block of distinct lines is written over and over.
+    """
+    marker = b"MARKER the needle line\n"
+    with open(path, "wb") as f:
+        if sparse:
+            f.truncate(size - len(marker))
+            f.seek(size - len(marker))
+        else:
+            block = "".join(f"{line}\n" for line in make_lines(max(1, (1 << 20) // (length + 1)), length)).encode()
+            remaining = size - len(marker)
+            while remaining > 0:
+                f.write(block[:remaining])
+                remaining -= len(block)
+        f.write(marker)
+
+
+def bench_mmap(args):
+    path = args.file or os.path.join(tempfile.gettempdir(), "serial_log_bench.txt")
+    size = args.size_mb * 1024 * 1024
+    if not os.path.exists(path) or os.path.getsize(path) != size or args.regenerate:
+        start = time.perf_counter()
+        make_capture_file(path, size, args.length, args.sparse)
+        print(f"generated {path} ({args.size_mb} MB{', sparse' if args.sparse else ''}) "
+              f"in {time.perf_counter() - start:.1f} s")
+    try:
+        gc.collect()
+        rss_before = rss_bytes()
+        mapped = MappedLog(path)
+        start = time.perf_counter()
+        mapped.build_index()
+        elapsed = time.perf_counter() - start
+        print(f"mmap: indexed {len(mapped)} lines / {size / 1e6:.0f} MB in {elapsed:.2f} s "
+              f"({size / elapsed / 1e6:.0f} MB/s, {len(mapped) / elapsed / 1e6:.2f} M lines/s), "
+              f"RSS +{(rss_bytes() - rss_before) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        hits = list(mapped.find_lines(re.compile("needle", re.IGNORECASE)))
+        print(f"      find 'needle': {len(hits)} hit(s) at line {hits[-1][0] if hits else '-'} "
+              f"in {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        first, last = mapped[0], mapped[-1]
+        print(f"      first/last line: {len(first)} / {len(last)} chars "
+              f"in {(time.perf_counter() - start) * 1e3:.2f} ms")
+    finally:
+        if not args.keep:
+            os.remove(path)
+
+
+def echo_device(fd, stop, reply=b"OK"):
+    """Fake firmware on the master side of a pty: answers every command line with ``reply``."""
+    buffer = b""
+    while not stop.is_set():
+        readable, _, _ = select.select([fd], [], [], 0.1)
+        if not readable:
+            continue
+        buffer += os.read(fd, 65536)
+        *commands, buffer = buffer.split(b"\n")
+        if commands:
+            os.write(fd, b"".join(b"%s %s\n" % (reply, command.strip()) for command in commands))
+
+
+def bench_macro(args):
+    import pty
+    import tty
+
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    stop = threading.Event()
+    device = threading.Thread(target=echo_device, args=(master, stop), daemon=True)
+    device.start()
+
+    engine = CaptureEngine().start()
+    records = [0]
+    engine.open_port(os.ttyname(slave), 115200, sink=lambda batch: records.__setitem__(0, records[0] + len(batch))).result()
+    steps = parse_macro(f"timeout {args.timeout}\nloop {args.iterations}\nsend ping\nexpect ^OK ping$\nend\n")
+    runner = MacroRunner(engine, 0, steps)
+
+    gc.collect()
+    rss_before = rss_bytes()
+    window = max(1, args.iterations // 10)
+    marks = []  # (iterations, time) roughly every tenth of the run
+    start = time.perf_counter()
+    done = runner.start()
+    while not done.done():
+        time.sleep(0.005)
+        if runner.iterations >= window * (len(marks) + 1):
+            marks.append((runner.iterations, time.perf_counter()))
+    error = done.result()
+    elapsed = time.perf_counter() - start
+    rss_growth = rss_bytes() - rss_before
+    stop.set()
+    engine.stop()
+
+    print(f"macro: {runner.iterations} send/expect iterations in {elapsed:.2f} s "
+          f"({runner.iterations / elapsed:.0f} /s){f', FAILED: {error}' if error else ''}")
+    if len(marks) >= 2:
+        rates = [(i1 - i0) / (t1 - t0) for (i0, t0), (i1, t1) in zip(marks, marks[1:]) if t1 > t0]
+        if rates:
+            print(f"       rate first tenth {rates[0]:.0f} /s, last tenth {rates[-1]:.0f} /s")
+    print(f"       {records[0]} records logged, RSS +{rss_growth / 1e6:.1f} MB")
+
+
+def bench_archive(args):
+    """Archive search throughput for each worker count, on a directory of generated capture files."""
+    directory = args.dir or os.path.join(tempfile.gettempdir(), "serial_log_archive_bench")
+    per_file = args.size_mb * 1024 * 1024 // args.files
+    os.makedirs(directory, exist_ok=True)
+    for i in range(args.files):
+        path = os.path.join(directory, f"capture.{i:04d}.txt")
+        if not os.path.exists(path) or os.path.getsize(path) != per_file:
+            make_capture_file(path, per_file, args.length, False)
+    total = args.files * per_file
+    print(f"archive: {args.files} files, {total / 1e9:.2f} GB in {directory}")
+    baseline = None
+    try:
+        for workers in args.workers:
+            search = ArchiveSearch(directory, "needle", workers=workers, chunk_bytes=args.chunk_mb << 20)
+            start = time.perf_counter()
+            hits = search.run(lambda hits: None)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed * workers
+            print(f"         {workers:3d} workers: {hits} hits in {elapsed:.2f} s ({total / elapsed / 1e9:.2f} GB/s, "
+                  f"{baseline / elapsed / workers:.0%} of linear)")
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_highlight(args):
+    """Ingest cost of classifying lines with the highlight rules, against plain extend_records()."""
+    lines = make_lines(args.batch, args.length)
+    # 몇 줄에 하나씩 규칙에 걸리는 줄을 섞는다
+    for i in range(0, len(lines), 50):
+        lines[i] = "ERROR " + lines[i]
+    records = [(0.0, KIND_RX, 0, line) for line in lines]
+    rules = HighlightRules(rules=HighlightRules.defaults + [
+        (fr"\bcode={i}\b", "#8be9fd", False, False) for i in range(max(0, args.rules - len(HighlightRules.defaults)))
+    ])
+    rounds = max(1, args.lines // len(records))
+
+    def run(classify):
+        store = LogStore(max_lines=args.lines)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            store.extend_records(records, classify(records) if classify else None)
+        return (time.perf_counter() - start) / (rounds * len(records))
+
+    plain = run(None)
+    styled = run(rules.classify_records)
+    print(f"highlight: {len(rules.rules)} rules, {args.length} B lines: ingest {plain * 1e6:.2f} us/line plain, "
+          f"{styled * 1e6:.2f} us/line classified (+{(styled - plain) * 1e6:.2f} us/line)")
+    print(f"           at {args.rate} lines/s that is {(styled - plain) * args.rate * 100:.2f} % of one core")
+
+
+def bench_fields(args):
+    """Field extraction at ingest and from a capture file, and export of the matched rows."""
+    lines = [line.replace("=", " ") for line in make_lines(args.batch, args.length)]
+    # 몇 줄에 하나씩 key=value 텔레메트리 줄을 섞는다
+    for i in range(0, len(lines), args.every):
+        lines[i] = f"telemetry seq={i} temp={20 + i % 7 * 0.25} volt=3.{i % 10}V state=ok"
+    records = [(time.monotonic(), KIND_RX, 0, line) for line in lines]
+    rounds = max(1, args.lines // len(records))
+    table = FieldTable(FieldExtractor(rules=[FieldExtractor.KEY_VALUE]), max_rows=args.lines)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        table.submit(records)
+    elapsed = time.perf_counter() - start
+    total = rounds * len(records)
+    print(f"fields: {total} lines, {len(table)} with fields: ingest {elapsed / total * 1e6:.2f} us/line "
+          f"({total / elapsed:,.0f} lines/s on the RX thread)")
+    directory = tempfile.mkdtemp(prefix="serial_log_fields_bench")
+    try:
+        capture = os.path.join(directory, "capture.txt")
+        with open(capture, "w", encoding="utf-8") as f:
+            for _ in range(rounds):
+                f.write(format_records(records))
+        log = MappedLog(capture)
+        log.build_index()
+        start = time.perf_counter()
+        offline = FieldTable(table.extractor, max_rows=args.lines)
+        offline.add_rows(list(table.extractor.extract_capture(log)))
+        elapsed = time.perf_counter() - start
+        log.close()
+        print(f"        capture file ({os.path.getsize(capture) / 1e6:.0f} MB): {len(offline)} rows in {elapsed:.2f} s")
+        columns = table.snapshot()
+        for name in args.format:
+            path = os.path.join(directory, f"fields.{name}")
+            start = time.perf_counter()
+            try:
+                rows = export_fields(path, columns)
+            except RuntimeError as e:
+                print(f"        {name}: {e}")
+                continue
+            print(f"        {name}: {rows} rows in {time.perf_counter() - start:.2f} s "
+                  f"({os.path.getsize(path) / 1e6:.1f} MB)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def percentiles(values, points=(50, 90, 99, 99.9)):
+    values = sorted(values)
+    if not values:
+        return {f"p{p:g}": None for p in points} | {"max": None}
+    result = {f"p{p:g}": values[min(len(values) - 1, int(len(values) * p / 100))] for p in points}
+    result["max"] = values[-1]
+    return result
+
+
+def synthetic_device(fd, rate, length, seconds, write_times, stop):
+    """Writes numbered lines of ``length`` bytes to ``fd`` at ``rate`` lines/s (0 = as fast as it can).
+
+    Lines are written in chunks; the time just before each os.write() is recorded
+    for every line of the chunk in ``write_times`` (indexed by line number). A full
+    pty buffer blocks the writer, which is how a slow reader shows up here.
+    """
+    pad = b"x" * max(0, length - 11)
+    start = time.monotonic()
+    sent = 0
+    while not stop.is_set():
+        now = time.monotonic()
+        if now - start >= seconds:
+            break
+        count = min(2000, int((now - start) * rate) - sent) if rate else 1000
+        if count <= 0:
+            time.sleep(0.0005)
+            continue
+        data = b"".join(b"%010d %s\n" % (sent + i, pad) for i in range(count))
+        write_times.extend([time.monotonic()] * count)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        sent += count
+    return sent
+
+
+def bench_pipeline(args):
+    """End-to-end: pty device -> SerialThread -> RenderScheduler -> LogStore/model -> painted view."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import pty
+    import tty
+    from PySide6.QtCore import QObject, QEvent, QTimer, Qt
+    from PySide6.QtWidgets import QApplication
+    import serial_log
+
+    app = QApplication.instance() or QApplication([])
+    window = serial_log.MainWindow()
+    window.resize(800, 600)
+    window.show()
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    window.update_serial_settings(os.ttyname(slave), 115200)  # 기본 포트 대신 pty를 연다
+    tab = window.current_port_tab()
+    window.max_log_lines = args.max_lines
+    tab.set_max_lines(args.max_lines)
+
+    class PaintProbe(QObject):
+        """Notes, at every paint of the log view, up to which device line is on screen."""
+
+        def __init__(self):
+            super().__init__()
+            self.paints = []  # (time, last line number painted)
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                store = tab.log_store
+                if store.next_id > store.first_id:
+                    text = store.line(store.next_id - 1)
+                    if text[:10].isdigit():
+                        self.paints.append((time.monotonic(), int(text[:10])))
+            return False
+
+    probe = PaintProbe()
+    tab.log_output.viewport().installEventFilter(probe)
+
+    stalls = []
+    tick = [time.monotonic()]
+    interval = 0.005
+
+    def on_tick():
+        now = time.monotonic()
+        stalls.append(now - tick[0] - interval)
+        tick[0] = now
+
+    ticker = QTimer()
+    ticker.setTimerType(Qt.PreciseTimer)
+    ticker.setInterval(int(interval * 1000))
+    ticker.timeout.connect(on_tick)
+
+    results = []
+    for rate in args.rate:
+        window.current_tab().clear()
+        for _ in range(20):
+            app.processEvents()
+        gc.collect()
+        rss_before = rss_bytes()
+        write_times = array('d')
+        probe.paints.clear()
+        stalls.clear()
+        stop = threading.Event()
+        sent = []
+        device = threading.Thread(
+            target=lambda: sent.append(synthetic_device(master, rate, args.length, args.seconds, write_times, stop)),
+            daemon=True)
+        tick[0] = time.monotonic()
+        ticker.start()
+        start = time.monotonic()
+        device.start()
+        # 장치가 다 쓴 뒤에도 마지막 줄이 그려질 때까지 (최대 --drain초) 기다린다
+        deadline = None
+        while True:
+            app.processEvents()
+            time.sleep(0.0005)
+            if not device.is_alive():
+                deadline = deadline or time.monotonic() + args.drain
+                if (probe.paints and sent and probe.paints[-1][1] >= sent[0] - 1) or time.monotonic() > deadline:
+                    break
+        elapsed = time.monotonic() - start
+        ticker.stop()
+        rss_growth = rss_bytes() - rss_before
+
+        # 줄마다: 그 줄이 처음 화면에 그려진 시각 - 장치가 쓴 시각
+        latencies = []
+        shown = 0
+        for paint_time, last in probe.paints:
+            if last >= shown:
+                latencies.extend(paint_time - write_times[i] for i in range(shown, last + 1))
+                shown = last + 1
+        written = sent[0] if sent else 0
+        received = tab.log_store.next_id
+        last_paint = probe.paints[-1][0] - start if probe.paints else elapsed
+        result = {
+            "target_rate": rate,
+            "line_bytes": args.length,
+            "seconds": round(elapsed, 3),
+            "lines_written": written,
+            "lines_received": received,
+            "lines_rendered": shown,
+            "write_rate": round(written / args.seconds, 1),
+            "sustained_rate": round(shown / last_paint, 1) if last_paint > 0 else None,
+            "latency_ms": {k: (round(v * 1000, 3) if v is not None else None)
+                           for k, v in percentiles(latencies).items()},
+            "stall_ms": {k: (round(max(0.0, v) * 1000, 3) if v is not None else None)
+                         for k, v in percentiles(stalls, (50, 99)).items()},
+            "stalls_over_50ms": sum(1 for stall in stalls if stall > 0.05),
+            "frames": len(probe.paints),
+            "rss_growth_mb": round(rss_growth / 1e6, 2),
+        }
+        results.append(result)
+        latency, stall = result["latency_ms"], result["stall_ms"]
+        print(f"pipeline @ {rate or 'max'} lines/s x {args.length} B: wrote {written}, rendered {shown} "
+              f"({result['sustained_rate']} lines/s sustained), latency p50 {latency['p50']} / "
+              f"p99 {latency['p99']} / max {latency['max']} ms, stalls p99 {stall['p99']} / max {stall['max']} ms, "
+              f"RSS +{result['rss_growth_mb']} MB")
+    window.close()
+    os.close(master)
+
+    if args.json:
+        report = {
+            "benchmark": "pipeline",
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+            "render_fps": window.render_fps,
+            "max_lines": args.max_lines,
+            "results": results,
+        }
+        if args.json == "-":
+            print(json.dumps(report, indent=2))
+        else:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+def share_clients(address, count, idle, seconds, results):
+    """Connects ``count`` reading and ``idle`` never-reading clients; puts the lines each reader got in ``results``."""
+    clients = [socket.create_connection(address) for _ in range(count + idle)]
+    selector = selectors.DefaultSelector()
+    lines = {}
+    for client in clients[:count]:
+        client.setblocking(False)
+        selector.register(client, selectors.EVENT_READ)
+        lines[client] = 0
+    results.put("ready")
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for key, _ in selector.select(0.1):
+            lines[key.fileobj] += key.fileobj.recv(1 << 20).count(b"\n")
+    results.put(sorted(lines.values()))
+    for client in clients:
+        client.close()
+
+
+def bench_share(args):
+    """GUI with a pty device shared over TCP: what the clients get, and whether the GUI keeps up."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import pty
+    import tty
+    from PySide6.QtCore import QTimer, Qt
+    from PySide6.QtWidgets import QApplication
+    import serial_log
+
+    app = QApplication.instance() or QApplication([])
+    window = serial_log.MainWindow()
+    window.show()
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    window.update_serial_settings(os.ttyname(slave), 115200)
+    for _ in range(20):
+        app.processEvents()
+    window.share_server = ShareServer(serial_log.shared_engine(), port=0, replay=args.replay,
+                                      max_queue=args.queue_kb * 1024, on_slow=args.on_slow).start()
+    address = ("127.0.0.1", window.share_server.port)
+
+    # client는 다른 프로세스에서 돌려야 GUI와 GIL을 나눠 쓰지 않는다
+    results = multiprocessing.get_context("spawn").Queue()
+    clients = multiprocessing.get_context("spawn").Process(
+        target=share_clients, args=(address, args.clients, args.slow, args.seconds + args.drain, results))
+    clients.start()
+    while results.empty():
+        app.processEvents()
+        time.sleep(0.01)
+    results.get()
+
+    stalls = []
+    tick = [time.monotonic()]
+    interval = 0.005
+
+    def on_tick():
+        now = time.monotonic()
+        stalls.append(now - tick[0] - interval)
+        tick[0] = now
+
+    ticker = QTimer()
+    ticker.setTimerType(Qt.PreciseTimer)
+    ticker.setInterval(int(interval * 1000))
+    ticker.timeout.connect(on_tick)
+    ticker.start()
+    stop = threading.Event()
+    sent = []
+    device = threading.Thread(
+        target=lambda: sent.append(synthetic_device(master, args.rate, args.length, args.seconds, array('d'), stop)),
+        daemon=True)
+    device.start()
+    while results.empty():
+        app.processEvents()
+        time.sleep(0.0005)
+    ticker.stop()
+    received = results.get()
+    clients.join()
+    server = window.share_server
+    written = sent[0] if sent else 0
+    stall = {k: round(max(0.0, v) * 1000, 3) for k, v in percentiles(stalls, (50, 99)).items()}
+    complete = sum(1 for lines in received if lines >= written)
+    print(f"share @ {args.rate or 'max'} lines/s x {args.length} B: wrote {written}; {args.clients} readers got "
+          f"{min(received, default=0)}..{max(received, default=0)} lines ({complete} got every line), {args.slow} idle clients: "
+          f"{server.dropped} dropped, {server.skipped} lines skipped")
+    print(f"        GUI stalls p50 {stall['p50']} / p99 {stall['p99']} / max {stall['max']} ms, "
+          f"{sum(1 for s in stalls if s > 0.05)} over 50 ms; view has {window.current_port_tab().log_store.next_id} lines")
+    window.close()
+    os.close(master)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    store = sub.add_parser("store", help="LogStore append rate and memory per line")
+    store.add_argument("--lines", type=int, default=1000000)
+    store.add_argument("--length", type=int, default=80, help="bytes per line")
+    store.add_argument("--max-lines", type=int, default=0, help="store capacity (default: --lines)")
+    store.add_argument("--batch", type=int, default=1000, help="lines per extend() call")
+    store.add_argument("--compare", action="store_true", help="also measure the old list-of-dicts log")
+    store.set_defaults(func=bench_store)
+
+    mapped = sub.add_parser("mmap", help="offline viewer: index build and search on a big capture file")
+    mapped.add_argument("--size-mb", type=int, default=3072)
+    mapped.add_argument("--length", type=int, default=80, help="bytes per line")
+    mapped.add_argument("--sparse", action="store_true", help="use a sparse file of zero bytes")
+    mapped.add_argument("--file", help="where to create the file (default: temp dir)")
+    mapped.add_argument("--regenerate", action="store_true")
+    mapped.add_argument("--keep", action="store_true", help="do not delete the file afterwards")
+    mapped.set_defaults(func=bench_mmap)
+
+    macro = sub.add_parser("macro", help="macro runner stress test against a fake device on a pty")
+    macro.add_argument("--iterations", type=int, default=10000)
+    macro.add_argument("--timeout", type=float, default=2.0, help="expect timeout in seconds")
+    macro.set_defaults(func=bench_macro)
+
+    archive = sub.add_parser("archive", help="parallel search over a directory of capture files")
+    archive.add_argument("--size-mb", type=int, default=2048, help="total size of the archive")
+    archive.add_argument("--files", type=int, default=8)
+    archive.add_argument("--length", type=int, default=80, help="bytes per line")
+    archive.add_argument("--chunk-mb", type=int, default=64, help="bytes per search task")
+    archive.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    archive.add_argument("--dir", help="directory to generate the files in (default: a temp directory)")
+    archive.add_argument("--keep", action="store_true", help="keep the generated files")
+    archive.set_defaults(func=bench_archive)
+
+    highlight = sub.add_parser("highlight", help="cost of classifying lines with highlight rules at ingest")
+    highlight.add_argument("--lines", type=int, default=200000)
+    highlight.add_argument("--length", type=int, default=80, help="bytes per line")
+    highlight.add_argument("--batch", type=int, default=1000, help="lines per extend_records() call")
+    highlight.add_argument("--rules", type=int, default=10, help="number of rules (the defaults plus generated ones)")
+    highlight.add_argument("--rate", type=int, default=10000, help="line rate to express the overhead at")
+    highlight.set_defaults(func=bench_highlight)
+
+    fields = sub.add_parser("fields", help="key=value field extraction at ingest and columnar export")
+    fields.add_argument("--lines", type=int, default=1000000)
+    fields.add_argument("--length", type=int, default=80, help="bytes per line")
+    fields.add_argument("--batch", type=int, default=1000, help="lines per submit() call")
+    fields.add_argument("--every", type=int, default=4, help="one telemetry line in this many")
+    fields.add_argument("--format", nargs="+", default=["csv", "parquet"], choices=["csv", "parquet", "arrow"])
+    fields.set_defaults(func=bench_fields)
+
+    share = sub.add_parser("share", help="TCP sharing: many clients at a high line rate while the GUI runs")
+    share.add_argument("--clients", type=int, default=100, help="clients that read everything")
+    share.add_argument("--slow", type=int, default=5, help="clients that connect and never read")
+    share.add_argument("--rate", type=int, default=20000, help="lines/s the device sends (0 = as fast as it can)")
+    share.add_argument("--length", type=int, default=80, help="bytes per line")
+    share.add_argument("--seconds", type=float, default=5)
+    share.add_argument("--drain", type=float, default=3, help="seconds the clients keep reading after the device stops")
+    share.add_argument("--replay", type=int, default=0, help="lines replayed to each client on connect")
+    share.add_argument("--queue-kb", type=int, default=1024)
+    share.add_argument("--on-slow", choices=["skip", "drop"], default="skip")
+    share.set_defaults(func=bench_share)
+
+    pipeline = sub.add_parser("pipeline", help="GUI pipeline throughput and latency from a synthetic pty device")
+    pipeline.add_argument("--rate", type=int, nargs="+", default=[10000, 50000, 0],
+                          help="line rates to run, in lines/s (0 = as fast as possible)")
+    pipeline.add_argument("--length", type=int, default=80, help="bytes per line")
+    pipeline.add_argument("--seconds", type=float, default=5.0, help="how long the device writes per rate")
+    pipeline.add_argument("--drain", type=float, default=10.0, help="max seconds to wait for the view to catch up")
+    pipeline.add_argument("--max-lines", type=int, default=100000, help="log store capacity")
+    pipeline.add_argument("--json", help="write machine-readable results to this file ('-' for stdout)")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
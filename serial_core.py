@@ -0,0 +1,3375 @@
+"""GUI-independent building blocks of the serial logger.
+
+Nothing in this module imports PySide6, so it can be used (and benchmarked) without
+a running Qt application.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import gzip
+import heapq
+import json
+import math
+import mmap
+import os
+import queue
+import re
+import shutil
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+
+import serial
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축은 zstandard 패키지가 있을 때만 쓸 수 있다
+    zstandard = None
+
+# Record kinds (stored as one byte per line). KIND_RAW records are received binary
+# frames whose text is the undecoded bytes; they are shown and written as hex.
+KIND_RX, KIND_TX, KIND_ERROR, KIND_SYSTEM, KIND_RAW = range(5)
+KIND_NAMES = ("RX", "TX", "ERROR", "SYSTEM", "RAW")
+
+# time.monotonic() 값에 더하면 벽시계 시간(time.time())이 된다
+MONOTONIC_TO_WALL = time.time() - time.monotonic()
+
+
+def format_timestamp(timestamp):
+    """Formats a time.monotonic() value as local wall-clock time with microseconds."""
+    wall = timestamp + MONOTONIC_TO_WALL
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)) + f".{int(wall % 1 * 1e6):06d}"
+
+
+def record_text(kind, text):
+    """Returns the text of a record's payload: KIND_RAW frames (bytes) as spaced hex."""
+    return text.hex(" ") if kind == KIND_RAW else text
+
+
+def format_records(records, timestamps=True):
+    """Formats ``(timestamp, kind, port, text)`` records as capture file lines."""
+    if not timestamps:
+        return "".join(f"{record_text(kind, text)}\n" for _, kind, _, text in records)
+    # 0번 이외의 포트는 종류 뒤에 포트 번호를 붙인다 (예: "RX@2")
+    return "".join(
+        f"{format_timestamp(timestamp)} {KIND_NAMES[kind]}{f'@{port}' if port else ''} {record_text(kind, text)}\n"
+        for timestamp, kind, port, text in records)
+
+
+class _Chunk:
+    """A block of consecutive log records.
+
+    The text of every line lives in one bytes arena with an array of end offsets;
+    timestamp, kind and port are kept in parallel arrays. ``raw`` tells whether any
+    line is a KIND_RAW frame, so chunks of text lines skip the per-line kind check.
+    """
+    __slots__ = ('data', 'ends', 'times', 'kinds', 'ports', 'styles', 'raw')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('I')
+        self.times = array('d')
+        self.kinds = array('B')
+        self.ports = array('H')
+        self.styles = array('B')
+        self.raw = False
+
+    def get(self, k):
+        start = self.ends[k - 1] if k else 0
+        return self.data[start:self.ends[k]]
+
+    def text(self, k):
+        if self.raw and self.kinds[k] == KIND_RAW:
+            return self.get(k).hex(" ")
+        return self.get(k).decode('utf-8', 'surrogateescape')
+
+    def seal(self):
+        # 꽉 찬 청크는 더 이상 바뀌지 않으므로 여유 할당분 없이 bytes로 고정한다
+        self.data = bytes(self.data)
+
+    def nbytes(self):
+        return sum(sys.getsizeof(column)
+                   for column in (self.data, self.ends, self.times, self.kinds, self.ports, self.styles))
+
+
+class LogStore:
+    """Bounded, compact in-memory log with O(1) append and eviction.
+
+    Lines are kept UTF-8 encoded in fixed-size chunks (a bytes arena and an array of
+    end offsets), so a line costs little more than its payload. Each line also has
+    a time.monotonic() receive timestamp, a kind (KIND_RX, KIND_TX, KIND_ERROR or
+    KIND_SYSTEM, KIND_RAW), a port number and a highlight style id (see
+    HighlightRules), stored in parallel arrays. KIND_RAW
+    lines are stored as the bytes received; the text accessors return them as hex
+    and data() as bytes. Once more than
+    ``max_lines`` lines are stored the oldest ones are evicted, a whole chunk being
+    released as soon as its last line is gone.
+
+    Every line gets an absolute id that never changes: the stored lines are
+    ``first_id`` .. ``next_id - 1``. Integer indexing and slicing are relative to the
+    oldest stored line, like a list.
+    """
+
+    def __init__(self, max_lines=10000, chunk_lines=4096):
+        self.max_lines = max_lines
+        self.chunk_lines = chunk_lines
+        self._chunks = deque()
+        self._base_id = 0  # id of the first line in self._chunks[0]
+        self.first_id = 0
+        self.next_id = 0
+
+    def __len__(self):
+        return self.next_id - self.first_id
+
+    def append(self, text, timestamp=None, kind=KIND_SYSTEM, port=0):
+        """Appends one line, evicting the oldest one if the store is full."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._append(text if kind == KIND_RAW else text.encode('utf-8', 'surrogateescape'), timestamp, kind, port)
+        self._trim()
+
+    def extend(self, lines, timestamp=None, kind=KIND_SYSTEM, port=0):
+        """Appends several lines sharing one timestamp, kind and port."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        for text in lines:
+            self._append(text if kind == KIND_RAW else text.encode('utf-8', 'surrogateescape'), timestamp, kind, port)
+        self._trim()
+
+    def extend_records(self, records, styles=None):
+        """Appends ``(timestamp, kind, port, text)`` records, evicting old lines once at the end.
+
+        ``styles``, if given, holds the style id of each record (HighlightRules.classify_records()).
+        """
+        if styles is None:
+            for timestamp, kind, port, text in records:
+                self._append(text if kind == KIND_RAW else text.encode('utf-8', 'surrogateescape'),
+                             timestamp, kind, port)
+        else:
+            for (timestamp, kind, port, text), style in zip(records, styles):
+                self._append(text if kind == KIND_RAW else text.encode('utf-8', 'surrogateescape'),
+                             timestamp, kind, port, style)
+        self._trim()
+
+    def _append(self, data, timestamp, kind, port, style=0):
+        if not self._chunks or len(self._chunks[-1].ends) == self.chunk_lines:
+            if self._chunks:
+                self._chunks[-1].seal()
+            self._chunks.append(_Chunk())
+        chunk = self._chunks[-1]
+        chunk.data += data
+        chunk.ends.append(len(chunk.data))
+        chunk.times.append(timestamp)
+        chunk.kinds.append(kind)
+        chunk.ports.append(port)
+        chunk.styles.append(style)
+        if kind == KIND_RAW:
+            chunk.raw = True
+        self.next_id += 1
+
+    def _trim(self):
+        excess = len(self) - self.max_lines
+        if excess <= 0:
+            return
+        self.first_id += excess
+        while self._chunks and self._base_id + len(self._chunks[0].ends) <= self.first_id:
+            self._base_id += len(self._chunks[0].ends)
+            self._chunks.popleft()
+
+    def set_max_lines(self, max_lines):
+        """Changes the capacity, evicting the oldest lines if needed."""
+        self.max_lines = max_lines
+        self._trim()
+
+    def clear(self):
+        """Removes every line. Ids keep counting up from where they were."""
+        self._chunks.clear()
+        self._base_id = self.first_id = self.next_id
+
+    def _locate(self, line_id):
+        if not self.first_id <= line_id < self.next_id:
+            raise IndexError(f"line {line_id} is not in the log")
+        offset = line_id - self._base_id
+        return self._chunks[offset // self.chunk_lines], offset % self.chunk_lines
+
+    def line(self, line_id):
+        """Returns the line with absolute id ``line_id``."""
+        chunk, k = self._locate(line_id)
+        return chunk.text(k)
+
+    def data(self, line_id):
+        """Returns the stored bytes of ``line_id`` (the frame itself for KIND_RAW)."""
+        chunk, k = self._locate(line_id)
+        return bytes(chunk.get(k))
+
+    def timestamp(self, line_id):
+        """Returns the time.monotonic() receive time of ``line_id``."""
+        chunk, k = self._locate(line_id)
+        return chunk.times[k]
+
+    def kind(self, line_id):
+        chunk, k = self._locate(line_id)
+        return chunk.kinds[k]
+
+    def port(self, line_id):
+        chunk, k = self._locate(line_id)
+        return chunk.ports[k]
+
+    def style(self, line_id):
+        chunk, k = self._locate(line_id)
+        return chunk.styles[k]
+
+    def restyle(self, classify):
+        """Recomputes the style id of every stored line as ``classify(kind, text)``, e.g. after the rules changed."""
+        _, chunks, _, _ = self._snapshot()
+        for chunk in chunks:
+            kinds, styles = chunk.kinds, chunk.styles
+            for k in range(len(styles)):
+                styles[k] = classify(kinds[k], chunk.text(k))
+
+    def record(self, line_id):
+        """Returns ``(timestamp, kind, port, text)`` for ``line_id``."""
+        chunk, k = self._locate(line_id)
+        return chunk.times[k], chunk.kinds[k], chunk.ports[k], chunk.text(k)
+
+    def id_for_time(self, timestamp):
+        """Returns the id of the first stored line received at or after ``timestamp``.
+
+        Lines are appended in arrival order, so timestamps are (close to) sorted and
+        both the chunk and the line inside it are found by bisection.
+        """
+        base_id, chunks, first_id, next_id = self._snapshot()
+        lo = bisect_left([chunk.times[-1] for chunk in chunks], timestamp)
+        if lo == len(chunks):
+            return next_id
+        line_id = base_id + lo * self.chunk_lines + bisect_left(chunks[lo].times, timestamp)
+        return min(max(line_id, first_id), next_id)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.line(self.first_id + i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("log index out of range")
+        return self.line(self.first_id + index)
+
+    def __iter__(self):
+        for _, text in self.iter_lines():
+            yield text
+
+    def _snapshot(self):
+        """Returns ``(base_id, chunks, first_id, next_id)`` as one consistent view."""
+        next_id = self.next_id
+        while True:
+            base_id = self._base_id
+            chunks = list(self._chunks)
+            if base_id == self._base_id:
+                break
+        return base_id, chunks, max(base_id, self.first_id), next_id
+
+    def iter_lines(self, start_id=None, end_id=None):
+        """Yields ``(line_id, text)`` for the lines in ``[start_id, end_id)``.
+
+        The chunk list is snapshotted up front, so the iteration stays valid while
+        other code keeps appending to (or evicting from) the store.
+        """
+        base_id, chunks, first_id, next_id = self._snapshot()
+        start_id = first_id if start_id is None else max(start_id, first_id)
+        end_id = next_id if end_id is None else min(end_id, next_id)
+        line_id = start_id
+        while line_id < end_id:
+            offset = line_id - base_id
+            chunk = chunks[offset // self.chunk_lines]
+            k = offset % self.chunk_lines
+            stop = min(len(chunk.ends), k + end_id - line_id)
+            if chunk.raw:
+                for j in range(k, stop):
+                    yield line_id, chunk.text(j)
+                    line_id += 1
+                continue
+            for j in range(k, stop):
+                yield line_id, chunk.get(j).decode('utf-8', 'surrogateescape')
+                line_id += 1
+
+    def iter_ids(self, line_ids):
+        """Yields ``(line_id, text)`` for each of ``line_ids`` that is still stored.
+
+        Like iter_lines(), this is safe to run in another thread.
+        """
+        base_id, chunks, first_id, next_id = self._snapshot()
+        for line_id in line_ids:
+            if first_id <= line_id < next_id:
+                offset = line_id - base_id
+                chunk = chunks[offset // self.chunk_lines]
+                yield line_id, chunk.text(offset % self.chunk_lines)
+
+    def iter_records(self, start_id=None, end_id=None):
+        """Yields ``(line_id, timestamp, kind, port, text)``; thread-safe like iter_lines()."""
+        base_id, chunks, first_id, next_id = self._snapshot()
+        start_id = first_id if start_id is None else max(start_id, first_id)
+        end_id = next_id if end_id is None else min(end_id, next_id)
+        for line_id in range(start_id, end_id):
+            offset = line_id - base_id
+            chunk = chunks[offset // self.chunk_lines]
+            k = offset % self.chunk_lines
+            yield line_id, chunk.times[k], chunk.kinds[k], chunk.ports[k], chunk.text(k)
+
+    def find_lines(self, pattern, start_id=None, end_id=None, kinds=None):
+        """Yields ``(line_id, text)`` for lines in ``[start_id, end_id)`` that ``pattern`` matches.
+
+        ``pattern`` may be None to match every line; ``kinds``, if given, is a set of
+        record kinds to keep.
+        """
+        search = pattern.search if pattern is not None else None
+        if kinds is None:
+            for line_id, text in self.iter_lines(start_id, end_id):
+                if search is None or search(text):
+                    yield line_id, text
+            return
+        for line_id, _, kind, _, text in self.iter_records(start_id, end_id):
+            if kind in kinds and (search is None or search(text)):
+                yield line_id, text
+
+    def nbytes(self):
+        """Approximate memory held by the stored lines, in bytes."""
+        return sum(chunk.nbytes() for chunk in self._chunks)
+
+
+class TrigramIndex:
+    """Inverted index from lower-cased character trigrams to line ids.
+
+    A substring query of three or more characters only has to look at the lines
+    that contain every trigram of the query, found by intersecting the (ascending)
+    posting lists. Lines are added as they arrive; postings of evicted lines are
+    dropped in bulk by trim() once enough of them have piled up.
+    """
+
+    def __init__(self, sweep_lines=65536):
+        self.sweep_lines = sweep_lines
+        self.first_id = 0
+        self._swept_id = 0
+        self._postings = {}  # trigram -> array('Q') of line ids, ascending
+
+    def add(self, line_id, text):
+        text = text.lower()
+        postings = self._postings
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = array('Q', (line_id,))
+            else:
+                ids.append(line_id)
+
+    def add_lines(self, first_id, lines):
+        """Indexes ``lines``, whose ids start at ``first_id``."""
+        for offset, text in enumerate(lines):
+            self.add(first_id + offset, text)
+
+    def trim(self, first_id, force=False):
+        """Forgets lines below ``first_id``; the postings are swept every ``sweep_lines`` lines."""
+        self.first_id = first_id
+        if not force and first_id - self._swept_id < self.sweep_lines:
+            return
+        self._swept_id = first_id
+        # 목록을 잘라 내지 않고 새 목록으로 바꾼다: 페이지 단위로 읽히는 candidates()가
+        # 아직 옛 목록을 돌고 있을 수 있다
+        postings = self._postings
+        for gram, ids in list(postings.items()):
+            cut = bisect_left(ids, first_id)
+            if cut == len(ids):
+                del postings[gram]
+            elif cut:
+                postings[gram] = ids[cut:]
+
+    def candidates(self, query):
+        """Yields, in ascending order, the ids of lines containing every trigram of ``query``.
+
+        The result is a snapshot of the index at the first next(): lines added or
+        trimmed while the generator is still being read do not change it.
+        """
+        query = query.lower()
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = [self._postings.get(gram) for gram in grams]
+        if not postings or any(ids is None for ids in postings):
+            return
+        postings.sort(key=len)
+        # trim()은 목록을 바꿔 끼우기만 하고, add()는 뒤에 붙이기만 하니 길이만 기억하면 된다
+        smallest, others = postings[0], postings[1:]
+        ends = [len(ids) for ids in others]
+        positions = [0] * len(others)
+        for line_id in islice(smallest, bisect_left(smallest, self.first_id), len(smallest)):
+            for n, ids in enumerate(others):
+                pos = bisect_left(ids, line_id, positions[n], ends[n])
+                positions[n] = pos
+                if pos == ends[n]:
+                    return  # 더 큰 id는 이 목록에 없다
+                if ids[pos] != line_id:
+                    break
+            else:
+                yield line_id
+
+    def search(self, query, store):
+        """Yields ``(line_id, text)`` for stored lines containing ``query``, case-insensitively.
+
+        ``query`` must be at least three characters long.
+        """
+        needle = query.lower()
+        for line_id, text in store.iter_ids(self.candidates(query)):
+            if needle in text.lower():
+                yield line_id, text
+
+
+# re에 공개된 파서가 없어 내부 모듈을 쓴다; 없어지면 guard 없이 동작한다
+try:
+    from re import _parser as _sre_parse, _constants as _sre_constants
+except ImportError:
+    try:  # Python < 3.11
+        import sre_parse as _sre_parse, sre_constants as _sre_constants
+    except ImportError:
+        _sre_parse = _sre_constants = None
+
+
+def _first_chars(pattern, flags=0, limit=512):
+    """Returns ``(chars, ignore_case)``: the characters a match of ``pattern`` can start
+    with, and whether they compare ignoring case; None if that is not a small known set.
+
+    Used to put a ``(?=[...])`` guard in front of a combined regex: re has no
+    multi-pattern search, and the guard lets it skip most positions of a line
+    without trying every branch there.
+    """
+    if _sre_parse is None:
+        return None
+    c = _sre_constants
+    ignore_case = bool(flags & re.IGNORECASE)
+
+    def sequence(items):
+        chars = set()
+        for item in items:
+            first = element(*item)
+            if first is None:
+                return None
+            item_chars, nullable = first
+            chars |= item_chars
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def element(op, av):
+        nonlocal ignore_case
+        if op is c.LITERAL:
+            return {chr(av)}, False
+        if op is c.IN:
+            chars = set()
+            for set_op, set_av in av:
+                if set_op is c.LITERAL:
+                    chars.add(chr(set_av))
+                elif set_op is c.RANGE and set_av[1] - set_av[0] < limit:
+                    chars.update(map(chr, range(set_av[0], set_av[1] + 1)))
+                else:  # NEGATE, CATEGORY (\w, \d) ...
+                    return None
+            return chars, False
+        if op in (c.AT, c.ASSERT, c.ASSERT_NOT):
+            return set(), True  # 폭이 없으므로 다음 요소가 첫 글자를 정한다
+        if op is c.SUBPATTERN:
+            if av[1] & re.IGNORECASE:
+                ignore_case = True
+            return sequence(av[-1])
+        if op is c.BRANCH:
+            chars, nullable = set(), False
+            for branch in av[1]:
+                first = sequence(branch)
+                if first is None:
+                    return None
+                chars |= first[0]
+                nullable = nullable or first[1]
+            return chars, nullable
+        if op in (c.MAX_REPEAT, c.MIN_REPEAT) or op is getattr(c, "POSSESSIVE_REPEAT", None):
+            first = sequence(av[2])
+            return first and (first[0], first[1] or av[0] == 0)
+        return None
+
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+        if parsed.state.flags & re.IGNORECASE:
+            ignore_case = True
+        first = sequence(parsed)
+    except Exception:  # 내부 파서가 바뀌었으면 guard 없이 쓴다
+        return None
+    if first is None or first[1] or len(first[0]) > limit:
+        return None  # 빈 문자열에 맞을 수 있거나 첫 글자가 너무 다양하다
+    return first[0], ignore_case
+
+
+# 번호나 이름으로 그룹을 가리키는 패턴: 합치면 그룹 번호가 바뀌고 이름이 겹칠 수 있다
+_GROUP_REFERENCE = re.compile(r"\\[1-9]|\\g<|\(\?P[<=]|\(\?\(")
+
+
+class HighlightRules:
+    """User highlight rules: a regex each, with a color and a weight.
+
+    Every pattern becomes one branch of a single combined regex, so classifying a
+    line is one search however many rules there are. When the characters every
+    match can start with are known, a lookahead on them guards the alternation, so
+    most positions of a line are rejected by one character test. Patterns whose
+    group numbers or names matter (backreferences, named groups, conditionals) are
+    searched on their own instead, since combining renumbers the groups. Rule ``i`` has style id
+    ``i + 1`` and 0 means no rule matched; where several rules match a line, the
+    match that starts first wins, and at the same position the earlier rule. Raw
+    frames are never highlighted.
+
+    The rules are kept in ``path``, one per line: ``COLOR bold|normal case|nocase PATTERN``.
+    """
+
+    max_rules = 255  # style id는 줄마다 1바이트
+    defaults = [
+        (r"\b(ERROR|FATAL|ASSERT\w*|PANIC|FAIL\w*)\b", "#ff5555", True, True),
+        (r"\bWARN(ING)?\b", "#ffb86c", False, True),
+    ]
+
+    def __init__(self, path=None, rules=None):
+        self.path = path
+        self.set_rules(self.defaults if rules is None else rules)
+
+    def set_rules(self, rules):
+        """Replaces the rules, ``(pattern, color, bold, ignore_case)`` each; raises ValueError if one is invalid."""
+        rules = [tuple(rule) for rule in rules]
+        if len(rules) > self.max_rules:
+            raise ValueError(f"at most {self.max_rules} rules")
+        branches = []
+        group_styles = {}
+        group = 1
+        first_chars, guard_ignores_case = set(), False
+        separate = []
+        for style, (pattern, _, _, ignore_case) in enumerate(rules, 1):
+            flags = re.IGNORECASE if ignore_case else 0
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                raise ValueError(f"rule {style} ({pattern}): {e}") from None
+            if _GROUP_REFERENCE.search(pattern):
+                separate.append((style, compiled.search))
+                continue
+            # 맨 앞의 (?i) 같은 전역 플래그는 합친 regex 안에서는 범위 플래그로 바꿔야 한다
+            inline_flags = re.match(r"\(\?([aiLmsux]+)\)", pattern)
+            if inline_flags:
+                pattern = f"(?{inline_flags[1]}:{pattern[inline_flags.end():]})"
+            # 바깥 그룹이 가장 늦게 닫히므로 match.lastindex가 맞은 규칙의 그룹 번호가 된다
+            branches.append(f"({'(?i:' if ignore_case else '(?:'}{pattern}))")
+            group_styles[group] = style
+            group += 1 + compiled.groups
+            if first_chars is not None:
+                first = _first_chars(pattern, flags)
+                if first is None:
+                    first_chars = None
+                else:
+                    first_chars |= first[0]
+                    guard_ignores_case = guard_ignores_case or first[1]
+        combined = "|".join(branches)
+        if first_chars:
+            # 대소문자를 무시하는 규칙이 있으면 guard도 무시한다 (더 많이 통과시킬 뿐 틀리지 않는다)
+            guard = f"[{''.join(re.escape(char) for char in sorted(first_chars))}]"
+            combined = f"(?={'(?i:' + guard + ')' if guard_ignores_case else guard})(?:{combined})"
+        self.rules = rules
+        self._search = re.compile(combined).search if branches else None
+        self._group_styles = group_styles
+        self._separate = separate
+
+    def _classify_text(self, text):
+        """Style id of a line when some rules are searched on their own."""
+        start, style = None, 0
+        if self._search is not None:
+            match = self._search(text)
+            if match:
+                start, style = match.start(), self._group_styles[match.lastindex]
+        for rule_style, search in self._separate:
+            match = search(text)
+            if match and (start is None or (match.start(), rule_style) < (start, style)):
+                start, style = match.start(), rule_style
+        return style
+
+    def classify(self, kind, text):
+        """Returns the style id of one line."""
+        if not self.rules or kind == KIND_RAW:
+            return 0
+        if self._separate:
+            return self._classify_text(text)
+        match = self._search(text)
+        return self._group_styles[match.lastindex] if match else 0
+
+    def classify_records(self, records):
+        """Returns the style ids of ``(timestamp, kind, port, text)`` records, or None if there are no rules."""
+        if not self.rules:
+            return None
+        if self._separate:
+            classify_text = self._classify_text
+            return [classify_text(text) if kind != KIND_RAW else 0 for _, kind, _, text in records]
+        search = self._search
+        group_styles = self._group_styles
+        styles = []
+        for _, kind, _, text in records:
+            match = search(text) if kind != KIND_RAW else None
+            styles.append(group_styles[match.lastindex] if match else 0)
+        return styles
+
+    def load(self):
+        """Reads the rules from ``path``; keeps the defaults if there is no file."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except (OSError, TypeError):
+            return
+        rules = []
+        for line in lines:
+            fields = line.split(" ", 3)
+            if len(fields) == 4 and not line.startswith("#"):
+                color, weight, case, pattern = fields
+                rules.append((pattern, color, weight == "bold", case == "nocase"))
+        try:
+            self.set_rules(rules)
+        except ValueError:
+            pass  # 손으로 고친 파일이 잘못됐으면 기본 규칙을 쓴다
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# serial_log highlight rules: COLOR bold|normal case|nocase PATTERN\n")
+            for pattern, color, bold, ignore_case in self.rules:
+                f.write(f"{color} {'bold' if bold else 'normal'} {'nocase' if ignore_case else 'case'} {pattern}\n")
+
+
+_INT = re.compile(r"[+-]?\d+")
+_FLOAT = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def _typed(value):
+    """``"42"`` -> 42, ``"-1.5"`` -> -1.5, anything else stays a string."""
+    # 예외로 판별하면 숫자가 아닌 값마다 느리다
+    if _INT.fullmatch(value):
+        return int(value)
+    if _FLOAT.fullmatch(value):
+        return float(value)
+    return value
+
+
+def _literal_prefix(pattern):
+    """Returns text that every match of ``pattern`` starts with, as far as a quick look tells ("" if none)."""
+    if "|" in pattern:
+        return ""
+    prefix = re.match(r"[^\\.^$*+?{}\[\]()|]*", pattern)[0]
+    if prefix != pattern and pattern[len(prefix)] in "*?{":
+        prefix = prefix[:-1]  # 마지막 글자는 없어도 된다
+    return prefix
+
+
+def _line_matches(regex, lines):
+    """Yields ``(index, match)`` for the matches of ``regex`` in each of ``lines``.
+
+    Every line is searched on its own, so ``^``/``$`` and negated classes mean
+    the same as on a single line and no match can run into the next one.
+    """
+    for index, line in enumerate(lines):
+        for match in regex.finditer(line):
+            yield index, match
+
+
+# 캡처 파일 한 줄의 머리: 수신 시각, 종류, 포트 (format_records() 참고)
+_CAPTURE_PREFIX = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}) ([A-Z]+)(?:@(\d+))? ")
+
+
+class FieldExtractor:
+    """User rules that turn telemetry lines into named, typed fields.
+
+    A rule is a regex whose named groups become fields; a rule with groups named
+    ``key`` and ``value`` instead makes a field of every pair it finds, so
+    KEY_VALUE picks up any ``key=value`` line. Numbers become int or float.
+
+    extract() works on a whole ingest batch: each rule first drops the lines
+    without the literal text it starts with (``=`` for KEY_VALUE), a cheap
+    substring test, and only the rest are searched, line by line.
+
+    The rules are kept in ``path``, one pattern per line.
+    """
+
+    # 단어 중간에서 다시 시작하지 않도록 key는 단어 첫 글자에서만 찾는다
+    KEY_VALUE = r"(?<![\w.])(?P<key>[A-Za-z_][\w.]*)=(?P<value>[^\s,;]+)"
+    defaults = [KEY_VALUE]
+
+    def __init__(self, path=None, rules=None):
+        self.path = path
+        self.set_rules(self.defaults if rules is None else rules)
+
+    def set_rules(self, rules):
+        """Replaces the rules (regex patterns); raises ValueError if one is invalid."""
+        compiled = []
+        for number, pattern in enumerate(rules, 1):
+            try:
+                regex = re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"rule {number} ({pattern}): {e}") from None
+            if not regex.groupindex:
+                raise ValueError(f"rule {number} ({pattern}): no named group, e.g. (?P<temp>\\d+)")
+            pairs = {"key", "value"} <= regex.groupindex.keys()
+            needle = "=" if pattern == self.KEY_VALUE else _literal_prefix(pattern)
+            compiled.append((regex, pairs, needle))
+        self.rules = list(rules)
+        self._compiled = compiled  # 다른 스레드의 extract()는 예전 목록이나 새 목록 중 하나를 본다
+
+    def extract_lines(self, lines):
+        """Returns ``(index, fields)`` for each of ``lines`` that has fields, in order."""
+        compiled = self._compiled
+        if not compiled or not lines:
+            return []
+        found = {}
+        for regex, pairs, needle in compiled:
+            # 꼭 들어 있어야 하는 글자가 없는 줄은 regex로 훑지 않는다
+            indexes = [i for i, line in enumerate(lines) if needle in line] if needle else range(len(lines))
+            subset = [lines[i] for i in indexes] if needle else lines
+            for n, match in _line_matches(regex, subset):
+                index = indexes[n]
+                fields = found.get(index)
+                if fields is None:
+                    fields = found[index] = {}
+                if pairs:
+                    fields[match["key"]] = _typed(match["value"])
+                else:
+                    for name, value in match.groupdict().items():
+                        if value is not None:
+                            fields[name] = _typed(value)
+        return sorted(found.items())
+
+    def extract(self, records):
+        """Returns ``(timestamp, port, fields)`` for the RX records of a batch that have fields."""
+        if not self._compiled:
+            return []
+        received = [record for record in records if record[1] == KIND_RX]
+        return [(received[index][0], received[index][2], fields)
+                for index, fields in self.extract_lines([record[3] for record in received])]
+
+    def extract_capture(self, log, block_lines=65536):
+        """Yields the rows of a capture file (a MappedLog), a block of lines at a time.
+
+        The time, kind and port prefix that CaptureWriter writes is split off
+        before the rules run; lines of another kind than RX are skipped, and
+        lines without a prefix are taken as port 0 with no time.
+        """
+        strip_prefixes = re.compile("^" + _CAPTURE_PREFIX.pattern, re.MULTILINE).sub
+        for _, lines in log.iter_blocks(block_lines):
+            # 머리를 한 블록씩 한 번에 지우고, 필드가 나온 줄만 머리를 다시 읽는다
+            texts = strip_prefixes("", "\n".join(lines)).split("\n")
+            for index, fields in self.extract_lines(texts):
+                prefix = _CAPTURE_PREFIX.match(lines[index])
+                if prefix is None:
+                    yield None, 0, fields
+                elif prefix[2] == "RX":
+                    wall = datetime.fromisoformat(prefix[1]).timestamp()
+                    yield wall - MONOTONIC_TO_WALL, int(prefix[3] or 0), fields
+
+    def load(self):
+        """Reads the rules from ``path``; keeps the current ones if there is no (valid) file."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except (OSError, TypeError):
+            return
+        try:
+            self.set_rules([line for line in lines if line and not line.startswith("#")])
+        except ValueError:
+            pass
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# serial_log field extraction rules: one regex with named groups per line\n")
+            f.writelines(f"{pattern}\n" for pattern in self.rules)
+
+
+class FieldTable:
+    """Columns of the fields extracted from the received lines.
+
+    submit() takes the same batches as CaptureWriter.submit() and is meant to be
+    called straight from the RX thread, so the parsing happens there, a batch at
+    a time, and never on the GUI thread. Every row has ``time`` (monotonic) and
+    ``port``; a column appears when its field is first seen and holds None in the
+    rows without it. Beyond ``max_rows`` the oldest rows are dropped.
+    """
+
+    def __init__(self, extractor, max_rows=1000000):
+        self.extractor = extractor
+        self.max_rows = max_rows
+        self.times = []
+        self.ports = []
+        self.columns = {}  # field -> values
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.times)
+
+    def submit(self, records):
+        """Extracts the fields of a batch of records and adds the rows. Thread-safe."""
+        rows = self.extractor.extract(records)
+        if rows:
+            self.add_rows(rows)
+
+    def add_rows(self, rows):
+        """Adds ``(timestamp, port, fields)`` rows."""
+        with self._lock:
+            times, ports, columns = self.times, self.ports, self.columns
+            for timestamp, port, fields in rows:
+                for name in fields:
+                    if name not in columns:
+                        columns[name] = [None] * len(times)
+                for name, values in columns.items():
+                    values.append(fields.get(name))
+                times.append(timestamp)
+                ports.append(port)
+            # 한 줄씩 밀어내지 않고 max_rows의 1/4이 넘치면 한 번에 지운다
+            excess = len(times) - self.max_rows
+            if excess > self.max_rows // 4:
+                for values in (times, ports, *columns.values()):
+                    del values[:excess]
+
+    def clear(self):
+        with self._lock:
+            self.times, self.ports, self.columns = [], [], {}
+
+    def snapshot(self):
+        """Returns ``{name: values}`` of every column, ``time`` and ``port`` first."""
+        with self._lock:
+            return {"time": list(self.times), "port": list(self.ports),
+                    **{name: list(values) for name, values in self.columns.items()}}
+
+
+def _column_type(values):
+    """Returns int, float or str: the narrowest type that holds every value of a column."""
+    kind = int
+    for value in values:
+        if value is None or type(value) is kind:
+            continue
+        if isinstance(value, str):
+            return str
+        kind = float  # int과 float이 섞여 있다
+    return kind
+
+
+def export_fields(path, columns):
+    """Writes a FieldTable.snapshot() to ``path``; returns the number of rows.
+
+    ``.parquet`` and ``.arrow``/``.feather`` (Arrow IPC) files need pyarrow, and
+    keep each column typed, with ``time`` as a UTC timestamp; anything else is
+    written as CSV with local wall-clock times.
+    """
+    rows = len(columns["time"])
+    if path.endswith((".parquet", ".arrow", ".feather")):
+        try:
+            import pyarrow
+        except ImportError:
+            raise RuntimeError("Parquet and Arrow export needs the 'pyarrow' package") from None
+        arrays = {
+            "time": pyarrow.array([None if t is None else round((t + MONOTONIC_TO_WALL) * 1e6)
+                                   for t in columns["time"]],
+                                  pyarrow.timestamp("us", tz="UTC")),
+            "port": pyarrow.array(columns["port"], pyarrow.uint16()),
+        }
+        types = {int: pyarrow.int64(), float: pyarrow.float64(), str: pyarrow.string()}
+        for name, values in columns.items():
+            if name in ("time", "port"):
+                continue
+            kind = _column_type(values)
+            if kind is not int:
+                values = [None if value is None else kind(value) for value in values]
+            arrays[name] = pyarrow.array(values, types[kind])
+        table = pyarrow.table(arrays)
+        if path.endswith(".parquet"):
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, path)
+        else:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(table, path)
+        return rows
+    import csv  # 필요할 때만 불러온다 (시작 시간)
+    names = list(columns)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        times = ["" if t is None else format_timestamp(t) for t in columns["time"]]
+        writer.writerows(zip(times, *(columns[name] for name in names[1:])))
+    return rows
+
+
+class StreamMerger:
+    """K-way merges per-port record streams into one stream ordered by receive time.
+
+    Records of each port arrive in batches, a little late and possibly out of order
+    with respect to the other ports. push() files them per port; pop_ready() returns
+    every record older than ``window`` seconds, merged across ports by timestamp.
+    A record that only arrives after newer records were released is emitted with
+    the next release rather than dropped.
+    """
+
+    def __init__(self, window=0.1):
+        self.window = window
+        self._streams = {}  # port -> 시간 순으로 정렬될 레코드 리스트
+        self._unsorted = set()
+
+    def push(self, records):
+        streams = self._streams
+        for record in records:
+            stream = streams.get(record[2])
+            if stream is None:
+                stream = streams[record[2]] = []
+            elif record[0] < stream[-1][0]:
+                self._unsorted.add(record[2])
+            stream.append(record)
+
+    def pending(self):
+        return sum(len(stream) for stream in self._streams.values())
+
+    def pop_ready(self, now=None):
+        """Returns the records received before ``now - window``, oldest first."""
+        cutoff = (time.monotonic() if now is None else now) - self.window
+        key = itemgetter(0)
+        for port in self._unsorted:
+            self._streams[port].sort(key=key)  # 거의 정렬돼 있으므로 선형에 가깝다
+        self._unsorted.clear()
+        ready = []
+        for port, stream in list(self._streams.items()):
+            count = bisect_right(stream, cutoff, key=key)
+            if count == len(stream):
+                ready.append(stream)
+                del self._streams[port]
+            elif count:
+                ready.append(stream[:count])
+                del stream[:count]
+        if len(ready) == 1:
+            return ready[0]
+        return list(heapq.merge(*ready, key=key))
+
+    def clear(self):
+        self._streams.clear()
+        self._unsorted.clear()
+
+
+class CaptureWriter(threading.Thread):
+    """Streams log lines to a file from its own thread.
+
+    submit() only queues a batch, so it can be called straight from the RX thread;
+    the writer thread joins everything queued into one buffered write. The file is
+    rotated once it reaches ``max_bytes`` or is older than ``max_seconds`` (0
+    disables either limit). Rotated segments are renamed with a timestamp and a
+    sequence number (``capture.20260101-120000-000.txt``), so their names sort in
+    the order they were written, and, if ``compress`` is "gzip" or "zstd",
+    compressed in the background. ``fsync`` is "never", "rotate" (when a segment
+    is closed) or "batch" (after every write).
+
+    Batches are lists of ``(timestamp, kind, port, text)`` records. With
+    ``timestamps`` each line starts with its wall-clock receive time and kind.
+    """
+
+    def __init__(self, path, max_bytes=0, max_seconds=0, compress=None, fsync="rotate", timestamps=True):
+        super().__init__(daemon=True)
+        if compress == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression needs the 'zstandard' package")
+        if compress not in (None, "gzip", "zstd"):
+            raise ValueError(f"unknown compression: {compress}")
+        if fsync not in ("never", "rotate", "batch"):
+            raise ValueError(f"unknown fsync mode: {fsync}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compress = compress
+        self.fsync = fsync
+        self.timestamps = timestamps
+        self._queue = queue.Queue()
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+
+    def submit(self, records):
+        """Queues ``records`` for writing. Thread-safe."""
+        self._queue.put(records)
+
+    def stop(self, wait=True):
+        """Writes what is still queued and closes the file; waits for the thread unless ``wait`` is false."""
+        self._queue.put(None)
+        if wait:
+            self.join()
+
+    def run(self):
+        self._open_segment()
+        try:
+            running = True
+            while running:
+                batches = [self._queue.get()]
+                while True:  # 쌓여 있는 배치를 한 번에 쓴다
+                    try:
+                        batches.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batches:
+                    running = False
+                data = "".join(self._format(batch) for batch in batches if batch)
+                if data:
+                    self._write(data.encode("utf-8", "surrogateescape"))
+        finally:
+            self._close_segment()
+
+    def _format(self, records):
+        return format_records(records, self.timestamps)
+
+    def _write(self, data):
+        now = time.monotonic()
+        if self._segment_bytes and (
+                (self.max_bytes and self._segment_bytes + len(data) > self.max_bytes)
+                or (self.max_seconds and now - self._segment_started >= self.max_seconds)):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync == "batch":
+            os.fsync(self._file.fileno())
+        self._segment_bytes += len(data)
+
+    def _open_segment(self):
+        self._file = open(self.path, "ab")
+        self._segment_bytes = self._file.tell()
+        self._segment_started = time.monotonic()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def _rotate(self):
+        self._close_segment()
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # 번호를 항상 같은 자릿수로 붙여서 같은 초에 여러 번 돌려도 이름 순서가 시간 순서가 된다
+        counter = 0
+        rotated = f"{base}.{stamp}-{counter:03d}{ext}"
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz") or os.path.exists(rotated + ".zst"):
+            counter += 1
+            rotated = f"{base}.{stamp}-{counter:03d}{ext}"
+        os.replace(self.path, rotated)
+        if self.compress:
+            # 압축은 별도 스레드에서 해서 기록이 밀리지 않게 한다
+            threading.Thread(target=compress_file, args=(rotated, self.compress)).start()
+        self._open_segment()
+
+
+def compress_file(path, method):
+    """Compresses ``path`` to ``path.gz`` / ``path.zst`` and removes the original."""
+    target = path + (".gz" if method == "gzip" else ".zst")
+    with open(path, "rb") as src:
+        if method == "gzip":
+            with gzip.open(target + ".part", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        else:
+            with open(target + ".part", "wb") as raw:
+                zstandard.ZstdCompressor().copy_stream(src, raw)
+    os.replace(target + ".part", target)
+    os.remove(path)
+
+
+class TriggerCapture(threading.Thread):
+    """Writes only the traffic around a fault, one incident file per trigger.
+
+    submit() takes the same batches as CaptureWriter.submit() and is meant to be
+    called straight from the RX thread. Records are only kept in memory, in a
+    pre-trigger ring of the last ``pre_lines`` records (no older than
+    ``pre_seconds``, if set), until a trigger fires: a received line matching one
+    of the ``patterns`` regexes, or ``silence`` seconds without a line from a port
+    that has received something. The ring is then written to the next numbered
+    ``incident-NNNN.txt`` in ``directory``, followed by the next ``post_lines``
+    records (or less, if ``post_seconds`` runs out first); a trigger in that window
+    extends it. The thread only watches for silence and for the end of the window.
+
+    ``on_incident(path, reason)`` is called, from the thread that fired the
+    trigger, when an incident file is started.
+    """
+
+    _FILE_NAME = re.compile(r"incident-(\d+)\.txt$")
+
+    def __init__(self, directory, patterns=(), silence=0, pre_lines=1000, pre_seconds=0,
+                 post_lines=1000, post_seconds=0, on_incident=None):
+        super().__init__(daemon=True)
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        if not self.patterns and not silence:
+            raise ValueError("no trigger: give a pattern or a silence timeout")
+        self.directory = directory
+        self.silence = silence
+        self.pre_seconds = pre_seconds
+        self.post_lines = post_lines
+        self.post_seconds = post_seconds
+        self.on_incident = on_incident
+        self.incidents = 0
+        self.path = None  # 지금 쓰고 있는 incident 파일
+        self._ring = deque(maxlen=max(1, pre_lines))
+        self._writer = None
+        self._post = []
+        self._post_left = 0
+        self._post_until = 0.0
+        self._last_rx = {}  # port -> 마지막 수신 시각; silence로 트리거되면 지운다
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        # 이전 실행의 incident 파일을 덮어쓰지 않도록 번호를 이어서 붙인다
+        numbers = [int(m.group(1)) for m in map(self._FILE_NAME.match, os.listdir(directory)) if m]
+        self._number = max(numbers, default=0)
+
+    def submit(self, records):
+        """Checks ``records`` for triggers and keeps them in the ring or the open incident. Thread-safe."""
+        with self._lock:
+            for record in records:
+                timestamp, kind, port, text = record
+                reason = None
+                if kind == KIND_RX or kind == KIND_RAW:
+                    self._last_rx[port] = timestamp
+                    if self.patterns:
+                        line = record_text(kind, text)
+                        for regex in self.patterns:
+                            if regex.search(line):
+                                reason = f"/{regex.pattern}/ matched on port {port}"
+                                break
+                if self._writer is None:
+                    ring = self._ring
+                    ring.append(record)
+                    if self.pre_seconds:
+                        while ring[0][0] < timestamp - self.pre_seconds:
+                            ring.popleft()
+                    if reason is not None:
+                        self._trigger(reason, timestamp, port)
+                    continue
+                self._post.append(record)
+                if reason is not None:
+                    self._trigger(reason, timestamp, port)
+                else:
+                    self._post_left -= 1
+                    if self._post_left <= 0:
+                        self._close()
+            self._flush()
+
+    def _trigger(self, reason, timestamp, port):
+        marker = (timestamp, KIND_SYSTEM, port, f"Trigger: {reason}")
+        self._post_left = self.post_lines
+        self._post_until = timestamp + self.post_seconds
+        if self._writer is not None:  # 창이 열려 있으면 늘리기만 한다
+            self._post.append(marker)
+            return
+        self._number += 1
+        self.incidents += 1
+        self.path = os.path.join(self.directory, f"incident-{self._number:04d}.txt")
+        self._writer = CaptureWriter(self.path)
+        self._writer.start()
+        self._writer.submit(list(self._ring) + [marker])
+        self._ring.clear()
+        if self.on_incident is not None:
+            self.on_incident(self.path, reason)
+        if self._post_left <= 0:
+            self._close()
+
+    def _flush(self):
+        if self._post:
+            self._writer.submit(self._post)
+            self._post = []
+
+    def _close(self, wait=False):
+        self._flush()
+        self._writer.stop(wait)
+        self._writer = None
+        self.path = None
+
+    def run(self):
+        limits = [limit for limit in (self.silence, self.post_seconds) if limit]
+        tick = min(0.5, max(0.01, min(limits) / 4)) if limits else None
+        while not self._stopped.wait(tick):
+            now = time.monotonic()
+            with self._lock:
+                if self.silence:
+                    for port, last in list(self._last_rx.items()):
+                        if now - last >= self.silence:
+                            del self._last_rx[port]  # 다시 수신할 때까지 한 번만
+                            self._trigger(f"no data on port {port} for {self.silence:g} s", now, port)
+                if self._writer is not None and self.post_seconds and now >= self._post_until:
+                    self._close()
+                elif self._writer is not None:
+                    self._flush()
+
+    def stop(self):
+        """Finishes the open incident file and waits for it to be written."""
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        with self._lock:
+            if self._writer is not None:
+                self._close(wait=True)
+
+
+_NEWLINE = re.compile(b'\n')
+
+
+# str 패턴에서 대소문자를 무시하면 ASCII 글자 i, k, s에 맞는 ASCII 밖의 글자 (İ ı K ſ)의 UTF-8
+_CASE_FOLD_EXTRAS = ("İ".encode(), "ı".encode(), "\u212a".encode(), "ſ".encode())
+
+
+def _candidate_pattern(pattern):
+    """Returns ``(bytes_regex, extras)`` for MappedLog.find_lines(), or None.
+
+    Together, the lines the bytes regex matches and the lines that contain one of
+    the byte strings ``extras`` must include every line ``pattern`` matches; they
+    may include others, which the caller checks with ``pattern``. That only holds for an ASCII pattern
+    without the parts that mean something else on bytes or on a whole file:
+    ``\\w \\s \\d \\b`` and their opposites (Unicode classes in str patterns),
+    ``.`` and ``[^...]`` (one byte instead of one character, or a newline),
+    ``$`` (a CRLF line ends in ``\\r``), ``\\A \\Z`` (file instead of line) and
+    character escapes, which may stand for non-ASCII characters. Ignoring case,
+    a few non-ASCII characters match ASCII letters; those are the ``extras``.
+    """
+    source = pattern.pattern
+    if not source.isascii():
+        return None
+    escaped = False
+    for i, char in enumerate(source):
+        if escaped:
+            if char in "wWsSdDbBAZxuUN0123456789":  # \x, \u, 8진수는 ASCII 밖의 글자일 수 있다
+                return None
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in ".$" or (char == "[" and source[i + 1:i + 2] == "^"):
+            return None
+    extras = ()
+    if pattern.flags & re.IGNORECASE and not pattern.flags & re.ASCII and re.search("[iksIKS]", source):
+        extras = _CASE_FOLD_EXTRAS  # 이런 글자가 있는 줄은 모두 후보로 삼는다
+    try:
+        return re.compile(source.encode("ascii"), (pattern.flags & ~re.UNICODE) | re.MULTILINE), extras
+    except (re.error, ValueError):
+        return None
+
+
+class MappedLog:
+    """Read-only capture file opened with mmap, readable like a LogStore.
+
+    Nothing is read into Python strings up front: build_index() (meant to run in a
+    background thread) records the start offset of every line block by block, and
+    lines become readable as soon as their block is indexed. Text is decoded only
+    for the lines that are actually shown or matched.
+    """
+
+    def __init__(self, path, max_line_bytes=65536):
+        self.path = path
+        self.max_line_bytes = max_line_bytes  # 아주 긴 줄은 화면에 이만큼만 보여준다
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._starts = array('Q', [0] if self.size else [])
+        self._cancel = threading.Event()
+        self._bytes_patterns = {}
+        self.first_id = 0
+        self.next_id = 0
+        self.indexed = not self.size
+
+    def __len__(self):
+        return self.next_id
+
+    def build_index(self, progress=None, block_bytes=64 << 20):
+        """Indexes line offsets; calls ``progress(fraction)`` after every block."""
+        pos = 0
+        while pos < self.size and not self._cancel.is_set():
+            end = min(self.size, pos + block_bytes)
+            self._starts.extend(m.end() for m in _NEWLINE.finditer(self._map, pos, end))
+            pos = end
+            if pos == self.size and self._starts[-1] < self.size:
+                self.next_id = len(self._starts)  # 마지막 줄에 개행이 없는 경우
+            else:
+                self.next_id = len(self._starts) - 1
+            if progress is not None:
+                progress(pos / self.size)
+        self.indexed = not self._cancel.is_set()
+
+    def close(self):
+        """Stops indexing; the mapping is released once nothing refers to it."""
+        self._cancel.set()
+
+    def _line_end(self, line_id):
+        if line_id + 1 < len(self._starts):
+            return self._starts[line_id + 1] - 1
+        return self.size
+
+    def line(self, line_id):
+        if not 0 <= line_id < self.next_id:
+            raise IndexError(f"line {line_id} is not in the file")
+        start = self._starts[line_id]
+        end = min(self._line_end(line_id), start + self.max_line_bytes)
+        return self._map[start:end].rstrip(b'\r').decode('utf-8', 'replace')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.line(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.line(index)
+
+    def __iter__(self):
+        for _, text in self.iter_lines():
+            yield text
+
+    def iter_lines(self, start_id=None, end_id=None):
+        end_id = self.next_id if end_id is None else min(end_id, self.next_id)
+        for line_id in range(start_id or 0, end_id):
+            yield line_id, self.line(line_id)
+
+    def iter_ids(self, line_ids):
+        next_id = self.next_id
+        for line_id in line_ids:
+            if 0 <= line_id < next_id:
+                yield line_id, self.line(line_id)
+
+    def timestamp(self, line_id):
+        return None  # 파일에는 수신 시각 정보가 없다
+
+    def kind(self, line_id):
+        return KIND_RX
+
+    def record(self, line_id):
+        return None, KIND_RX, 0, self.line(line_id)
+
+    def iter_blocks(self, block_lines=65536):
+        """Yields ``(first_id, lines)`` over the indexed lines, decoding a block of lines at a time."""
+        for first in range(0, self.next_id, block_lines):
+            last = min(first + block_lines, self.next_id)
+            text = self._map[self._starts[first]:self._line_end(last - 1)].decode('utf-8', 'replace')
+            lines = text.split('\n')
+            if '\r' in text:
+                lines = [line.rstrip('\r') for line in lines]
+            yield first, lines
+
+    def _bytes_pattern(self, pattern):
+        if pattern not in self._bytes_patterns:
+            self._bytes_patterns[pattern] = _candidate_pattern(pattern)
+        return self._bytes_patterns[pattern]
+
+    def find_lines(self, pattern, start_id=None, end_id=None, kinds=None):
+        """Yields ``(line_id, text)`` for lines in ``[start_id, end_id)`` that ``pattern`` matches.
+
+        When _candidate_pattern() can translate it, the pattern is run over the mapped
+        bytes directly and only the candidate lines are decoded and checked with the
+        pattern itself. ``kinds`` is accepted for compatibility with LogStore and ignored.
+        """
+        start_id = start_id or 0
+        end_id = self.next_id if end_id is None else min(end_id, self.next_id)
+        if start_id >= end_id:
+            return
+        if pattern is None:
+            yield from self.iter_lines(start_id, end_id)
+            return
+        candidate = self._bytes_pattern(pattern)
+        if candidate is None:  # bytes로 옮길 수 없는 패턴은 줄마다 디코딩해서 검사
+            for line_id, text in self.iter_lines(start_id, end_id):
+                if pattern.search(text):
+                    yield line_id, text
+            return
+        bytes_pattern, extras = candidate
+        pos, endpos = self._starts[start_id], self._line_end(end_id - 1)
+        line_ids = self._matching_line_ids(bytes_pattern, pos, endpos)
+        if extras:
+            line_ids = heapq.merge(line_ids, *(self._matching_line_ids(extra, pos, endpos) for extra in extras))
+        previous = None
+        for line_id in line_ids:
+            if line_id == previous:
+                continue
+            previous = line_id
+            text = self.line(line_id)
+            if pattern.search(text):
+                yield line_id, text
+
+    def _matching_line_ids(self, target, pos, endpos):
+        """Yields, in order, the ids of the lines in ``[pos, endpos]`` that contain ``target``
+        (a bytes regex or a byte string)."""
+        while pos <= endpos:
+            if isinstance(target, bytes):
+                found = self._map.find(target, pos, endpos)
+            else:
+                match = target.search(self._map, pos, endpos)
+                found = -1 if match is None else match.start()
+            if found < 0:
+                return
+            line_id = bisect_right(self._starts, found) - 1
+            yield line_id
+            pos = self._line_end(line_id) + 1
+
+
+_CAPTURE_TIME = re.compile(rb"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}")
+ARCHIVE_SUFFIXES = (".txt", ".log")
+
+
+def archive_files(directory):
+    """Returns the capture files under ``directory`` (plain or .gz/.zst compressed), sorted by path."""
+    found = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            plain = name.removesuffix(".gz").removesuffix(".zst")
+            if plain.endswith(ARCHIVE_SUFFIXES):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def open_capture(path):
+    """Opens a capture file as a MappedLog; .gz/.zst files are first decompressed to a temporary file."""
+    if not path.endswith((".gz", ".zst")):
+        return MappedLog(path)
+    import tempfile  # 압축 파일을 열 때만 쓰므로 시작할 때 불러오지 않는다
+    with _open_compressed(path) as src, tempfile.NamedTemporaryFile(
+            prefix="serial_log-", suffix=os.path.basename(path).rsplit(".", 1)[0], delete=False) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    try:
+        return MappedLog(dst.name)
+    finally:
+        try:
+            os.remove(dst.name)  # 매핑은 파일을 지운 뒤에도 남는다 (Windows에서는 실패하므로 남겨 둔다)
+        except OSError:
+            pass
+
+
+def _open_compressed(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if zstandard is None:
+        raise RuntimeError("reading .zst files needs the zstandard package")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+_DECOMPRESS_ERRORS = (gzip.BadGzipFile,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def _search_block(data, needle, max_hits):
+    """Returns ``(newlines, hits)`` for a block of whole lines; hits are ``(line, time, text)``, one per line.
+
+    ``needle`` is a lower-cased ASCII keyword as bytes: the block is lower-cased once
+    and scanned with bytes.find, which is several times faster than an IGNORECASE
+    regex. Any other keyword is a case-folded str and is looked for in the
+    case-folded text of each line.
+    """
+    if isinstance(needle, str):
+        return _search_block_folded(data, needle, max_hits)
+    hits = []
+    lowered = data.lower()
+    line = counted = pos = 0
+    while len(hits) < max_hits:
+        found = lowered.find(needle, pos)
+        if found < 0:
+            break
+        start = data.rfind(b"\n", 0, found) + 1
+        end = data.find(b"\n", found + len(needle))
+        if end < 0:
+            end = len(data)
+        line += data.count(b"\n", counted, start)
+        counted = start
+        text = data[start:end].rstrip(b"\r")
+        stamp = _CAPTURE_TIME.match(text)
+        hits.append((line, stamp.group().decode() if stamp else "", text.decode("utf-8", "replace")))
+        pos = end + 1
+    return data.count(b"\n"), hits
+
+
+def _search_block_folded(data, needle, max_hits):
+    hits = []
+    newlines = data.count(b"\n")
+    if needle not in data.decode("utf-8", "replace").casefold():
+        return newlines, hits  # 대부분의 블록은 한 번에 건너뛴다
+    for line, raw in enumerate(data.split(b"\n")):
+        raw = raw.rstrip(b"\r")
+        text = raw.decode("utf-8", "replace")
+        if needle in text.casefold():
+            stamp = _CAPTURE_TIME.match(raw)
+            hits.append((line, stamp.group().decode() if stamp else "", text))
+            if len(hits) >= max_hits:
+                break
+    return newlines, hits
+
+
+def _search_file_range(path, start, end, needle, max_hits):
+    """Process pool task: searches the lines of a plain file that start in ``[start, end)``.
+
+    Returns ``(newlines, hits, error)``; hit line numbers are relative to the range.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if start >= size:
+                return 0, [], None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                def line_start(pos):
+                    if pos <= 0:
+                        return 0
+                    if pos >= size:
+                        return size
+                    newline = mapped.find(b"\n", pos - 1)
+                    return size if newline < 0 else newline + 1
+                first, last = line_start(start), line_start(end)
+                if first >= last:
+                    return 0, [], None
+                newlines, hits = _search_block(mapped[first:last], needle, max_hits)
+                return newlines, hits, None
+    except (OSError, ValueError) as e:
+        return 0, [], str(e)
+
+
+def _search_compressed_file(path, needle, max_hits, block_bytes=16 << 20):
+    """Process pool task: searches a whole .gz/.zst file, decompressing it block by block."""
+    hits = []
+    base = 0
+    try:
+        with _open_compressed(path) as f:
+            rest = b""
+            while len(hits) < max_hits:
+                block = f.read(block_bytes)
+                data = rest + block
+                if block:
+                    cut = data.rfind(b"\n") + 1
+                    data, rest = data[:cut], data[cut:]
+                newlines, block_hits = _search_block(data, needle, max_hits - len(hits))
+                hits.extend((base + line, stamp, text) for line, stamp, text in block_hits)
+                base += newlines
+                if not block:
+                    break
+    except (OSError, EOFError, RuntimeError) + _DECOMPRESS_ERRORS as e:
+        return base, hits, str(e)
+    return base, hits, None
+
+
+class ArchiveSearch:
+    """Searches a directory of capture files for a keyword with a process pool.
+
+    Plain files are memory-mapped and split into ``chunk_bytes`` ranges, one task
+    each, so even one huge file keeps every core busy; a compressed file is one
+    task that decompresses it as a stream. run() hands hits to ``on_hits`` as soon
+    as they can be numbered: a range's line numbers depend on the line counts of
+    the ranges before it in the same file, so hits come out in order per file.
+    Hits are ``(path, line_id, time, text)`` with 0-based line ids, as MappedLog
+    numbers them.
+    """
+
+    def __init__(self, directory, keyword, workers=None, chunk_bytes=64 << 20, max_hits=100000):
+        self.directory = directory
+        self.keyword = keyword
+        # 대소문자를 무시하는 문자열 검색: ASCII면 bytes로 빠르게, 아니면 줄마다 casefold해서
+        self.needle = keyword.encode("ascii").lower() if keyword.isascii() else keyword.casefold()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.max_hits = max_hits
+        self.errors = []  # (path, message)
+        self.hits = 0
+        self.bytes_total = 0
+        self._cancel = threading.Event()
+        self._process = None  # run_isolated()의 검색 프로세스
+
+    def cancel(self):
+        self._cancel.set()
+        process = self._process
+        if process is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def run(self, on_hits):
+        """Searches every file, calling ``on_hits(hits)`` from this thread; returns the number of hits."""
+        import multiprocessing  # 아카이브 검색을 할 때만 불러온다 (시작 시간)
+        files = archive_files(self.directory)
+        # GUI 프로세스를 fork하지 않도록 spawn으로 워커를 띄운다
+        context = multiprocessing.get_context("spawn")
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        parts = {}  # future -> (path, index)
+        progress = {}  # path -> [next part index, line base, results by index]
+        try:
+            for path in files:
+                try:
+                    size = os.path.getsize(path)
+                except OSError as e:
+                    self.errors.append((path, str(e)))
+                    continue
+                self.bytes_total += size
+                if path.endswith((".gz", ".zst")):
+                    futures = [pool.submit(_search_compressed_file, path, self.needle, self.max_hits)]
+                else:
+                    futures = [pool.submit(_search_file_range, path, start, start + self.chunk_bytes,
+                                           self.needle, self.max_hits)
+                               for start in range(0, max(size, 1), self.chunk_bytes)]
+                parts.update((future, (path, index)) for index, future in enumerate(futures))
+                progress[path] = [0, 0, [None] * len(futures)]
+            for future in concurrent.futures.as_completed(parts):
+                if self._cancel.is_set() or self.hits >= self.max_hits:
+                    break
+                path, index = parts[future]
+                state = progress[path]
+                try:
+                    state[2][index] = future.result()
+                except concurrent.futures.process.BrokenProcessPool as e:
+                    self.errors.append((path, f"search worker died: {e}"))
+                    break
+                # 앞 구간들의 줄 수를 알게 된 구간부터 차례로 내보낸다
+                while state[0] < len(state[2]) and state[2][state[0]] is not None:
+                    newlines, hits, error = state[2][state[0]]
+                    state[2][state[0]] = ()
+                    if error is not None:
+                        self.errors.append((path, error))
+                    if hits:
+                        hits = hits[:self.max_hits - self.hits]
+                        self.hits += len(hits)
+                        on_hits([(path, state[1] + line, stamp, text) for line, stamp, text in hits])
+                    state[0] += 1
+                    state[1] += newlines
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return self.hits
+
+    def run_isolated(self, on_hits):
+        """Like run(), but from a separate Python process that only imports this module.
+
+        spawn starts every pool worker by running the main script of the parent
+        again; for the GUI that means importing PySide6 in each worker, so the GUI
+        searches this way. Hits and errors come back pickled through a pipe, and
+        cancel() closes the process's stdin to stop it.
+        """
+        import pickle
+        import subprocess  # 아카이브 검색을 할 때만 불러온다 (시작 시간)
+        here = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (here, os.environ.get("PYTHONPATH")))))
+        process = subprocess.Popen([sys.executable, "-c", "import serial_core; serial_core._archive_search_child()"],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        pickle.dump((self.directory, self.keyword, self.workers, self.chunk_bytes, self.max_hits), process.stdin)
+        process.stdin.flush()
+        self._process = process
+        if self._cancel.is_set():
+            process.stdin.close()
+        done = False
+        try:
+            while True:
+                try:
+                    message = pickle.load(process.stdout)
+                except EOFError:
+                    break
+                if message[0] == "hits":
+                    self.hits += len(message[1])
+                    if not self._cancel.is_set():
+                        on_hits(message[1])
+                else:
+                    _, errors, self.bytes_total = message
+                    self.errors.extend(errors)
+                    done = True
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            self._process = None
+        if not done:
+            self.errors.append((self.directory, f"search process exited with status {returncode}"))
+        return self.hits
+
+
+def _archive_search_child():
+    """Entry point of the run_isolated() process: settings come pickled on stdin, results go to stdout."""
+    import pickle
+    directory, keyword, workers, chunk_bytes, max_hits = pickle.load(sys.stdin.buffer)
+    search = ArchiveSearch(directory, keyword, workers, chunk_bytes, max_hits)
+    out = sys.stdout.buffer
+
+    def watch_stdin():
+        sys.stdin.buffer.read()  # 부모가 stdin을 닫으면(cancel) 끝난다
+        search.cancel()
+
+    threading.Thread(target=watch_stdin, daemon=True).start()
+    try:
+        search.run(lambda hits: (pickle.dump(("hits", hits), out), out.flush()))
+    except OSError as e:
+        search.errors.append((directory, str(e)))
+    pickle.dump(("done", search.errors, search.bytes_total), out)
+    out.flush()
+
+
+class LineSplitter:
+    """Splits a raw byte stream into text lines.
+
+    Bytes after the last delimiter are kept until the rest of the line arrives, so a
+    line that straddles two reads is reassembled before it is decoded.
+    """
+
+    def __init__(self, delimiter=b'\n', encoding='utf-8', errors='replace'):
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.errors = errors
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """Adds ``chunk`` to the buffer and returns the lines it completed."""
+        search_from = max(0, len(self._buffer) - len(self.delimiter) + 1)
+        self._buffer += chunk
+        if self._buffer.find(self.delimiter, search_from) < 0:
+            return []
+        parts = self._buffer.split(self.delimiter)
+        self._buffer = parts.pop()  # 마지막 조각은 아직 끝나지 않은 줄
+        return [part.decode(self.encoding, self.errors).strip() for part in parts]
+
+    def flush(self):
+        """Returns the incomplete trailing line (if any) and empties the buffer."""
+        if not self._buffer:
+            return []
+        line = self._buffer.decode(self.encoding, self.errors).strip()
+        self._buffer = bytearray()
+        return [line]
+
+    def has_partial(self):
+        return bool(self._buffer)
+
+
+def _cobs_decode(frame):
+    out = bytearray()
+    i, end = 0, len(frame)
+    while i < end:
+        code = frame[i]
+        out += frame[i + 1:i + code]
+        i += code
+        if code < 0xff and i < end:
+            out.append(0)
+    return bytes(out)
+
+
+class FrameSplitter:
+    """Splits a raw byte stream into binary frames, without decoding anything.
+
+    Modes:
+
+    - ``delimiter``: a frame ends with ``delimiter`` (which is dropped)
+    - ``fixed``: every ``length`` bytes are a frame
+    - ``length``: a frame starts with its payload length as a ``prefix_size`` byte
+      ``byteorder`` integer; the frame kept includes the prefix
+    - ``slip``: SLIP (RFC 1055) frames end with 0xC0; escapes are undone
+    - ``cobs``: COBS frames end with 0x00 and are decoded
+
+    Reads are appended to one bytearray, frames are cut out of it through a
+    memoryview (one copy per frame, into the bytes that get stored) and consumed
+    bytes are dropped once per feed(). Nothing longer than ``max_frame`` is
+    buffered: a frame that does not end by then is emitted as it is, so a lost
+    delimiter costs one bad frame instead of the whole buffer. A length prefix
+    above ``max_frame`` drops that frame instead: its bytes are skipped, counted
+    in ``dropped``, and the next prefix is read after them. Same interface as
+    LineSplitter, so flushing a stalled partial frame also resynchronizes fixed
+    and length-prefixed framing.
+    """
+
+    modes = ("delimiter", "fixed", "length", "slip", "cobs")
+
+    def __init__(self, mode="delimiter", delimiter=b"\n", length=16, prefix_size=1, byteorder="big",
+                 max_frame=65536):
+        if mode not in self.modes:
+            raise ValueError(f"unknown framing mode '{mode}'")
+        if mode == "slip":
+            delimiter = b"\xc0"
+        elif mode == "cobs":
+            delimiter = b"\x00"
+        if mode in ("delimiter", "slip", "cobs") and not delimiter:
+            raise ValueError("the frame delimiter is empty")
+        if mode == "fixed" and length < 1:
+            raise ValueError("the frame length must be at least 1")
+        if mode == "length" and prefix_size not in (1, 2, 4):
+            raise ValueError("the length prefix must be 1, 2 or 4 bytes")
+        self.mode = mode
+        self.delimiter = bytes(delimiter)
+        self.length = length
+        self.prefix_size = prefix_size
+        self.byteorder = byteorder
+        self.max_frame = max_frame
+        self.dropped = 0  # 너무 길다고 버린 length 프레임 수
+        self._buffer = bytearray()
+        self._skip = 0  # 버리는 프레임에서 아직 받지 않은 바이트 수
+
+    def feed(self, chunk):
+        """Adds ``chunk`` to the buffer and returns the frames (bytes) it completed."""
+        buffer = self._buffer
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            self._skip -= skipped
+            chunk = chunk[skipped:]
+        search_from = max(0, len(buffer) - len(self.delimiter) + 1)
+        buffer += chunk
+        with memoryview(buffer) as view:
+            if self.mode == "fixed":
+                frames, used = self._cut_fixed(view)
+            elif self.mode == "length":
+                frames, used = self._cut_length(view)
+            else:
+                frames, used = self._cut_delimited(buffer, view, search_from)
+        if used:
+            del buffer[:used]
+        if len(buffer) > self.max_frame:
+            frames.append(bytes(buffer))
+            buffer.clear()
+        return frames
+
+    def _cut_delimited(self, buffer, view, start):
+        frames = []
+        position, step, mode = 0, len(self.delimiter), self.mode
+        end = buffer.find(self.delimiter, start)
+        while end >= 0:
+            if end > position or mode == "delimiter":  # SLIP/COBS는 빈 프레임(연속 구분자)을 버린다
+                frame = bytes(view[position:end])
+                if mode == "slip":
+                    if b"\xdb" in frame:
+                        frame = frame.replace(b"\xdb\xdc", b"\xc0").replace(b"\xdb\xdd", b"\xdb")
+                elif mode == "cobs":
+                    frame = _cobs_decode(frame)
+                frames.append(frame)
+            position = end + step
+            end = buffer.find(self.delimiter, position)
+        return frames, position
+
+    def _cut_fixed(self, view):
+        length = self.length
+        count = len(view) // length
+        return [bytes(view[i * length:(i + 1) * length]) for i in range(count)], count * length
+
+    def _cut_length(self, view):
+        frames = []
+        position, prefix_size, available = 0, self.prefix_size, len(view)
+        while available - position >= prefix_size:
+            size = prefix_size + int.from_bytes(view[position:position + prefix_size], self.byteorder)
+            if size > self.max_frame:
+                # 잘라서 받으면 나머지를 다음 헤더로 읽게 되므로 프레임을 통째로 건너뛴다
+                self.dropped += 1
+                skipped = min(size, available - position)
+                position += skipped
+                self._skip = size - skipped
+                continue
+            if available - position < size:
+                break
+            frames.append(bytes(view[position:position + size]))
+            position += size
+        return frames, position
+
+    def flush(self):
+        """Returns the incomplete trailing frame (if any), as received, and empties the buffer."""
+        self._skip = 0
+        if not self._buffer:
+            return []
+        frame = bytes(self._buffer)
+        self._buffer.clear()
+        return [frame]
+
+    def has_partial(self):
+        return bool(self._buffer)
+
+
+def parse_framing(spec):
+    """Parses a framing spec into FrameSplitter keyword arguments, or None for text lines.
+
+    ``text``, ``delimiter:HEX`` (e.g. ``delimiter:0d0a``), ``fixed:N``,
+    ``length:N`` / ``length:Nle`` (N-byte length prefix, big endian by default),
+    ``slip`` or ``cobs``.
+    """
+    mode, _, argument = spec.partition(":")
+    mode = mode.lower()
+    if mode == "text":
+        return None
+    framing = {"mode": mode}
+    if mode == "delimiter":
+        framing["delimiter"] = bytes.fromhex(argument) if argument else b"\n"
+    elif mode == "fixed":
+        framing["length"] = int(argument)
+    elif mode == "length":
+        argument = argument.lower() or "1"
+        if argument.endswith(("le", "be")):
+            framing["byteorder"] = "little" if argument.endswith("le") else "big"
+            argument = argument[:-2]
+        framing["prefix_size"] = int(argument)
+    FrameSplitter(**framing)  # 잘못된 설정은 여기서 ValueError
+    return framing
+
+
+class SendHistory:
+    """Deduplicated, bounded history of sent commands, ranked for completion.
+
+    ``entries`` is an OrderedDict of command -> [count, key], least recently used
+    first; beyond ``capacity`` commands the least recently used one is dropped.
+    ``ranked`` lists the commands best first by frecency: every use adds
+    exp(t / half_life * ln 2) to a command's score, and ``key`` is the log of that
+    score, so older uses count for less without ever recomputing other entries. A
+    use therefore moves only the command used, and use() reports exactly which
+    rows of ``ranked`` changed.
+
+    The history is stored as an append-only journal of ``key count command``
+    lines written by a background thread; once the journal holds
+    ``compact_factor`` times more lines than there are commands it is rewritten
+    with one line per command. Lines that cannot be read back (such as a last
+    line cut off by a crash) are skipped and the journal is then rewritten.
+    ``on_error(message)`` is called from the writer thread if saving fails.
+    """
+    HEADER = "# serial_log send history v1"
+
+    def __init__(self, path, capacity=1000, half_life=7 * 86400, compact_factor=4, on_error=None):
+        self.path = path
+        self.on_error = on_error
+        self.capacity = capacity
+        self.rate = math.log(2) / half_life
+        self.compact_factor = compact_factor
+        self.entries = OrderedDict()
+        self.ranked = []
+        self._neg_keys = []  # ranked 순서의 -key (bisect용)
+        self._journal_lines = 0
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def load(self):
+        """Reads the journal (or an old one-command-per-line history file, most recent first)."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        damaged = False
+        if lines and lines[0] == self.HEADER:
+            for line in lines[1:]:
+                try:
+                    key, count, command = line.split(" ", 2)
+                    count, key = int(count), float(key)
+                except ValueError:
+                    damaged = True  # 예: 기록하다 죽어서 잘린 마지막 줄
+                    continue
+                if count > 0 and math.isfinite(key):
+                    self._merge(command, count, key)
+                else:
+                    damaged = True
+            self._journal_lines = len(lines) - 1
+        else:
+            # 예전 형식: 최근 것이 맨 위, 사용 횟수 없음
+            for age, command in reversed(list(enumerate(line.strip() for line in lines))):
+                if command:
+                    self._merge(command, 1, (mtime - age) * self.rate)
+            self._journal_lines = -1  # 첫 기록 때 새 형식으로 다시 쓴다
+        self.ranked = [command for command, _ in sorted(self.entries.items(), key=lambda item: -item[1][1])]
+        self._neg_keys = [-self.entries[command][1] for command in self.ranked]
+        if damaged:
+            self._compact()  # 망가진 줄 없이 다시 쓴다
+
+    def _merge(self, command, count, key):
+        entry = self.entries.pop(command, None)
+        if entry is not None:
+            count += entry[0]
+            key = max(key, entry[1]) + math.log1p(math.exp(-abs(key - entry[1])))
+        self.entries[command] = [count, key]
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, command):
+        return command in self.entries
+
+    def recent(self):
+        """Commands, most recently used first."""
+        return list(reversed(self.entries))
+
+    def _rank_of(self, command):
+        row = bisect_left(self._neg_keys, -self.entries[command][1])
+        while self.ranked[row] != command:  # 같은 점수가 있을 수 있다
+            row += 1
+        return row
+
+    def _unrank(self, command):
+        row = self._rank_of(command)
+        del self.ranked[row]
+        del self._neg_keys[row]
+        return row
+
+    def use(self, command, now=None):
+        """Records that ``command`` was sent.
+
+        Returns ``(old_row, evicted_row, new_row)``: to update a copy of ``ranked``,
+        remove ``old_row`` (if not None), then ``evicted_row`` (if not None), then
+        insert the command at ``new_row``.
+        """
+        key = (time.time() if now is None else now) * self.rate
+        old_row = self._unrank(command) if command in self.entries else None
+        evicted_row = None
+        if command not in self.entries and len(self.entries) >= self.capacity:
+            evicted = next(iter(self.entries))  # 가장 오래 안 쓴 명령
+            evicted_row = self._unrank(evicted)
+            del self.entries[evicted]
+        self._merge(command, 1, key)
+        new_key = self.entries[command][1]
+        new_row = bisect_left(self._neg_keys, -new_key)
+        self.ranked.insert(new_row, command)
+        self._neg_keys.insert(new_row, -new_key)
+        self._journal(f"{key!r} 1 {command}\n")
+        return old_row, evicted_row, new_row
+
+    def _start_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def _compact(self):
+        """Queues a rewrite of the journal with one line per command."""
+        self._start_writer()
+        # 스냅샷은 여기서 만들어 넘기므로 쓰는 스레드와 entries를 공유하지 않는다
+        self._queue.put(("compact", [f"{key!r} {count} {command}\n"
+                                     for command, (count, key) in self.entries.items()]))
+        self._journal_lines = len(self.entries)
+
+    def _journal(self, line):
+        if self._journal_lines < 0 or self._journal_lines >= self.compact_factor * len(self.entries) + 64:
+            self._compact()
+        else:
+            self._start_writer()
+            self._queue.put(("append", line))
+            self._journal_lines += 1
+
+    def _write_loop(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(action == "stop" for action, _ in items)
+            try:
+                for start in range(len(items)):  # 마지막 compact 이전의 기록은 스냅샷에 이미 들어 있다
+                    if items[-1 - start][0] == "compact":
+                        items = items[len(items) - 1 - start:]
+                        break
+                appended = []
+                for action, payload in items:
+                    if action == "compact":
+                        tmp_path = f"{self.path}.tmp"
+                        with open(tmp_path, "w", encoding="utf-8") as f:
+                            f.write(f"{self.HEADER}\n")
+                            f.writelines(payload)
+                        os.replace(tmp_path, self.path)
+                    elif action == "append":
+                        appended.append(payload)
+                if appended:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        if f.tell() == 0:
+                            f.write(f"{self.HEADER}\n")
+                        f.writelines(appended)
+            except OSError as e:
+                if self.on_error is not None:
+                    self.on_error(f"Cannot save send history: {e}")
+                else:
+                    sys.stderr.write(f"Cannot save send history: {e}\n")
+            if stop:
+                return
+
+    def close(self):
+        """Waits until everything recorded is on disk."""
+        if self._writer is not None:
+            self._queue.put(("stop", None))
+            self._writer.join()
+            self._writer = None
+
+
+class TxStats:
+    """Enqueue-to-write latencies of the commands sent on one port.
+
+    Written on the engine's loop, read from any thread; only the most recent
+    ``keep`` latencies are kept for the percentiles.
+    """
+
+    def __init__(self, keep=1024):
+        self.count = 0
+        self.last = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=keep)
+
+    def add(self, latency):
+        self.count += 1
+        self.last = latency
+        if latency > self.max:
+            self.max = latency
+        self.recent.append(latency)
+
+    def percentile(self, p):
+        recent = sorted(self.recent)
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(len(recent) * p / 100))]
+
+    def summary(self):
+        return (f"TX {self.count} cmds, latency last {self.last * 1000:.2f} ms, "
+                f"p50 {self.percentile(50) * 1000:.2f} ms, p95 {self.percentile(95) * 1000:.2f} ms, "
+                f"max {self.max * 1000:.2f} ms")
+
+
+class PortCounters:
+    """Running totals of one port, for the stats panel and soak-test logs.
+
+    Only the engine's loop increments them, so they need no lock: another thread
+    reading them sees plain ints that are at most one batch stale. They outlive the
+    port's session, so totals keep counting across reopening.
+    """
+
+    __slots__ = ("rx_bytes", "rx_lines", "rx_reads", "tx_bytes", "tx_commands", "tx_dropped", "errors")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def sample(self, previous, seconds):
+        """Returns a snapshot with RX/TX rates since ``previous`` (an older snapshot), and the snapshot."""
+        now = self.snapshot()
+        sample = {
+            "rx_bytes_per_s": round((now["rx_bytes"] - previous["rx_bytes"]) / seconds, 1),
+            "rx_lines_per_s": round((now["rx_lines"] - previous["rx_lines"]) / seconds, 1),
+            "tx_commands_per_s": round((now["tx_commands"] - previous["tx_commands"]) / seconds, 1),
+        }
+        sample.update(now)
+        return sample, now
+
+
+class StatsWriter:
+    """Appends stats samples (dicts with the same keys) to a file, one line each.
+
+    ``.json`` and ``.jsonl`` files get a JSON object per line, anything else CSV with
+    a header. Every line is flushed so a soak test that dies still leaves its data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.json = path.lower().endswith((".json", ".jsonl"))
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._fields = None
+
+    def write(self, sample):
+        if self.json:
+            self._file.write(json.dumps(sample) + "\n")
+        else:
+            if self._fields is None:
+                self._fields = list(sample)
+                if self._file.tell() == 0:
+                    self._file.write(",".join(self._fields) + "\n")
+            self._file.write(",".join(str(sample.get(field, "")) for field in self._fields) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class DeviceWatcher:
+    """Calls back once a device path exists, without polling for it.
+
+    The directory of each path is watched with Linux inotify, or its nearest
+    existing parent (/dev/serial/by-id goes away with the last adapter), and the
+    inotify fd is read on the event loop with add_reader(), so waiting for an
+    unplugged adapter costs no CPU. ``available`` is False where there is no
+    inotify; the engine then retries with a backoff instead.
+    """
+
+    # udev는 노드를 만든 뒤에 권한을 바꾸므로 IN_ATTRIB도 본다
+    _MASK = 0x4 | 0x80 | 0x100  # IN_ATTRIB | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._fd = None
+        self._watches = {}  # wd -> directory
+        self._waiting = {}  # handle -> [path, wd, callback]
+        try:
+            import ctypes  # 장치를 기다릴 때만 필요하다
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._add_watch, self._rm_watch = libc.inotify_add_watch, libc.inotify_rm_watch
+            fd = libc.inotify_init1(os.O_NONBLOCK | 0o2000000)  # IN_CLOEXEC
+        except (OSError, AttributeError):  # inotify가 없는 OS
+            return
+        if fd >= 0:
+            self._fd = fd
+            loop.add_reader(fd, self._on_events)
+
+    @property
+    def available(self):
+        return self._fd is not None
+
+    def watch(self, path, callback):
+        """Calls ``callback()`` on the loop once ``path`` exists.
+
+        Returns a handle whose cancel() stops waiting, or None if the path cannot
+        be watched.
+        """
+        if self._fd is None:
+            return None
+        handle = _DeviceWait(self)
+        self._waiting[handle] = [path, None, callback]
+        if not self._check(handle):
+            del self._waiting[handle]
+            return None
+        return handle
+
+    def _check(self, handle):
+        """Fires ``handle`` if its path exists, else (re)watches the closest directory to it."""
+        entry = self._waiting[handle]
+        path = entry[0]
+        directory = os.path.dirname(path) or "."
+        while not os.path.isdir(directory) and os.path.dirname(directory) != directory:
+            directory = os.path.dirname(directory)
+        wd = self._add_watch(self._fd, os.fsencode(directory), self._MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = directory
+        entry[1] = wd
+        if os.path.exists(path):  # 감시를 걸기 전에 이미 생겼을 수 있다
+            self.loop.call_soon(entry[2])
+            self.cancel(handle)
+        return True
+
+    def _on_events(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        changed = set()
+        offset = 0
+        while offset + 16 <= len(data):  # struct inotify_event + name
+            wd, _mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+            changed.add(wd)
+            offset += 16 + length
+        for handle, (_path, wd, _callback) in list(self._waiting.items()):
+            if wd in changed and handle in self._waiting and not self._check(handle):
+                self.cancel(handle)
+        self._prune()
+
+    def cancel(self, handle):
+        self._waiting.pop(handle, None)
+        self._prune()
+
+    def _prune(self):
+        used = {entry[1] for entry in self._waiting.values()}
+        for wd in [wd for wd in self._watches if wd not in used]:
+            del self._watches[wd]
+            self._rm_watch(self._fd, wd)  # 디렉터리가 지워졌으면 이미 풀려 있다
+
+    def close(self):
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self._waiting.clear()
+        self._watches.clear()
+
+
+class _DeviceWait:
+    """A path waited for by a DeviceWatcher; cancel() like an asyncio TimerHandle."""
+
+    __slots__ = ("watcher",)
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def cancel(self):
+        self.watcher.cancel(self)
+
+
+class _PortSession:
+    """One open port of a CaptureEngine. Only used on the engine's event loop."""
+
+    read_size = 65536
+
+    def __init__(self, engine, connection, port_id, sink):
+        self.engine = engine
+        self.serial = connection
+        self.port_id = port_id
+        self.sink = sink
+        self.watchers = engine._watchers.setdefault(port_id, [])
+        self.counters = engine.counters(port_id)
+        self.reopen = None  # 실패하면 다시 열 (port, baudrate)
+        self.splitter = None
+        self.set_framing(engine._framing.get(port_id))
+        carried = engine._carry.pop(port_id, None)
+        if carried is not None and type(carried[0]) is type(self.splitter):
+            self.splitter = carried[0]  # 끊기기 전에 받다 만 줄에 이어 붙인다
+        self.pending = []
+        self.last_rx = 0.0
+        self._flush_handle = None
+        self._partial_handle = None
+        self._poller = None
+        # TX: 한 번에 하나의 쓰기만 진행하고, 그동안 들어온 명령은 모아서 다음에 쓴다
+        self.tx_queue = deque()
+        self.tx_stats = TxStats()
+        self._in_flight = []
+        self._out = bytearray()
+        self._tx_handle = None
+        self._waiting_prompt = False
+        self._prompt_tail = b""
+        self.set_pacing()
+        try:
+            self._fd = connection.fileno()
+        except (AttributeError, OSError, ValueError, serial.SerialException):
+            self._fd = None
+
+    def start(self):
+        if self._fd is not None:
+            self.engine.loop.add_reader(self._fd, self._on_readable)
+        else:
+            # fd가 없는 포트(loop:// 등)는 executor에서 timeout을 건 blocking read로 기다린다
+            self.serial.timeout = 0.5
+            self._poller = self.engine.loop.create_task(self._poll())
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, self.read_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self.fail(e)
+            return
+        if not data:
+            self.fail("device disconnected")
+            return
+        self.received(data)
+
+    async def _poll(self):
+        loop = self.engine.loop
+        while True:
+            try:
+                data = await loop.run_in_executor(None, self._blocking_read)
+            except (OSError, serial.SerialException, TypeError, AttributeError) as e:
+                if self.serial.is_open:
+                    self.fail(e)
+                return
+            if data:
+                self.received(data)
+
+    def _blocking_read(self):
+        return self.serial.read(max(1, self.serial.in_waiting))
+
+    def received(self, data):
+        now = time.monotonic()
+        self.last_rx = now
+        counters = self.counters
+        counters.rx_reads += 1
+        counters.rx_bytes += len(data)
+        lines = self.splitter.feed(data)
+        if lines:
+            counters.rx_lines += len(lines)
+            self._received_lines(now, lines)
+        if self._waiting_prompt:
+            self._check_prompt(data)
+        # readline(timeout=1)처럼 개행 없이 멈춘 줄(프롬프트 등)도 partial_timeout이 지나면 내보낸다
+        if self.splitter.has_partial() and self._partial_handle is None:
+            self._partial_handle = self.engine.loop.call_later(self.engine.partial_timeout, self._flush_partial)
+
+    def _flush_partial(self):
+        self._partial_handle = None
+        if not self.splitter.has_partial():
+            return
+        wait = self.last_rx + self.engine.partial_timeout - time.monotonic()
+        if wait > 0:  # 그 사이에 더 받았다
+            self._partial_handle = self.engine.loop.call_later(wait, self._flush_partial)
+            return
+        lines = self.splitter.flush()
+        self.counters.rx_lines += len(lines)
+        self._received_lines(time.monotonic(), lines)
+
+    def _received_lines(self, timestamp, lines):
+        self.add(timestamp, self.rx_kind, lines)
+        if self.watchers:
+            if self.rx_kind == KIND_RAW:
+                lines = [frame.hex(" ") for frame in lines]  # 매크로는 바이너리 프레임을 hex로 본다
+            for watcher in self.watchers:
+                watcher(lines)
+
+    def set_framing(self, framing):
+        """Splits input into text lines (``framing`` None) or into FrameSplitter(**framing) frames."""
+        if self.splitter is not None and self.splitter.has_partial():
+            self._received_lines(time.monotonic(), self.splitter.flush())
+        if framing is None:
+            self.splitter, self.rx_kind = LineSplitter(), KIND_RX
+        else:
+            self.splitter, self.rx_kind = FrameSplitter(**framing), KIND_RAW
+
+    def add(self, timestamp, kind, lines):
+        """Queues lines for the next batch of this port."""
+        if not self.pending:
+            self._flush_handle = self.engine.loop.call_later(self.engine.batch_interval, self.flush)
+        port_id = self.port_id
+        self.pending.extend((timestamp, kind, port_id, line) for line in lines)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.pending:
+            records, self.pending = self.pending, []
+            self.engine.deliver(self.sink, records)
+
+    def set_pacing(self, line_delay=0.0, prompt=None, prompt_timeout=1.0):
+        self.line_delay = line_delay
+        self.prompt = prompt.encode('utf-8') if isinstance(prompt, str) else prompt
+        self.prompt_timeout = prompt_timeout
+
+    def send(self, items):
+        """Queues ``(enqueued, data, label)`` items and writes what pacing allows."""
+        self.tx_queue.extend(items)
+        self._pump()
+
+    def _pump(self):
+        # 이전 쓰기가 끝나지 않았거나 줄 간격/프롬프트를 기다리는 중이면 나중에
+        if not self.tx_queue or self._in_flight or self._tx_handle is not None:
+            return
+        if self.line_delay or self.prompt:
+            items = [self.tx_queue.popleft()]
+        else:
+            items = list(self.tx_queue)  # 쌓인 명령을 한 번에 쓴다
+            self.tx_queue.clear()
+        self._in_flight = items
+        data = items[0][1] if len(items) == 1 else b"".join(item[1] for item in items)
+        if self._fd is None:
+            try:
+                self.serial.write(data)
+            except (OSError, serial.SerialException) as e:
+                self.fail(e, "writing")
+                return
+            self._written()
+            return
+        try:
+            written = os.write(self._fd, data)
+        except (BlockingIOError, InterruptedError):
+            written = 0
+        except OSError as e:
+            self.fail(e, "writing")
+            return
+        if written == len(data):
+            self._written()
+            return
+        self._out += memoryview(data)[written:]
+        self.engine.loop.add_writer(self._fd, self._on_writable)
+
+    def _on_writable(self):
+        try:
+            written = os.write(self._fd, self._out)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self.fail(e, "writing")
+            return
+        del self._out[:written]
+        if not self._out:
+            self.engine.loop.remove_writer(self._fd)
+            self._written()
+
+    def _written(self):
+        """The in-flight items were handed to the driver: log them, record latency and pace."""
+        now = time.monotonic()
+        items, self._in_flight = self._in_flight, []
+        labels = []
+        counters = self.counters
+        for enqueued, data, label in items:
+            self.tx_stats.add(now - enqueued)
+            counters.tx_commands += 1
+            counters.tx_bytes += len(data)
+            if label is not None:
+                labels.append(f"Sent: {label}")
+        if labels:
+            self.add(now, KIND_TX, labels)
+        loop = self.engine.loop
+        if self.prompt:
+            self._prompt_tail = b""
+            self._waiting_prompt = True
+            self._tx_handle = loop.call_later(self.prompt_timeout, self._prompt_timed_out)
+        elif self.line_delay:
+            self._tx_handle = loop.call_later(self.line_delay, self._resume)
+        elif self.tx_queue:
+            self._pump()
+
+    def _check_prompt(self, data):
+        text = self._prompt_tail + data
+        if self.prompt in text:
+            self._resume()
+        else:
+            # 프롬프트가 두 번의 read에 걸쳐 올 수 있다
+            self._prompt_tail = text[-(len(self.prompt) - 1):] if len(self.prompt) > 1 else b""
+
+    def _prompt_timed_out(self):
+        self._tx_handle = None
+        self.add(time.monotonic(), KIND_ERROR, [f"No prompt within {self.prompt_timeout:g} s, sending on"])
+        self._resume()
+
+    def _resume(self):
+        self._waiting_prompt = False
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+            self._tx_handle = None
+        self._pump()
+
+    def fail(self, error, action="reading"):
+        """Reports a read/write error after the lines received before it and closes the port."""
+        # 오류 메시지보다 먼저 받은 줄들을 순서대로 내보낸다
+        self.counters.errors += 1
+        message = f"Error {action} data: {error}"
+        if self.reopen is not None:
+            self.engine._failures[self.port_id] = [message, 0]
+            message += f" ({self.engine._reconnect_later(*self.reopen, self.port_id, self.sink)})"
+        self.add(time.monotonic(), KIND_ERROR, [message])
+        self.engine._ports.pop(self.port_id, None)
+        self.close(keep_partial=self.reopen is not None)
+
+    def close(self, keep_partial=False):
+        """Closes the port after delivering what it holds; with ``keep_partial`` an unfinished
+        line is kept for the next session of the port instead."""
+        loop = self.engine.loop
+        if self._fd is not None:
+            loop.remove_reader(self._fd)
+            if self._out:
+                loop.remove_writer(self._fd)
+        if self._tx_handle is not None:
+            self._tx_handle.cancel()
+            self._tx_handle = None
+        dropped = len(self.tx_queue) + len(self._in_flight)
+        if dropped:
+            self.counters.tx_dropped += dropped
+            self.add(time.monotonic(), KIND_ERROR, [f"{dropped} queued command(s) not sent"])
+        if self._partial_handle is not None:
+            self._partial_handle.cancel()
+            self._partial_handle = None
+        if keep_partial and self.splitter.has_partial():
+            self.engine._carry[self.port_id] = (self.splitter, self.sink)
+        else:
+            self.pending.extend((time.monotonic(), self.rx_kind, self.port_id, line) for line in self.splitter.flush())
+        self.flush()
+        if self._poller is not None:
+            self._poller.cancel()
+        try:
+            self.serial.close()
+        except (OSError, serial.SerialException):
+            pass
+
+
+class CaptureEngine:
+    """Reads and writes any number of serial ports from one asyncio event loop.
+
+    Ports are opened non-blocking and watched with loop.add_reader(), so an idle port
+    costs nothing and no thread per port is needed. Received bytes are split into
+    lines, stamped with time.monotonic() and delivered as batches of
+    ``(timestamp, kind, port_id, text)`` records, at most every ``batch_interval``
+    seconds per port, to the port's own sink and to every subscriber. Sinks are
+    called on the event loop and must not block; stream() offers the same batches
+    as an async iterator.
+
+    The engine either runs its own loop in a background thread (start()) or uses
+    the running loop of an asyncio program (start(loop)). The public methods may be
+    called from any thread.
+
+    A port opened with ``reconnect`` is reopened after every failure. A device
+    path that is gone is waited for with a DeviceWatcher; otherwise the next try
+    comes after ``reconnect_delay`` seconds and then after twice as long each
+    time, up to ``max_reconnect_delay``, starting over after a successful open.
+    An error that repeats while reconnecting is reported once, a line cut off by
+    the failure is completed by what the port sends after reopening, and the
+    reopen is reported as a KIND_SYSTEM record.
+    """
+
+    def __init__(self, batch_interval=0.02, partial_timeout=1.0, reconnect_delay=0.5, max_reconnect_delay=30.0):
+        self.batch_interval = batch_interval
+        self.partial_timeout = partial_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.loop = None
+        self._thread = None
+        self._ports = {}
+        self._pacing = {}
+        self._framing = {}
+        self._watchers = {}  # port -> 수신 줄을 바로 받아 보는 콜백 (매크로의 expect)
+        self._counters = {}
+        self._reopen = {}  # port -> 다시 열기로 예약한 TimerHandle 또는 _DeviceWait
+        self._backoff = {}  # port -> 다음 재연결까지 기다릴 시간
+        self._failures = {}  # port -> [마지막 오류, 같은 오류가 반복된 횟수]
+        self._carry = {}  # port -> (splitter, sink): 끊길 때 받다 만 줄
+        self._device_watcher = None
+        self._subscribers = ()
+        self._streams = set()
+
+    def start(self, loop=None):
+        """Starts a loop thread, or attaches to ``loop``. Returns the engine."""
+        if loop is not None:
+            self.loop = loop
+            return self
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="CaptureEngine", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Closes every port, ends the streams and, if the engine has its own thread, stops it."""
+        if self._thread is None:
+            self._call(self._close_all)
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    async def _shutdown(self):
+        pollers = [session._poller for session in self._ports.values() if session._poller is not None]
+        self._close_all()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        await self.loop.shutdown_default_executor()  # blocking read를 하던 스레드까지 끝낸다
+
+    def _call(self, function, *args):
+        self.loop.call_soon_threadsafe(function, *args)
+
+    def open_port(self, port, baudrate, port_id=0, sink=None, reconnect=False):
+        """Opens ``port`` (a device path or a pyserial URL) and starts reading it.
+
+        Records of the port go to ``sink`` (if given) and to the subscribers; a
+        failure to open is reported to them as a KIND_ERROR record. With
+        ``reconnect`` the port is reopened after a failure until close_port().
+        Returns a concurrent.futures.Future that resolves to whether the first
+        attempt opened the port.
+        """
+        future = concurrent.futures.Future()
+        self._call(self._open, port, baudrate, port_id, sink, future, reconnect)
+        return future
+
+    def _open(self, port, baudrate, port_id, sink, future=None, reconnect=False):
+        self._close(port_id)
+        try:
+            connection = serial.serial_for_url(port, baudrate, timeout=0)
+        except (serial.SerialException, OSError, ValueError) as e:
+            self.counters(port_id).errors += 1
+            message = f"Error: {e}"
+            failure = self._failures.get(port_id)
+            if not reconnect:
+                self.deliver(sink, [(time.monotonic(), KIND_ERROR, port_id, message)])
+            elif failure is not None and failure[0] == message:
+                failure[1] += 1  # 같은 오류는 다시 보여 주지 않는다
+                self._reconnect_later(port, baudrate, port_id, sink)
+            else:
+                self._failures[port_id] = [message, 0]
+                note = self._reconnect_later(port, baudrate, port_id, sink)
+                self.deliver(sink, [(time.monotonic(), KIND_ERROR, port_id, f"{message} ({note})")])
+            if future is not None:
+                future.set_result(False)
+            return
+        self._backoff.pop(port_id, None)
+        failure = self._failures.pop(port_id, None)
+        if failure is not None:
+            note = f" (the last error repeated {failure[1]} times)" if failure[1] else ""
+            self.deliver(sink, [(time.monotonic(), KIND_SYSTEM, port_id, f"Reconnected to {port}{note}")])
+        session = self._ports[port_id] = _PortSession(self, connection, port_id, sink)
+        if reconnect:
+            session.reopen = (port, baudrate)
+        if port_id in self._pacing:
+            session.set_pacing(*self._pacing[port_id])
+        session.start()
+        if future is not None:
+            future.set_result(True)
+
+    def _reconnect_later(self, port, baudrate, port_id, sink):
+        """Schedules the next attempt to open a port; returns when, for the error message."""
+        if "://" not in port and not os.path.exists(port):
+            # 장치 파일이 다시 생길 때까지 inotify로 기다린다 (그동안 CPU를 쓰지 않는다)
+            if self._device_watcher is None:
+                self._device_watcher = DeviceWatcher(self.loop)
+            handle = self._device_watcher.watch(port, lambda: self._open(port, baudrate, port_id, sink, None, True))
+            if handle is not None:
+                self._reopen[port_id] = handle
+                return "waiting for the device"
+        delay = self._backoff.get(port_id, self.reconnect_delay)
+        self._backoff[port_id] = min(delay * 2, self.max_reconnect_delay)
+        self._reopen[port_id] = self.loop.call_later(delay, self._open, port, baudrate, port_id, sink, None, True)
+        return f"retrying in {delay:g} s"
+
+    def close_port(self, port_id):
+        """Closes a port after delivering the lines it still holds, and stops reconnecting it.
+
+        Returns a concurrent.futures.Future that resolves once those lines went to the sinks.
+        """
+        future = concurrent.futures.Future()
+        self._call(self._close_port, port_id, future)
+        return future
+
+    def _close_port(self, port_id, future=None):
+        self._backoff.pop(port_id, None)
+        self._failures.pop(port_id, None)
+        self._close(port_id)
+        self._flush_carry(port_id)
+        if future is not None:
+            future.set_result(None)
+
+    def _flush_carry(self, port_id):
+        """Delivers a line kept over a reconnect once the port will not continue it."""
+        carried = self._carry.pop(port_id, None)
+        if carried is not None:
+            splitter, sink = carried
+            kind = KIND_RAW if isinstance(splitter, FrameSplitter) else KIND_RX
+            now = time.monotonic()
+            self.deliver(sink, [(now, kind, port_id, line) for line in splitter.flush()])
+
+    def _close(self, port_id):
+        handle = self._reopen.pop(port_id, None)
+        if handle is not None:
+            handle.cancel()
+        session = self._ports.pop(port_id, None)
+        if session is not None:
+            session.close()
+
+    def _close_all(self):
+        for port_id in list(self._ports) + list(self._reopen) + list(self._carry):
+            self._close_port(port_id)
+        if self._device_watcher is not None:
+            self._device_watcher.close()
+            self._device_watcher = None
+        for queue_ in self._streams:
+            queue_.put_nowait(None)  # stream()을 끝낸다
+
+    def is_open(self, port_id):
+        return port_id in self._ports
+
+    def is_reconnecting(self, port_id):
+        """True while a port waits to be reopened after a failure."""
+        return port_id in self._reopen
+
+    def send(self, port_id, lines, newline="\n"):
+        """Queues text commands for a port; each is logged as a KIND_TX record once written.
+
+        Never blocks the caller. Commands queued while a write is in progress are
+        written together in one go, unless pacing is set (see set_pacing()).
+        """
+        now = time.monotonic()
+        items = [(now, f"{line}{newline}".encode('utf-8'), line) for line in lines]
+        self._call(self._send, port_id, items)
+
+    def write(self, port_id, data):
+        """Queues raw ``data`` (bytes) for a port, through the same pipeline as send()."""
+        self._call(self._send, port_id, [(time.monotonic(), bytes(data), None)])
+
+    def _send(self, port_id, items):
+        session = self._ports.get(port_id)
+        if session is not None:
+            session.send(items)
+
+    def set_pacing(self, port_id, line_delay=0.0, prompt=None, prompt_timeout=1.0):
+        """Paces the commands sent to a port.
+
+        With ``line_delay`` each command waits that many seconds after the previous
+        one was written; with ``prompt`` it waits until the device sends the prompt
+        (or ``prompt_timeout`` passes). The setting survives reopening the port.
+        """
+        self._call(self._set_pacing, port_id, (line_delay, prompt, prompt_timeout))
+
+    def _set_pacing(self, port_id, pacing):
+        self._pacing[port_id] = pacing
+        session = self._ports.get(port_id)
+        if session is not None:
+            session.set_pacing(*pacing)
+            session._resume()
+
+    def set_framing(self, port_id, framing=None):
+        """Splits what a port receives into binary frames or text lines.
+
+        ``framing`` holds FrameSplitter keyword arguments (see parse_framing()); the
+        frames are delivered undecoded as KIND_RAW records. None (the default)
+        means text lines. The setting survives reopening the port.
+        """
+        if framing is not None:
+            FrameSplitter(**framing)  # 잘못된 설정은 호출한 쪽에서 ValueError
+        self._call(self._set_framing, port_id, framing)
+
+    def _set_framing(self, port_id, framing):
+        self._framing[port_id] = framing
+        session = self._ports.get(port_id)
+        if session is not None:
+            session.set_framing(framing)
+        else:
+            self._flush_carry(port_id)  # 다른 방식으로 나눌 것이므로 이어 붙이지 않는다
+
+    def tx_stats(self, port_id):
+        """Returns the TxStats of an open port, or None."""
+        session = self._ports.get(port_id)
+        return session.tx_stats if session is not None else None
+
+    def tx_pending(self, port_id):
+        """Number of commands queued for a port and not written yet."""
+        session = self._ports.get(port_id)
+        return len(session.tx_queue) + len(session._in_flight) if session is not None else 0
+
+    def counters(self, port_id):
+        """Returns the PortCounters of a port (created on first use, kept after closing)."""
+        counters = self._counters.get(port_id)
+        if counters is None:
+            counters = self._counters.setdefault(port_id, PortCounters())
+        return counters
+
+    def watch(self, port_id, watcher):
+        """Calls ``watcher(lines)`` on the event loop with every group of text lines received
+        on a port, as soon as they are split and before they are batched.
+
+        Must be called on the engine's loop, like unwatch().
+        """
+        self._watchers.setdefault(port_id, []).append(watcher)
+
+    def unwatch(self, port_id, watcher):
+        watchers = self._watchers.get(port_id, [])
+        if watcher in watchers:
+            watchers.remove(watcher)
+
+    def post(self, port_id, kind, text):
+        """Adds a record to a port's stream, in order with its received lines."""
+        self._call(self._post, port_id, kind, text)
+
+    def _post(self, port_id, kind, text):
+        session = self._ports.get(port_id)
+        if session is not None:
+            session.add(time.monotonic(), kind, [text])
+
+    def subscribe(self, sink):
+        """Calls ``sink(records)`` on the event loop for every batch of every port."""
+        self._subscribers = self._subscribers + (sink,)
+
+    def unsubscribe(self, sink):
+        self._subscribers = tuple(s for s in self._subscribers if s is not sink)
+
+    def deliver(self, sink, records):
+        if sink is not None:
+            sink(records)
+        for subscriber in self._subscribers:
+            subscriber(records)
+
+    def stream(self):
+        """Returns an async iterator over the record batches of every port.
+
+        Must be consumed on the engine's loop. The subscription starts right away,
+        so no batch is missed between this call and the first ``async for`` step;
+        the iterator ends when the engine is stopped.
+        """
+        records_queue = asyncio.Queue()
+        put = records_queue.put_nowait
+        self._streams.add(records_queue)
+        self.subscribe(put)
+        return self._iter_queue(records_queue, put)
+
+    async def _iter_queue(self, records_queue, put):
+        try:
+            while True:
+                records = await records_queue.get()
+                if records is None:
+                    return
+                yield records
+        finally:
+            self._streams.discard(records_queue)
+            self.unsubscribe(put)
+
+
+class MacroError(Exception):
+    """A macro could not be parsed, or a step failed while it ran."""
+
+
+def parse_macro(text):
+    """Parses a macro into a list of steps.
+
+    One step per line; blank lines and lines starting with ``#`` are ignored::
+
+        timeout 2          default timeout of the following expects, in seconds
+        send AT+RST        send a command (a newline is added)
+        expect ^OK$        wait for a received line matching the regex
+        wait 0.5           sleep
+        loop 10000         repeat the steps up to the matching "end"
+        end
+
+    Steps are ``("send", text)``, ``("expect", compiled_regex, timeout, source_line)``,
+    ``("wait", seconds)`` and ``("loop", count, steps)``.
+    """
+    root = []
+    stack = [(root, 0)]
+    timeout = 5.0
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        command, _, argument = line.partition(" ")
+        command = command.lower()
+        steps = stack[-1][0]
+        try:
+            if command == "send":
+                steps.append(("send", raw.lstrip()[5:]))  # 명령 뒤 공백은 그대로 보낸다
+            elif command == "expect":
+                steps.append(("expect", re.compile(argument), timeout, number))
+            elif command == "wait":
+                steps.append(("wait", float(argument)))
+            elif command == "timeout":
+                timeout = float(argument)
+            elif command == "loop":
+                body = []
+                steps.append(("loop", int(argument), body))
+                stack.append((body, number))
+            elif command == "end":
+                if len(stack) == 1:
+                    raise MacroError(f"line {number}: 'end' without 'loop'")
+                stack.pop()
+            else:
+                raise MacroError(f"line {number}: unknown step '{command}'")
+        except (ValueError, re.error) as e:
+            raise MacroError(f"line {number}: {e}") from None
+    if len(stack) > 1:
+        raise MacroError(f"line {stack[-1][1]}: 'loop' without 'end'")
+    return root
+
+
+class MacroRunner:
+    """Runs macro steps (see parse_macro) against one port of a CaptureEngine.
+
+    The macro runs as a coroutine on the engine's loop. Expects are checked against
+    received lines as the port splits them, with the precompiled regexes, so the
+    macro goes as fast as the device answers and never waits for the GUI. Lines
+    received since the last match are kept (at most ``max_buffered``) so a reply
+    that arrives before its expect step is not missed.
+
+    ``on_finished(error)`` is called on the loop when the run ends, with None on
+    success or an error message.
+    """
+
+    def __init__(self, engine, port_id, steps, on_finished=None, max_buffered=10000):
+        self.engine = engine
+        self.port_id = port_id
+        self.steps = steps
+        self.on_finished = on_finished
+        self.iterations = 0  # 끝난 최상위 loop 반복 횟수
+        self.elapsed = 0.0
+        self._buffer = deque(maxlen=max_buffered)
+        self._waiter = None  # (regex, future) of the expect in progress
+        self._task = None
+
+    def start(self):
+        """Starts the run; returns a concurrent.futures.Future of on_finished's argument."""
+        return asyncio.run_coroutine_threadsafe(self.run(), self.engine.loop)
+
+    def cancel(self):
+        if self._task is not None:
+            self.engine.loop.call_soon_threadsafe(self._task.cancel)
+
+    async def run(self):
+        self._task = asyncio.current_task()
+        self.engine.watch(self.port_id, self._on_lines)
+        self.engine.post(self.port_id, KIND_SYSTEM, "Macro started")
+        start = time.monotonic()
+        error = None
+        try:
+            await self._run_steps(self.steps, top=True)
+        except MacroError as e:
+            error = str(e)
+        except asyncio.CancelledError:
+            error = "stopped"
+        finally:
+            self.engine.unwatch(self.port_id, self._on_lines)
+            self._buffer.clear()
+            self.elapsed = time.monotonic() - start
+        if error is None:
+            self.engine.post(self.port_id, KIND_SYSTEM, f"Macro finished in {self.elapsed:.3f} s")
+        else:
+            self.engine.post(self.port_id, KIND_ERROR, f"Macro failed: {error}")
+        if self.on_finished is not None:
+            self.on_finished(error)
+        return error
+
+    async def _run_steps(self, steps, top=False):
+        for step in steps:
+            kind = step[0]
+            if kind == "send":
+                self.engine.send(self.port_id, [step[1]])
+            elif kind == "expect":
+                await self._expect(step[1], step[2], step[3])
+            elif kind == "wait":
+                await asyncio.sleep(step[1])
+            else:
+                for _ in range(step[1]):
+                    await self._run_steps(step[2])
+                    if top:
+                        self.iterations += 1
+
+    def _on_lines(self, lines):
+        if self._waiter is not None:
+            pattern, future = self._waiter
+            for k, line in enumerate(lines):
+                if pattern.search(line):
+                    self._waiter = None
+                    self._buffer.extend(lines[k + 1:])  # 일치한 줄 뒤는 다음 expect 몫
+                    if not future.done():  # 시간 초과나 취소와 겹쳤을 수 있다
+                        future.set_result(line)
+                    return
+            return
+        self._buffer.extend(lines)
+
+    async def _expect(self, pattern, timeout, source_line):
+        buffer = self._buffer
+        while buffer:
+            if pattern.search(buffer.popleft()):
+                return
+        loop = self.engine.loop
+        future = loop.create_future()
+        self._waiter = (pattern, future)
+        # wait_for()는 결과와 취소가 겹치면 취소를 삼킬 수 있어 타이머로 직접 처리한다
+        timer = loop.call_later(timeout, self._expect_timed_out, future,
+                                f"line {source_line}: no line matching '{pattern.pattern}' within {timeout:g} s")
+        try:
+            await future
+        finally:
+            timer.cancel()
+            self._waiter = None
+
+    @staticmethod
+    def _expect_timed_out(future, message):
+        if not future.done():
+            future.set_exception(MacroError(message))
+
+
+class _ShareClient(asyncio.Protocol):
+    """One TCP client of a ShareServer."""
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.name = "?"
+        self.paused = False
+        self.skipped = 0  # 밀려서 보내지 못한 줄 수
+        self._partial = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        host, port = transport.get_extra_info("peername")[:2]
+        self.name = f"{host}:{port}"
+        transport.set_write_buffer_limits(high=self.server.max_queue)
+        # 커널 송신 버퍼도 큐의 일부라서, 크게 잡히지 않도록 같은 크기로 묶는다
+        transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.server.max_queue)
+        self.server._add_client(self)
+
+    def connection_lost(self, exc):
+        self.server._remove_client(self)
+
+    def pause_writing(self):
+        # 쓰기 버퍼(이 client의 큐)가 max_queue를 넘었다
+        if self.server.on_slow == "drop":
+            self.server.dropped += 1
+            self.server._event(f"Share client {self.name} dropped: not reading fast enough")
+            self.transport.abort()
+        else:
+            self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        if self.skipped:
+            self.write_records([(time.monotonic(), KIND_SYSTEM, 0, f"{self.skipped} lines skipped, client too slow")])
+            self.skipped = 0
+
+    def write_records(self, records):
+        self.transport.write(format_records(records).encode("utf-8"))
+
+    def data_received(self, data):
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > 65536:
+            self._partial = b""  # 줄바꿈 없이 너무 긴 입력은 버린다
+        if lines:
+            self.server._command(self, [line.rstrip(b"\r").decode("utf-8", "replace") for line in lines])
+
+
+class ShareServer:
+    """Shares the ports of a CaptureEngine with TCP clients, so one session serves many readers.
+
+    The server runs on the engine's loop and subscribes to every batch, which is
+    formatted once (as capture file lines, see format_records()) and written to
+    every client. A client's queue is its transport's write buffer, bounded by
+    ``max_queue`` bytes: a client that lets it fill up has batches left out until
+    it catches up, followed by a line saying how many (``on_slow="skip"``), or is
+    disconnected (``"drop"``), and never holds up the port or the other clients.
+
+    A new client first gets the last ``replay`` lines, at most ``max_queue``
+    bytes of them. Lines from a client are commands for port ``tx_port``, or for
+    port N if they start with ``@N ``, and go through CaptureEngine.send() like
+    any other command unless ``allow_tx`` is off. ``on_event(message)`` is called on the loop when clients come and go.
+    """
+
+    def __init__(self, engine, host="127.0.0.1", port=7777, replay=1000, max_queue=1 << 20, on_slow="skip",
+                 tx_port=0, allow_tx=True, on_event=None):
+        if on_slow not in ("skip", "drop"):
+            raise ValueError(f"on_slow must be 'skip' or 'drop', not {on_slow!r}")
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.on_slow = on_slow
+        self.tx_port = tx_port
+        self.allow_tx = allow_tx
+        self.on_event = on_event
+        self.clients = set()
+        self.dropped = 0  # 느려서 끊은 client 수
+        self.skipped = 0  # 느린 client에게 보내지 못한 줄 수
+        self._recent = deque(maxlen=replay) if replay else None
+        self._server = None
+
+    def start(self):
+        """Starts listening from another thread than the engine's; raises OSError if the address is taken."""
+        asyncio.run_coroutine_threadsafe(self.listen(), self.engine.loop).result()
+        return self
+
+    async def listen(self):
+        """Starts listening, on the engine's loop."""
+        self._server = await self.engine.loop.create_server(lambda: _ShareClient(self), self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]  # 0이면 OS가 고른 포트
+        self.engine.subscribe(self._fan_out)
+
+    def stop(self):
+        """Stops listening and disconnects every client (on the engine's loop, without waiting)."""
+        self.engine._call(self.close)
+
+    def close(self):
+        if self._server is None:
+            return
+        self.engine.unsubscribe(self._fan_out)
+        self._server.close()
+        self._server = None
+        for client in list(self.clients):
+            client.transport.close()
+
+    def _event(self, message):
+        if self.on_event is not None:
+            self.on_event(message)
+
+    def _add_client(self, client):
+        if self._server is None:
+            client.transport.close()  # close() 직전에 받은 연결
+            return
+        self.clients.add(client)
+        if self._recent:
+            replay = "".join(self._recent).encode("utf-8")
+            if len(replay) > self.max_queue:
+                # 큐보다 많이 보내면 "drop"에서는 붙자마자 끊기므로 뒤쪽의 온전한 줄만 보낸다
+                replay = replay[-self.max_queue:]
+                replay = replay[replay.find(b"\n") + 1:]
+            client.transport.write(replay)
+        self._event(f"Share client {client.name} connected ({len(self.clients)} connected)")
+
+    def _remove_client(self, client):
+        if client in self.clients:
+            self.clients.discard(client)
+            self._event(f"Share client {client.name} disconnected ({len(self.clients)} connected)")
+
+    def _fan_out(self, records):
+        text = format_records(records)
+        if self._recent is not None:
+            self._recent.extend(text.splitlines(keepends=True))
+        if not self.clients:
+            return
+        data = text.encode("utf-8")
+        for client in list(self.clients):
+            if client.paused:
+                client.skipped += len(records)
+                self.skipped += len(records)
+            else:
+                client.transport.write(data)
+
+    def _command(self, client, lines):
+        if not self.allow_tx:
+            return
+        commands = {}
+        for line in lines:
+            port_id = self.tx_port
+            if line.startswith("@"):
+                target, _, rest = line[1:].partition(" ")
+                if target.isdigit():
+                    port_id, line = int(target), rest
+            commands.setdefault(port_id, []).append(line)
+        for port_id, port_lines in commands.items():
+            self.engine.send(port_id, port_lines)
+
+
+def parse_port(spec, baudrate):
+    """Splits a ``PORT[@BAUD]`` command line argument."""
+    port, _, baud = spec.rpartition("@")
+    if port and baud.isdigit():
+        return port, int(baud)
+    return spec, baudrate
+
+
+async def _log_stats(engine, port_count, path, interval):
+    """Appends a stats line per port to ``path`` every ``interval`` seconds."""
+    writer = StatsWriter(path)
+    previous = [engine.counters(port_id).snapshot() for port_id in range(port_count)]
+    last = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for port_id in range(port_count):
+                sample, previous[port_id] = engine.counters(port_id).sample(previous[port_id], now - last)
+                writer.write({"time": round(time.time(), 3), "port": port_id,
+                              "tx_queue": engine.tx_pending(port_id), **sample})
+            last = now
+    finally:
+        writer.close()
+
+
+async def _run_headless(args, macro_steps=None):
+    loop = asyncio.get_running_loop()
+    engine = CaptureEngine().start(loop)
+    share = None
+    if args.share:
+        host, _, port = args.share.rpartition(":")
+        share = ShareServer(engine, host or "127.0.0.1", int(port), args.share_replay, args.share_queue_kb * 1024,
+                            args.share_slow, allow_tx=not args.share_read_only,
+                            on_event=lambda message: sys.stderr.write(f"{message}\n"))
+        try:
+            await share.listen()
+        except OSError as e:  # 예: 주소를 이미 쓰고 있다
+            raise RuntimeError(f"--share {args.share}: {e}") from None
+    writer = None
+    if args.out:
+        writer = CaptureWriter(args.out, max_bytes=args.max_mb * 1024 * 1024, max_seconds=args.max_minutes * 60,
+                               compress=args.compress, fsync=args.fsync, timestamps=not args.no_timestamps)
+        writer.start()
+    records_stream = engine.stream()
+    trigger = None
+    if args.trigger or args.silence:
+        def on_incident(path, reason):
+            sys.stderr.write(f"{path}: {reason}\n")
+        trigger = TriggerCapture(args.incident_dir, args.trigger, args.silence, args.pre_lines, args.pre_seconds,
+                                 args.post_lines, args.post_seconds, on_incident)
+        trigger.start()
+        engine.subscribe(trigger.submit)  # 배치마다 이벤트 루프에서 바로 검사한다
+    for port_id in range(len(args.port)):
+        engine.set_framing(port_id, args.framing)
+    opened = [engine.open_port(*parse_port(spec, args.baudrate), port_id, reconnect=args.reconnect)
+              for port_id, spec in enumerate(args.port)]
+
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    if args.duration:
+        loop.call_later(args.duration, stop.set)
+
+    async def pump():
+        async for records in records_stream:
+            if writer is not None or trigger is not None:
+                if writer is not None:
+                    writer.submit(records)
+                # 파일로 저장할 때도 오류는 화면에 보여준다
+                errors = [record for record in records if record[1] == KIND_ERROR]
+                if errors:
+                    sys.stderr.write(format_records(errors))
+            else:
+                sys.stdout.write(format_records(records, not args.no_timestamps))
+                sys.stdout.flush()
+
+    pump_task = asyncio.create_task(pump())
+    status = 0
+    if macro_steps is not None:
+        # 매크로는 첫 번째 포트에서 돌리고, 끝나면 캡처도 끝낸다
+        async def run_macro():
+            nonlocal status
+            if not await asyncio.wrap_future(opened[0]):
+                status = 1
+            elif await MacroRunner(engine, 0, macro_steps).run() is not None:
+                status = 1
+            stop.set()
+        macro_task = asyncio.create_task(run_macro())
+    if args.stats:
+        stats_task = asyncio.create_task(_log_stats(engine, len(args.port), args.stats, args.stats_interval))
+    await stop.wait()
+    if args.stats:
+        stats_task.cancel()
+        await asyncio.gather(stats_task, return_exceptions=True)
+    if macro_steps is not None:
+        macro_task.cancel()
+        await asyncio.gather(macro_task, return_exceptions=True)
+    if share is not None:
+        share.close()
+    engine.stop()
+    await pump_task
+    if writer is not None:
+        writer.stop()
+    if trigger is not None:
+        trigger.stop()
+    return status
+
+
+def headless_main(argv=None):
+    """Command line capture without the GUI: ``serial_log.py --headless --port PORT [--out FILE]``."""
+    parser = argparse.ArgumentParser(prog="serial_log.py --headless",
+                                     description="Capture serial ports to a file (or stdout) without the GUI.")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", action="append", required=True,
+                        help="serial port or pyserial URL, optionally PORT@BAUD; repeat for more ports")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--reconnect", action="store_true",
+                        help="keep reopening a port that fails or is missing, with exponential backoff")
+    parser.add_argument("--out", help="capture file (default: write to stdout)")
+    parser.add_argument("--max-mb", type=int, default=0, help="rotate the capture file at this size")
+    parser.add_argument("--max-minutes", type=int, default=0, help="rotate the capture file after this time")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], help="compress rotated files")
+    parser.add_argument("--fsync", choices=["rotate", "batch", "never"], default="rotate")
+    parser.add_argument("--no-timestamps", action="store_true", help="write the bare lines")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds")
+    parser.add_argument("--macro", help="run this macro on the first port, then exit (status 1 if it fails)")
+    parser.add_argument("--framing", default="text",
+                        help="text (default), delimiter:HEX, fixed:N, length:N[le|be], slip or cobs; "
+                             "binary frames are written as hex")
+    parser.add_argument("--stats", help="append per-port counters to this CSV (or .json/.jsonl) file")
+    parser.add_argument("--stats-interval", type=float, default=1.0, help="seconds between stats lines")
+    trigger = parser.add_argument_group("trigger capture",
+                                        "keep traffic in memory and only write the lines around each trigger "
+                                        "to numbered incident files")
+    trigger.add_argument("--trigger", action="append", default=[], metavar="REGEX",
+                         help="trigger on a received line matching REGEX; repeat for more")
+    trigger.add_argument("--silence", type=float, default=0, metavar="SECONDS",
+                         help="trigger when a port receives nothing for this long")
+    trigger.add_argument("--incident-dir", default=".", help="directory of the incident files")
+    trigger.add_argument("--pre-lines", type=int, default=1000, help="lines kept from before a trigger")
+    trigger.add_argument("--pre-seconds", type=float, default=0, help="only keep lines this recent (0 = off)")
+    trigger.add_argument("--post-lines", type=int, default=1000, help="lines written after a trigger")
+    trigger.add_argument("--post-seconds", type=float, default=0, help="end an incident after this time (0 = off)")
+    share = parser.add_argument_group("sharing", "serve the live stream to TCP clients, which may also send commands")
+    share.add_argument("--share", metavar="[HOST:]PORT", help="listen on this address (HOST defaults to 127.0.0.1)")
+    share.add_argument("--share-replay", type=int, default=1000, metavar="LINES",
+                       help="lines a new client gets from before it connected")
+    share.add_argument("--share-queue-kb", type=int, default=1024, help="output a client may fall behind by")
+    share.add_argument("--share-slow", choices=["skip", "drop"], default="skip",
+                       help="what to do with a client that falls further behind: skip lines or disconnect it")
+    share.add_argument("--share-read-only", action="store_true", help="ignore what clients send")
+    args = parser.parse_args(argv)
+    if args.share and not args.share.rpartition(":")[2].isdigit():
+        parser.error(f"--share {args.share!r}: expected [HOST:]PORT")
+    for pattern in args.trigger:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            parser.error(f"--trigger {pattern!r}: {e}")
+    try:
+        args.framing = parse_framing(args.framing)
+    except ValueError as e:
+        parser.error(f"--framing: {e}")
+    macro_steps = None
+    if args.macro:
+        try:
+            with open(args.macro, encoding="utf-8") as f:
+                macro_steps = parse_macro(f.read())
+        except (OSError, MacroError) as e:
+            parser.error(f"{args.macro}: {e}")
+    try:
+        return asyncio.run(_run_headless(args, macro_steps))
+    except RuntimeError as e:  # 예: zstandard가 없다
+        parser.error(str(e))
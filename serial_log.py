@@ -1,16 +1,46 @@
-import os
 import sys
-import serial
-import threading
 import time
+
+_STARTED = time.perf_counter()
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # 헤드리스 캡처는 PySide6를 불러오지 않는다
+    from serial_core import headless_main
+    sys.exit(headless_main(sys.argv[1:]))
+
+import codecs
+import concurrent.futures
+import os
+import threading
 import re
-import queue
+from array import array
+from bisect import bisect_left
+from itertools import islice
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QTextEdit, QLineEdit, QVBoxLayout, QWidget, QTabWidget, QPushButton, QMenu, QDialog,
-    QFormLayout, QComboBox, QDialogButtonBox, QLabel, QCompleter , QMessageBox, QHBoxLayout, QFileDialog, QInputDialog,
-    QListWidget, QTextBrowser )
-from PySide6.QtCore import Signal, QObject, Qt, QTimer
-from PySide6.QtGui import QAction, QShortcut, QKeySequence, QTextCursor, QTextCharFormat, QColor, QTextDocument
+    QApplication, QMainWindow, QLineEdit, QVBoxLayout, QWidget, QTabWidget, QPushButton, QMenu, QDialog,
+    QFormLayout, QComboBox, QSpinBox, QDialogButtonBox, QLabel, QCompleter , QMessageBox, QHBoxLayout, QFileDialog, QInputDialog,
+    QListWidget, QListWidgetItem, QTableView, QHeaderView, QAbstractItemView, QCheckBox, QTableWidget,
+    QTableWidgetItem, QStyledItemDelegate, QColorDialog )
+from PySide6.QtCore import Signal, QObject, Qt, QTimer, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QAction, QShortcut, QKeySequence, QTextCharFormat, QColor, QTextDocument, QPalette
+
+from serial_core import (
+    LogStore, TrigramIndex, CaptureWriter, TriggerCapture, ArchiveSearch, archive_files, open_capture, StreamMerger, CaptureEngine, MacroRunner, MacroError,
+    parse_macro, SendHistory, StatsWriter, ShareServer, HighlightRules, FieldExtractor, FieldTable, export_fields, FrameSplitter, record_text, KIND_RAW, KIND_SYSTEM, KIND_NAMES,
+    format_timestamp,
+)
+
+# SERIAL_LOG_TRACE_STARTUP=1 이면 시작 단계별 시간을 stderr에 찍는다
+_TRACE_STARTUP = bool(os.environ.get("SERIAL_LOG_TRACE_STARTUP"))
+
+
+def trace_startup(step):
+    """Prints the time since the program started if SERIAL_LOG_TRACE_STARTUP is set."""
+    if _TRACE_STARTUP:
+        print(f"startup {1000 * (time.perf_counter() - _STARTED):7.1f} ms  {step}", file=sys.stderr)
+
+
+trace_startup("modules imported")
 
 
 class SearchDialog(QDialog):
@@ -69,94 +99,84 @@ class SearchDialog(QDialog):
     def get_search_text(self):
         return self.search_input.text()
 
-class SerialRXThread(threading.Thread):
-    def __init__(self, serial_connection, data_received_signal):
-        super().__init__(daemon=True)
-        self.serial = serial_connection
-        self.data_received_signal = data_received_signal
+_engine = None
 
-    def run(self):
-        while True:
-            try:
-                if self.serial and self.serial.is_open and self.serial.in_waiting > 0:
-                    data = self.serial.readline().decode().strip()
-                    # 시그널이 여전히 유효한지 확인한 후 emit
-                    if self.data_received_signal and hasattr(self.data_received_signal, 'emit'):
-                        self.data_received_signal.emit(data)
-                time.sleep(0.01)
-            except serial.SerialException as e:
-                # 예외 처리 후 시그널이 유효한지 확인
-                if self.data_received_signal and hasattr(self.data_received_signal, 'emit'):
-                    self.data_received_signal.emit(f"Error reading data: {e}")
-            except Exception as e:
-                # 기타 오류 처리
-                if self.data_received_signal and hasattr(self.data_received_signal, 'emit'):
-                    self.data_received_signal.emit(f"Error reading data: {e}")
-                time.sleep(0.1)  # 재시도 전 대기
-
-class SerialTXThread(threading.Thread):
-    def __init__(self, serial_connection, data_to_send_signal):
-        super().__init__(daemon=True)
-        self.serial = serial_connection
-        self.data_to_send_signal = data_to_send_signal
-        self.send_queue = queue.Queue()  # Create a queue for transmitting data
-
-        # Connect the signal to the queue
-        self.data_to_send_signal.connect(self.add_data_to_queue)
-
-    def run(self):
-        while True:
-            try:
-                data = self.send_queue.get()  # Get data from the queue
-                if data:
-                    self.serial.write(data.encode())
-            except Exception as e:
-                print(f"Error sending data: {e}")
-            time.sleep(0.01)
 
-    def add_data_to_queue(self, data):
-        """Add data to the queue for sending."""
-        self.send_queue.put(data)
+def shared_engine():
+    """Returns the CaptureEngine that serves every port of the GUI, starting it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = CaptureEngine().start()
+    return _engine
+
+
+def stop_shared_engine():
+    """Closes every port of the shared engine and waits for its thread to end."""
+    global _engine
+    if _engine is not None:
+        _engine.stop()
+        _engine = None
 
 
 class SerialThread(QObject):
-    data_received = Signal(str)
-    data_to_send_signal = Signal(str)
+    """Qt front end of one serial port served by a CaptureEngine.
+
+    The port is read and written on the engine's event loop thread; batches of
+    ``(timestamp, kind, port_id, text)`` records are emitted from that thread by
+    ``lines_received``, so connect with Qt.DirectConnection to handle them there.
+    """
+    lines_received = Signal(list)
 
-    def __init__(self, port, baudrate):
+    def __init__(self, port, baudrate, port_id=0, engine=None):
         super().__init__()
         self.port = port
         self.baudrate = baudrate
-        self.serial = None
-        self.running = False
-        self.rx_thread = None
-        self.tx_thread = None
+        self.port_id = port_id
+        self.engine = engine or shared_engine()
+        self._opened = None  # 마지막 open_port()의 결과
+        self.pacing = (0.0, None, 1.0)  # (줄 간격 초, 프롬프트, 프롬프트 timeout 초)
+        self.framing = None  # None이면 텍스트 줄, 아니면 FrameSplitter 설정
+
+    @property
+    def running(self):
+        """True while the port is being opened, is open or waits to be reopened."""
+        if self._opened is None:
+            return False
+        return (not self._opened.done() or self.engine.is_open(self.port_id)
+                or self.engine.is_reconnecting(self.port_id))
 
     def start(self):
-        try:
-            self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
-            if not self.serial.is_open:
-                self.serial.open()  # 시리얼 포트가 열려 있지 않으면 열기
-            self.running = True
-            self.rx_thread = SerialRXThread(self.serial, self.data_received)
-            self.tx_thread = SerialTXThread(self.serial, self.data_to_send_signal)
-            self.rx_thread.start()
-            self.tx_thread.start()
-        except serial.SerialException as e:
-            self.data_received.emit(f"Error: {e}")
+        # 포트가 없거나 빠지면 점점 간격을 늘려 가며 다시 연다
+        self._opened = self.engine.open_port(self.port, self.baudrate, self.port_id, self.lines_received.emit,
+                                             reconnect=True)
 
     def stop(self):
-        self.running = False
-        if self.serial and self.serial.is_open:
-            self.serial.close()  # 시리얼 연결 종료
+        """Closes the port; returns a Future that resolves once its last lines were emitted."""
+        self._opened = None
+        return self.engine.close_port(self.port_id)  # 아직 내보내지 않은 줄을 먼저 내보낸다
 
     def send_data(self, data):
-        if self.serial and self.serial.is_open:
-            try:
-                self.serial.write((data + '\n').encode('utf-8'))  # Add newline character
-                self.serial.flush()  # Ensure data is sent immediately
-            except serial.SerialException as e:
-                self.data_to_send_signal.emit(data)
+        """Queues one command; it is written (with a newline) by the engine's TX pipeline."""
+        self.engine.send(self.port_id, [data])
+
+    def send_lines(self, lines):
+        """Queues many commands at once, e.g. a scripted burst."""
+        self.engine.send(self.port_id, lines)
+
+    def set_pacing(self, line_delay=0.0, prompt=None, prompt_timeout=1.0):
+        self.pacing = (line_delay, prompt, prompt_timeout)
+        self.engine.set_pacing(self.port_id, line_delay, prompt, prompt_timeout)
+
+    def set_framing(self, framing):
+        """Switches the port between text lines (None) and binary frames; raises ValueError if invalid."""
+        self.engine.set_framing(self.port_id, framing)
+        self.framing = framing
+
+    def tx_stats(self):
+        return self.engine.tx_stats(self.port_id)
+
+    def tx_pending(self):
+        return self.engine.tx_pending(self.port_id)
 
 
 class SerialSettingsDialog(QDialog):
@@ -190,17 +210,355 @@ class SerialSettingsDialog(QDialog):
         baudrate = int(self.baudrate_input.currentText())
         return port, baudrate
 
+class TxPacingDialog(QDialog):
+    def __init__(self, pacing, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("TX Pacing")
+        line_delay, prompt, prompt_timeout = pacing
+
+        # Form layout for pacing settings
+        self.layout = QFormLayout()
+
+        # 명령 사이 간격 (0 = 장치가 받는 대로 바로)
+        self.delay_input = QSpinBox()
+        self.delay_input.setRange(0, 60000)
+        self.delay_input.setSuffix(" ms")
+        self.delay_input.setValue(int(line_delay * 1000))
+        self.layout.addRow("Delay between commands:", self.delay_input)
+
+        # 이 문자열을 받은 뒤에 다음 명령을 보낸다
+        self.prompt_input = QLineEdit(prompt or "")
+        self.prompt_input.setPlaceholderText("e.g. '> ' (empty = don't wait)")
+        self.layout.addRow("Wait for prompt:", self.prompt_input)
+
+        self.timeout_input = QSpinBox()
+        self.timeout_input.setRange(1, 600000)
+        self.timeout_input.setSuffix(" ms")
+        self.timeout_input.setValue(int(prompt_timeout * 1000))
+        self.layout.addRow("Prompt timeout:", self.timeout_input)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+
+    def get_settings(self):
+        """Returns ``(line_delay, prompt, prompt_timeout)`` for SerialThread.set_pacing."""
+        return (self.delay_input.value() / 1000, self.prompt_input.text() or None,
+                self.timeout_input.value() / 1000)
+
+class FramingDialog(QDialog):
+    modes = [("Text lines", None), ("Binary: delimiter", "delimiter"), ("Binary: fixed length", "fixed"),
+             ("Binary: length prefix", "length"), ("Binary: SLIP", "slip"), ("Binary: COBS", "cobs")]
+    displays = [("Hex + ASCII", "hex"), ("Text, replace bad bytes", "replace"),
+                ("Text, escape bad bytes", "backslashreplace"), ("Text, skip bad bytes", "ignore")]
+
+    def __init__(self, framing, raw_display, encoding, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("RX Framing")
+        framing = framing or {}
+
+        # Form layout for framing settings
+        self.layout = QFormLayout()
+
+        self.mode_input = QComboBox()
+        self.mode_input.addItems([title for title, _ in self.modes])
+        self.mode_input.setCurrentIndex([mode for _, mode in self.modes].index(framing.get("mode")))
+        self.layout.addRow("Split input into:", self.mode_input)
+
+        # 구분자는 hex로 입력한다 (예: 0d0a)
+        self.delimiter_input = QLineEdit(framing.get("delimiter", b"\n").hex())
+        self.layout.addRow("Delimiter (hex):", self.delimiter_input)
+
+        self.length_input = QSpinBox()
+        self.length_input.setRange(1, 65536)
+        self.length_input.setSuffix(" bytes")
+        self.length_input.setValue(framing.get("length", 16))
+        self.layout.addRow("Frame length:", self.length_input)
+
+        self.prefix_input = QComboBox()
+        self.prefix_input.addItems(["1", "2", "4"])
+        self.prefix_input.setCurrentText(str(framing.get("prefix_size", 1)))
+        self.byteorder_input = QComboBox()
+        self.byteorder_input.addItems(["big", "little"])
+        self.byteorder_input.setCurrentText(framing.get("byteorder", "big"))
+        prefix_layout = QHBoxLayout()
+        prefix_layout.addWidget(self.prefix_input)
+        prefix_layout.addWidget(self.byteorder_input)
+        self.layout.addRow("Length prefix (bytes, endian):", prefix_layout)
+
+        # 프레임은 그대로 저장되고, 화면에 그릴 때만 변환된다
+        self.display_input = QComboBox()
+        self.display_input.addItems([title for title, _ in self.displays])
+        self.display_input.setCurrentIndex([display for _, display in self.displays].index(raw_display))
+        self.layout.addRow("Show frames as:", self.display_input)
+        self.encoding_input = QLineEdit(encoding)
+        self.layout.addRow("Text encoding:", self.encoding_input)
+
+        self.mode_input.currentIndexChanged.connect(self.update_enabled)
+        self.display_input.currentIndexChanged.connect(self.update_enabled)
+        self.update_enabled()
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+
+    def update_enabled(self):
+        mode = self.modes[self.mode_input.currentIndex()][1]
+        self.delimiter_input.setEnabled(mode == "delimiter")
+        self.length_input.setEnabled(mode == "fixed")
+        self.prefix_input.setEnabled(mode == "length")
+        self.byteorder_input.setEnabled(mode == "length")
+        self.display_input.setEnabled(mode is not None)
+        self.encoding_input.setEnabled(mode is not None and self.display_input.currentIndex() > 0)
+
+    def get_settings(self):
+        """Returns ``(framing, raw_display, encoding)``; raises ValueError for a bad delimiter or encoding."""
+        mode = self.modes[self.mode_input.currentIndex()][1]
+        framing = None
+        if mode is not None:
+            framing = {"mode": mode}
+            if mode == "delimiter":
+                framing["delimiter"] = bytes.fromhex(self.delimiter_input.text())
+            elif mode == "fixed":
+                framing["length"] = self.length_input.value()
+            elif mode == "length":
+                framing["prefix_size"] = int(self.prefix_input.currentText())
+                framing["byteorder"] = self.byteorder_input.currentText()
+            FrameSplitter(**framing)
+        encoding = self.encoding_input.text() or "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise ValueError(f"unknown encoding '{encoding}'") from None
+        return framing, self.displays[self.display_input.currentIndex()][1], encoding
+
+class CaptureSettingsDialog(QDialog):
+    def __init__(self, output_file, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Capture to File")
+
+        # Form layout for capture settings
+        self.layout = QFormLayout()
+
+        # Output file
+        self.file_input = QLineEdit(output_file)
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.browse)
+        file_layout = QHBoxLayout()
+        file_layout.addWidget(self.file_input)
+        file_layout.addWidget(self.browse_button)
+        self.layout.addRow("Output file:", file_layout)
+
+        # Rotation (0 = never)
+        self.max_mb_input = QSpinBox()
+        self.max_mb_input.setRange(0, 100000)
+        self.max_mb_input.setValue(64)
+        self.max_mb_input.setSuffix(" MB")
+        self.layout.addRow("Rotate at size (0 = off):", self.max_mb_input)
+
+        self.max_minutes_input = QSpinBox()
+        self.max_minutes_input.setRange(0, 100000)
+        self.max_minutes_input.setSuffix(" min")
+        self.layout.addRow("Rotate after (0 = off):", self.max_minutes_input)
+
+        # Compression of rotated segments
+        self.compress_input = QComboBox()
+        self.compress_input.addItems(["none", "gzip", "zstd"])
+        self.compress_input.setCurrentText("gzip")
+        self.layout.addRow("Compress rotated files:", self.compress_input)
+
+        # fsync policy
+        self.fsync_input = QComboBox()
+        self.fsync_input.addItems(["rotate", "batch", "never"])
+        self.layout.addRow("fsync:", self.fsync_input)
+
+        # 각 줄 앞에 수신 시각과 종류를 붙인다
+        self.timestamps_input = QCheckBox("Prefix lines with time and kind")
+        self.timestamps_input.setChecked(True)
+        self.layout.addRow(self.timestamps_input)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+
+    def browse(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Capture File", self.file_input.text(),
+                                                   "Text Files (*.txt);;All Files (*)")
+        if file_path:
+            self.file_input.setText(file_path)
+
+    def get_settings(self):
+        """Returns the keyword arguments for CaptureWriter."""
+        compress = self.compress_input.currentText()
+        return {
+            'path': self.file_input.text(),
+            'max_bytes': self.max_mb_input.value() * 1024 * 1024,
+            'max_seconds': self.max_minutes_input.value() * 60,
+            'compress': None if compress == "none" else compress,
+            'fsync': self.fsync_input.currentText(),
+            'timestamps': self.timestamps_input.isChecked(),
+        }
+
+class TriggerCaptureDialog(QDialog):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Capture on Trigger")
+
+        # Form layout for trigger settings
+        self.layout = QFormLayout()
+
+        # Incident files go to this directory
+        self.directory_input = QLineEdit(settings['directory'])
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.browse)
+        directory_layout = QHBoxLayout()
+        directory_layout.addWidget(self.directory_input)
+        directory_layout.addWidget(self.browse_button)
+        self.layout.addRow("Incident directory:", directory_layout)
+
+        # 수신한 줄이 이 정규식에 맞으면 트리거 (여러 개는 | 로)
+        self.pattern_input = QLineEdit(settings['patterns'][0] if settings['patterns'] else "")
+        self.pattern_input.setPlaceholderText("e.g. PANIC|assert|watchdog (empty = off)")
+        self.layout.addRow("Trigger on match:", self.pattern_input)
+
+        self.silence_input = QSpinBox()
+        self.silence_input.setRange(0, 86400)
+        self.silence_input.setSuffix(" s")
+        self.silence_input.setValue(int(settings['silence']))
+        self.layout.addRow("Trigger on silence (0 = off):", self.silence_input)
+
+        # 트리거 전에 메모리에 들고 있을 줄
+        self.pre_lines_input = QSpinBox()
+        self.pre_lines_input.setRange(1, 1000000)
+        self.pre_lines_input.setValue(settings['pre_lines'])
+        self.layout.addRow("Lines before trigger:", self.pre_lines_input)
+
+        self.pre_seconds_input = QSpinBox()
+        self.pre_seconds_input.setRange(0, 86400)
+        self.pre_seconds_input.setSuffix(" s")
+        self.pre_seconds_input.setValue(int(settings['pre_seconds']))
+        self.layout.addRow("No older than (0 = off):", self.pre_seconds_input)
+
+        self.post_lines_input = QSpinBox()
+        self.post_lines_input.setRange(0, 1000000)
+        self.post_lines_input.setValue(settings['post_lines'])
+        self.layout.addRow("Lines after trigger:", self.post_lines_input)
+
+        self.post_seconds_input = QSpinBox()
+        self.post_seconds_input.setRange(0, 86400)
+        self.post_seconds_input.setSuffix(" s")
+        self.post_seconds_input.setValue(int(settings['post_seconds']))
+        self.layout.addRow("At most (0 = off):", self.post_seconds_input)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+
+    def browse(self):
+        directory = QFileDialog.getExistingDirectory(self, "Incident Directory", self.directory_input.text())
+        if directory:
+            self.directory_input.setText(directory)
+
+    def get_settings(self):
+        """Returns the keyword arguments for TriggerCapture."""
+        pattern = self.pattern_input.text()
+        return {
+            'directory': self.directory_input.text() or ".",
+            'patterns': [pattern] if pattern else [],
+            'silence': self.silence_input.value(),
+            'pre_lines': self.pre_lines_input.value(),
+            'pre_seconds': self.pre_seconds_input.value(),
+            'post_lines': self.post_lines_input.value(),
+            'post_seconds': self.post_seconds_input.value(),
+        }
+
+class ShareDialog(QDialog):
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Share over TCP")
+
+        # Form layout for share settings
+        self.layout = QFormLayout()
+
+        # 기본은 이 컴퓨터에서만; 0.0.0.0이면 다른 컴퓨터에서도 붙는다
+        self.host_input = QLineEdit(settings['host'])
+        self.layout.addRow("Listen on address:", self.host_input)
+
+        self.port_input = QSpinBox()
+        self.port_input.setRange(1, 65535)
+        self.port_input.setValue(settings['port'])
+        self.layout.addRow("TCP port:", self.port_input)
+
+        # 새로 붙은 client에게 먼저 보내는 줄
+        self.replay_input = QSpinBox()
+        self.replay_input.setRange(0, 1000000)
+        self.replay_input.setValue(settings['replay'])
+        self.layout.addRow("Replay lines on connect:", self.replay_input)
+
+        self.queue_input = QSpinBox()
+        self.queue_input.setRange(16, 1 << 20)
+        self.queue_input.setSuffix(" KB")
+        self.queue_input.setValue(settings['max_queue'] // 1024)
+        self.layout.addRow("Queue per client:", self.queue_input)
+
+        self.slow_input = QComboBox()
+        self.slow_input.addItem("Skip lines", "skip")
+        self.slow_input.addItem("Disconnect", "drop")
+        self.slow_input.setCurrentIndex(self.slow_input.findData(settings['on_slow']))
+        self.layout.addRow("When a client falls behind:", self.slow_input)
+
+        self.tx_input = QCheckBox("Send lines from clients to the port")
+        self.tx_input.setChecked(settings['allow_tx'])
+        self.layout.addRow(self.tx_input)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+
+    def get_settings(self):
+        """Returns keyword arguments for ShareServer."""
+        return {
+            'host': self.host_input.text() or "127.0.0.1",
+            'port': self.port_input.value(),
+            'replay': self.replay_input.value(),
+            'max_queue': self.queue_input.value() * 1024,
+            'on_slow': self.slow_input.currentData(),
+            'allow_tx': self.tx_input.isChecked(),
+        }
+
+
 class SendHistoryDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, history, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Send Data History")
         self.layout = QVBoxLayout()
         # QListWidget 추가
         self.list_widget = QListWidget(self)
+        self.list_widget.setUniformItemSizes(True)
         self.layout.addWidget(self.list_widget)
 
-        # 파일에서 항목 읽어오기
-        self.load_history_from_file(".send_data_history.txt")
+        # 최근에 보낸 것부터
+        self.list_widget.addItems(history.recent())
 
         self.list_widget.itemDoubleClicked.connect(self.on_item_double_click)
 
@@ -209,90 +567,1257 @@ class SendHistoryDialog(QDialog):
     def on_item_double_click(self, item):
         """리스트 항목을 더블 클릭하면 해당 데이터를 시리얼로 전송"""
         data = item.text()  # 더블 클릭한 항목의 텍스트
-        print(f"Sending data: {data}")
-        
         if data:
-            window.serial_thread.send_data(data)
-            window.update_log(f"Sent: {data}")
-            window.data_input.clear()
-
-            # Add the data to the send_data_history
-            if data not in window.send_data_history:
-                #self.send_data_history.append(data)
-                window.send_data_history.insert(0, data)
-                # Update the completer's model to include the new data
-                completer = window.data_input.completer()
-                completer.model().setStringList(self.window.send_data_history)
-            else:
-                window.send_data_history.remove(data)
-                window.send_data_history.insert(0, data)
-            # Save the updated send_data_history to the file
+            self.parent().send_line(data)
 
-            window.save_send_data_history()
-            window.send_data_history_dialog.load_history_from_file(window.data_file)
+    def command_used(self, command, capacity):
+        """Moves ``command`` to the top, dropping the oldest entry beyond ``capacity``."""
+        found = self.list_widget.findItems(command, Qt.MatchExactly)
+        if found:
+            self.list_widget.takeItem(self.list_widget.row(found[0]))
+        self.list_widget.insertItem(0, command)
+        while self.list_widget.count() > capacity:
+            self.list_widget.takeItem(self.list_widget.count() - 1)
+
+
+class HighlightRulesDialog(QDialog):
+    columns = ["Pattern (regex)", "Color", "Bold", "Ignore case"]
+
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Highlight Rules")
+        self.layout = QVBoxLayout()
+
+        # 규칙 하나에 한 줄; 위에 있는 규칙이 같은 위치에서 먼저 맞는다
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.cellDoubleClicked.connect(self.choose_color)
+        for rule in rules:
+            self.add_rule(*rule)
+        self.layout.addWidget(self.table)
+
+        add_button = QPushButton("Add")
+        add_button.clicked.connect(lambda: self.add_rule("", "#ffff55", False, True))
+        remove_button = QPushButton("Remove")
+        remove_button.clicked.connect(lambda: self.table.removeRow(self.table.currentRow()))
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        self.layout.addLayout(button_layout)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+        self.resize(600, 300)
+
+    def add_rule(self, pattern, color, bold, ignore_case):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(pattern))
+        color_item = QTableWidgetItem(color)
+        color_item.setFlags(color_item.flags() & ~Qt.ItemIsEditable)
+        color_item.setBackground(QColor(color))
+        self.table.setItem(row, 1, color_item)
+        for column, checked in ((2, bold), (3, ignore_case)):
+            item = QTableWidgetItem()
+            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+            self.table.setItem(row, column, item)
+
+    def choose_color(self, row, column):
+        if column != 1:
+            return
+        item = self.table.item(row, 1)
+        color = QColorDialog.getColor(QColor(item.text()), self, "Highlight Color")
+        if color.isValid():
+            item.setText(color.name())
+            item.setBackground(color)
+
+    def get_rules(self):
+        """Returns the rules as ``(pattern, color, bold, ignore_case)``, skipping empty patterns."""
+        rules = []
+        for row in range(self.table.rowCount()):
+            pattern = self.table.item(row, 0).text()
+            if pattern:
+                rules.append((pattern, self.table.item(row, 1).text(),
+                              self.table.item(row, 2).checkState() == Qt.Checked,
+                              self.table.item(row, 3).checkState() == Qt.Checked))
+        return rules
+
+
+class FieldRulesDialog(QDialog):
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Field Extraction")
+        self.layout = QVBoxLayout()
+        self.layout.addWidget(QLabel("Named groups become fields; groups named 'key' and 'value' make a field of every pair."))
+
+        self.table = QTableWidget(0, 1)
+        self.table.setHorizontalHeaderLabels(["Pattern (regex)"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for pattern in rules:
+            self.add_rule(pattern)
+        self.layout.addWidget(self.table)
+
+        add_button = QPushButton("Add")
+        add_button.clicked.connect(lambda: self.add_rule(""))
+        key_value_button = QPushButton("Add key=value")
+        key_value_button.clicked.connect(lambda: self.add_rule(FieldExtractor.KEY_VALUE))
+        remove_button = QPushButton("Remove")
+        remove_button.clicked.connect(lambda: self.table.removeRow(self.table.currentRow()))
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(key_value_button)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        self.layout.addLayout(button_layout)
+
+        # Dialog buttons (OK and Cancel)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+
+        self.setLayout(self.layout)
+        self.resize(600, 250)
+
+    def add_rule(self, pattern):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(pattern))
+
+    def get_rules(self):
+        """Returns the patterns, skipping empty ones."""
+        return [self.table.item(row, 0).text() for row in range(self.table.rowCount())
+                if self.table.item(row, 0).text()]
+
+
+class SendHistoryModel(QAbstractListModel):
+    """Completion model over a SendHistory: best ranked commands first.
+
+    A send moves (or adds) one row instead of resetting the model, so the
+    completer keeps up with rapid-fire sends.
+    """
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self._rows = list(history.ranked)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole) and index.isValid():
+            return self._rows[index.row()]
+        return None
+
+    def use(self, command):
+        """Records a send of ``command`` in the history and updates the affected rows."""
+        old_row, evicted_row, new_row = self.history.use(command)
+        if old_row == new_row and evicted_row is None:
+            return  # 순위가 그대로다
+        for row in (old_row, evicted_row):
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), new_row, new_row)
+        self._rows.insert(new_row, command)
+        self.endInsertRows()
+
+    def reload(self):
+        """Shows the history again from scratch, e.g. after it was loaded."""
+        self.beginResetModel()
+        self._rows = list(self.history.ranked)
+        self.endResetModel()
 
-    def load_history_from_file(self, file_name):
-        """파일에서 항목을 읽어와서 QListWidget에 새로 추가 (최근 데이터 맨 위로)"""
-        try:
-            # 기존 항목 모두 삭제
-            self.list_widget.clear()
-            
-            with open(file_name, 'r') as file:
-                lines = file.readlines()
-                
-                # 파일에서 읽은 각 줄을 리스트 항목으로 맨 위에 추가
-                for line in reversed(lines):  # 최신 항목을 위로
-                    self.list_widget.insertItem(0, line.strip())  # 0번 인덱스에 추가
-        except FileNotFoundError:
-            print(f"Error: The file '{file_name}' was not found.")
-        except Exception as e:
-            print(f"Error: {e}")
 
 class SearchDialog(QDialog):
+    page_size = 200  # 한 번에 보여줄 검색 결과 수
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Search Log")
         self.setModal(False)  # 모달리스 다이얼로그로 설정
         self.layout = QVBoxLayout()
+        self._results = None
+        self._shown = 0
 
         # 검색어 입력 필드
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Enter keyword to filter...")
         self.layout.addWidget(self.search_input)
 
-        # 검색 결과를 표시할 QTextBrowser
-        self.filtered_log = QTextBrowser()
-        self.filtered_log.setOpenLinks(False)  # 링크 클릭 이벤트를 직접 처리
-        self.filtered_log.anchorClicked.connect(self.on_filtered_log_clicked)
+        # 지난 캡처 파일 검색: 폴더를 고르고 Enter를 누르면 시작한다
+        self.archive_check = QCheckBox("Search archives in")
+        self.archive_input = QLineEdit(getattr(parent, "archive_directory", ""))
+        self.archive_input.setPlaceholderText("Directory of capture files (.txt, .log, .gz, .zst)")
+        self.archive_browse = QPushButton("Browse...")
+        self.archive_browse.clicked.connect(self.choose_archive_directory)
+        self.archive_check.toggled.connect(self.set_archive_mode)
+        self.search_input.returnPressed.connect(self.start_archive_search)
+        archive_layout = QHBoxLayout()
+        archive_layout.addWidget(self.archive_check)
+        archive_layout.addWidget(self.archive_input, 1)
+        archive_layout.addWidget(self.archive_browse)
+        self.layout.addLayout(archive_layout)
+
+        # 검색 결과 수
+        self.result_label = QLabel()
+        self.layout.addWidget(self.result_label)
+
+        # 검색 결과를 표시할 QListWidget (클릭하면 해당 줄로 이동)
+        self.filtered_log = QListWidget()
+        self.filtered_log.setUniformItemSizes(True)
+        self.filtered_log.itemClicked.connect(self.on_filtered_log_clicked)
+        self.filtered_log.verticalScrollBar().valueChanged.connect(self.on_results_scrolled)
         self.layout.addWidget(self.filtered_log)
 
-        # 닫기 버튼
+        # 결과 더 보기 / 닫기 버튼
+        self.more_button = QPushButton("Load more")
+        self.more_button.clicked.connect(self.load_more)
         self.close_button = QPushButton("Close")
         self.close_button.clicked.connect(self.close)
-        self.layout.addWidget(self.close_button)
+        self.button_layout = QHBoxLayout()
+        self.button_layout.addWidget(self.more_button)
+        self.button_layout.addWidget(self.close_button)
+        self.layout.addLayout(self.button_layout)
 
         self.setLayout(self.layout)
 
-    def on_filtered_log_clicked(self, link):
+    def on_filtered_log_clicked(self, item):
         """Handle clicks on filtered log items."""
-        line_number = int(link.toString())  # Get the line number from the link
+        line_number = item.data(Qt.UserRole)  # Get the line id stored with the item
+        if isinstance(line_number, tuple):  # 아카이브 검색 결과: (파일, 줄)
+            self.parent().open_archive_hit(*line_number)
+            return
         self.parent().move_to_line(line_number)  # 부모 창의 메서드를 호출하여 커서 이동
 
-    def update_filtered_log(self, filtered_data):
-        """Update the filtered log display."""
-        self.filtered_log.setHtml("<br>".join(filtered_data))
+    def is_archive_mode(self):
+        return self.archive_check.isChecked()
+
+    def set_archive_mode(self, enabled):
+        self.filtered_log.clear()
+        self._results = None
+        self._shown = 0
+        self.more_button.setEnabled(False)
+        self.result_label.setText("Press Enter to search the archives." if enabled else "")
+        if not enabled:
+            self.parent().cancel_archive_search()
+            self.parent().filter_log()
+
+    def choose_archive_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Archive Directory", self.archive_input.text())
+        if directory:
+            self.archive_input.setText(directory)
+            self.archive_check.setChecked(True)
+
+    def start_archive_search(self):
+        keyword, directory = self.search_input.text(), self.archive_input.text()
+        if not self.is_archive_mode() or not keyword or not directory:
+            return
+        self.filtered_log.clear()
+        self._shown = 0
+        self.result_label.setText("Searching archives...")
+        self.parent().search_archives(directory, keyword)
+
+    def add_archive_hits(self, hits):
+        """Appends ``(path, line_id, time, text)`` hits as they stream in from the archive search."""
+        directory = self.archive_input.text()
+        for path, line_id, stamp, text in hits:
+            # 줄 번호는 1부터 보여준다
+            item = QListWidgetItem(f"{os.path.relpath(path, directory)}:{line_id + 1}  {text}")
+            item.setToolTip(stamp)
+            item.setData(Qt.UserRole, (path, line_id))
+            self.filtered_log.addItem(item)
+        self._shown += len(hits)
+        self.result_label.setText(f"{self._shown} hits, searching archives...")
+
+    def archive_search_finished(self, hits, files, seconds, errors):
+        text = f"{hits} hits in {files} files ({seconds:.1f} s)"
+        if errors:
+            text += f"; {len(errors)} files could not be read: " + ", ".join(
+                f"{os.path.basename(path)} ({error})" for path, error in errors[:3])
+        self.result_label.setText(text)
+
+    def closeEvent(self, event):
+        self.parent().cancel_archive_search()
+        super().closeEvent(event)
+
+    def update_filtered_log(self, results):
+        """Shows the first page of ``results``, an iterator of ``(line_id, text)``, or nothing if None."""
+        self.filtered_log.clear()
+        self._results = results
+        self._shown = 0
+        self.load_more()
+
+    def load_more(self):
+        """Pulls the next page of hits from the result iterator."""
+        page = list(islice(self._results, self.page_size)) if self._results is not None else []
+        for line_id, text in page:
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, line_id)
+            self.filtered_log.addItem(item)
+        self._shown += len(page)
+        if len(page) < self.page_size:
+            self._results = None  # 결과를 모두 가져왔다
+        self.more_button.setEnabled(self._results is not None)
+        more = "+" if self._results is not None else ""
+        self.result_label.setText(f"{self._shown}{more} hits")
+
+    def on_results_scrolled(self, value):
+        if self._results is not None and value == self.filtered_log.verticalScrollBar().maximum():
+            self.load_more()
+
+
+class RenderScheduler(QObject):
+    """Coalesces incoming lines and hands them to the GUI at a capped frame rate.
+
+    submit() may be called from any thread; it only appends to a pending list under
+    a lock. A single-shot QTimer on the GUI thread drains up to ``max_lines_per_frame``
+    pending lines per frame and passes them to ``sink`` in one call. When a frame
+    takes longer than the frame interval, the next one is pushed back by as much, so
+    input events still get through. Lines wait in the queue meanwhile: under
+    overload rendering is dropped, data never is.
+    """
+    pending_changed = Signal(int)
+    _wakeup = Signal()
+
+    def __init__(self, sink, fps=30, max_lines_per_frame=50000, parent=None):
+        super().__init__(parent)
+        self.sink = sink
+        self.max_lines_per_frame = max_lines_per_frame
+        self._lock = threading.Lock()
+        self._pending = []
+        self._next_frame = 0.0
+        self.set_frame_rate(fps)
+        # Extra 탭의 통계용 (GUI 스레드에서만 바뀐다)
+        self.frames = 0
+        self.lines_rendered = 0
+        self.frame_time = 0.0
+        self.max_frame_time = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._drain)
+        self._wakeup.connect(self._schedule, Qt.QueuedConnection)
+
+    def set_frame_rate(self, fps):
+        self.fps = fps
+        self.interval = 1.0 / fps
+
+    def submit(self, lines):
+        """Queues ``lines`` for the next frame. Thread-safe."""
+        with self._lock:
+            was_idle = not self._pending
+            self._pending.extend(lines)
+        if was_idle:
+            self._wakeup.emit()  # 큐가 비어 있을 때만 GUI 스레드를 깨운다
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _schedule(self):
+        if not self.timer.isActive():
+            delay = max(0.0, self._next_frame - time.monotonic())
+            self.timer.start(int(delay * 1000))
+
+    def _drain(self):
+        with self._lock:
+            lines = self._pending[:self.max_lines_per_frame]
+            del self._pending[:self.max_lines_per_frame]
+
+        start = time.monotonic()
+        if lines:
+            self.sink(lines)
+        cost = time.monotonic() - start
+        self.frames += 1
+        self.lines_rendered += len(lines)
+        self.frame_time = cost
+        self.max_frame_time = max(self.max_frame_time, cost)
+        # 한 프레임이 간격보다 오래 걸리면 그만큼 쉬어서 입력 이벤트가 처리될 틈을 준다
+        delay = max(self.interval, cost)
+        self._next_frame = start + delay
+
+        remaining = self.pending_count()
+        self.pending_changed.emit(remaining)
+        if remaining:
+            self.timer.start(int(delay * 1000))
+
+
+# LogListModel.data()가 줄의 하이라이트 스타일 id를 돌려주는 role
+STYLE_ROLE = Qt.UserRole + 1
+
+# hex 덤프의 ASCII 칸: 출력 가능한 문자 외에는 '.'
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7f else 0x2e for b in range(256))
+
+
+class LogListModel(QAbstractListModel):
+    """List model over a LogStore.
+
+    The view only asks for the rows it paints, so the cost of showing the log does
+    not depend on how many lines are stored. Without a filter every stored line is a
+    row; with a filter the rows are the matching line ids, in ascending order.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._first_id = store.first_id
+        self._next_id = store.next_id
+        self._ids = None  # 필터가 걸려 있을 때 보여줄 줄 id 목록
+        self.show_timestamps = False
+        self.show_deltas = False
+        self.port_labels = None  # 여러 포트를 합친 로그에서 줄 앞에 붙일 포트 이름
+        # 바이너리 프레임(KIND_RAW)을 보여주는 방식: "hex" 또는 이 인코딩의 디코드 오류 처리 방식
+        self.raw_display = "hex"
+        self.encoding = "utf-8"
+        # 스타일 id가 없는 소스(열어 본 로그 파일)는 그릴 때 이 규칙으로 분류한다
+        self.highlight_rules = None
+
+    def style(self, line_id):
+        """Returns the highlight style id of ``line_id``: cached at ingest for a LogStore."""
+        style = getattr(self.store, "style", None)
+        if style is not None:
+            return style(line_id)
+        if self.highlight_rules is not None:
+            return self.highlight_rules.classify(self.store.kind(line_id), self.store.line(line_id))
+        return 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._ids is None:
+            return self._next_id - self._first_id
+        return len(self._ids)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == STYLE_ROLE and index.isValid():
+            try:
+                return self.style(self.line_id(index.row()))
+            except IndexError:
+                return 0
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row()
+        try:
+            line_id = self.line_id(row)
+            if self.store.kind(line_id) == KIND_RAW:
+                text = self.format_frame(self.store.data(line_id))  # 보이는 줄만 여기서 변환한다
+            else:
+                text = self.store.line(line_id)
+            if self.port_labels is not None:
+                text = f"[{self.port_labels.get(self.store.port(line_id), '?')}] {text}"
+            if not (self.show_timestamps or self.show_deltas):
+                return text
+            timestamp = self.store.timestamp(line_id)
+        except IndexError:
+            return None
+        if timestamp is None:
+            return text
+        prefix = []
+        if self.show_timestamps:
+            prefix.append(format_timestamp(timestamp)[11:])  # 날짜는 빼고 시각만
+        if self.show_deltas:
+            # 화면에서 바로 위 줄과의 시간 차이
+            try:
+                previous = self.store.timestamp(self.line_id(row - 1)) if row else timestamp
+            except IndexError:
+                previous = timestamp
+            prefix.append(f"+{(timestamp - previous) * 1000:10.3f} ms")
+        return f"{' '.join(prefix)}  {text}"
+
+    def format_frame(self, data, limit=4096):
+        """Renders a binary frame as hex + ASCII, or decoded with the chosen error policy."""
+        more = f" ... ({len(data)} bytes)" if len(data) > limit else ""
+        data = data[:limit]
+        if self.raw_display == "hex":
+            return f"{data.hex(' ')}  |{data.translate(_PRINTABLE).decode('ascii')}|{more}"
+        return data.decode(self.encoding, self.raw_display) + more
+
+    def set_raw_display(self, raw_display, encoding="utf-8"):
+        self.raw_display, self.encoding = raw_display, encoding
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1))
+
+    def set_time_columns(self, timestamps, deltas):
+        """Turns the receive-time and inter-line delta prefixes on or off."""
+        self.show_timestamps, self.show_deltas = timestamps, deltas
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1))
+
+    def line_id(self, row):
+        """Returns the absolute line id shown in ``row``."""
+        if self._ids is None:
+            return self._first_id + row
+        return self._ids[row]
+
+    def row_for_line(self, line_id):
+        """Returns the row showing ``line_id``, or None if it is not shown."""
+        if self._ids is None:
+            if self._first_id <= line_id < self._next_id:
+                return line_id - self._first_id
+            return None
+        row = bisect_left(self._ids, line_id)
+        if row < len(self._ids) and self._ids[row] == line_id:
+            return row
+        return None
+
+    def is_filtered(self):
+        return self._ids is not None
+
+    def filtered_ids(self):
+        """Returns a copy of the line ids shown while a filter is active."""
+        return array('Q', self._ids or ())
+
+    def set_filter(self, line_ids):
+        """Shows only ``line_ids`` (ascending), or every line if ``line_ids`` is None."""
+        self.beginResetModel()
+        self._ids = None if line_ids is None else array('Q', line_ids)
+        self._first_id = self.store.first_id
+        self._next_id = self.store.next_id
+        self.endResetModel()
+
+    def sync(self):
+        """Tells the view about lines appended to or evicted from the store since the last call."""
+        first_id, next_id = self.store.first_id, self.store.next_id
+        if self._ids is not None:
+            gone = bisect_left(self._ids, first_id)
+            if gone:
+                self.beginRemoveRows(QModelIndex(), 0, gone - 1)
+                del self._ids[:gone]
+                self.endRemoveRows()
+            self._first_id, self._next_id = first_id, next_id
+            return
+
+        gone = min(first_id, self._next_id) - self._first_id
+        if gone > 0:
+            self.beginRemoveRows(QModelIndex(), 0, gone - 1)
+            self._first_id += gone
+            self.endRemoveRows()
+        if first_id > self._next_id:
+            self._first_id = self._next_id = first_id
+        added = next_id - self._next_id
+        if added > 0:
+            rows = self.rowCount()
+            self.beginInsertRows(QModelIndex(), rows, rows + added - 1)
+            self._next_id = next_id
+            self.endInsertRows()
+
+    def append_ids(self, line_ids):
+        """Adds newly matched line ids to the end of a filtered view."""
+        if self._ids is None or not line_ids:
+            return
+        rows = len(self._ids)
+        self.beginInsertRows(QModelIndex(), rows, rows + len(line_ids) - 1)
+        self._ids.extend(line_ids)
+        self.endInsertRows()
+
+    def iter_ids(self):
+        """Yields the line id of every row, top to bottom."""
+        if self._ids is None:
+            yield from range(max(self._first_id, self.store.first_id), self._next_id)
+        else:
+            yield from list(self._ids)
+
+    def iter_text(self):
+        """Yields the text of every row, top to bottom."""
+        if self._ids is None:
+            for _, text in self.store.iter_lines(self._first_id, self._next_id):
+                yield text
+        else:
+            for line_id in list(self._ids):
+                try:
+                    yield self.store.line(line_id)
+                except IndexError:
+                    continue
+
+
+_REGEX_SPECIAL = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+class LogFilter(QObject):
+    """Regex filter for a LogListModel that avoids rescanning the whole log.
+
+    - Keystrokes are debounced; the pattern is applied once typing pauses.
+    - A literal pattern that extends the previous literal pattern only rechecks the
+      previous matches.
+    - Large scans run in a worker thread in cancellable chunks, and matches show up
+      in the view as each chunk finishes.
+    - While a filter is active, new lines are checked as they arrive.
+
+    Besides the pattern, lines can be restricted to a set of record kinds.
+    """
+    matches_found = Signal(int, list)
+    scan_finished = Signal(int)
+    status_changed = Signal(str)
+
+    def __init__(self, store, model, debounce_ms=150, chunk_lines=20000, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.model = model
+        self.chunk_lines = chunk_lines
+        self.keyword = ""
+        self.pattern = None
+        self.kinds = None  # 보여줄 레코드 종류 (None이면 전부)
+        self._active = False
+        self._text = ""
+        self._generation = 0
+        self._cancel = threading.Event()
+        self._scanning = False
+        self._complete = False  # 현재 필터 결과가 전체 로그를 다 훑은 결과인지
+        self._deferred_ids = []  # 스캔 중에 새로 들어온 줄 중 일치하는 것
+        self._started = 0.0
+        self.last_scan_time = 0.0  # 마지막으로 끝난 필터링에 걸린 시간 (초)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self._apply)
+        self.matches_found.connect(self._on_matches_found, Qt.QueuedConnection)
+        self.scan_finished.connect(self._on_scan_finished, Qt.QueuedConnection)
+
+    def set_text(self, text):
+        """Schedules filtering by ``text`` once the user stops typing."""
+        self._text = text
+        self.debounce_timer.start()
+
+    @staticmethod
+    def _is_literal(keyword):
+        # re.escape()는 공백 같은 문자도 escape하므로 그것과 비교하지 않고 메타 문자를 직접 찾는다
+        return _REGEX_SPECIAL.search(keyword) is None
+
+    def _apply(self):
+        keyword = self._text
+        if keyword == self.keyword:
+            return
+        self._started = time.monotonic()
+        self._cancel.set()
+        self._generation += 1
+        self._scanning = False
+        self._deferred_ids = []
+
+        if not keyword and self.kinds is None:  # No keyword entered, display all logs
+            self.keyword, self.pattern, self._active = "", None, False
+            self.model.set_filter(None)
+            self.status_changed.emit("")
+            return
+        try:
+            # Compile the regex pattern (with case insensitivity by default)
+            pattern = re.compile(keyword, re.IGNORECASE) if keyword else None
+        except re.error:  # Catch invalid regex patterns
+            self.status_changed.emit("Invalid regex pattern.")
+            return
+
+        # 이전 패턴을 그대로 포함하는 문자열이면 이전 결과 안에서만 다시 찾으면 된다
+        refine = (self._complete and self.pattern is not None and pattern is not None
+                  and self._is_literal(self.keyword) and self._is_literal(keyword)
+                  and self.keyword.lower() in keyword.lower())
+        candidates = self.model.filtered_ids() if refine else None
+        self.keyword, self.pattern, self._active = keyword, pattern, True
+        self._complete = False
+
+        if candidates is not None and len(candidates) <= self.chunk_lines:
+            self.model.set_filter(
+                line_id for line_id, line in self.store.iter_ids(candidates) if pattern.search(line)
+            )
+            self._complete = True
+            self.last_scan_time = time.monotonic() - self._started
+            self.status_changed.emit("")
+            return
+
+        self.model.set_filter([])
+        self._cancel = threading.Event()
+        self._scanning = True
+        self.status_changed.emit("Filtering...")
+        worker = threading.Thread(
+            target=self._scan,
+            args=(self._generation, pattern, self.kinds, candidates, self.store.next_id, self._cancel),
+            daemon=True,
+        )
+        worker.start()
+
+    def _scan(self, generation, pattern, kinds, candidates, end_id, cancel):
+        """Worker thread: reports matching line ids one chunk at a time."""
+        if candidates is None:
+            chunks = (
+                (line_id for line_id, _ in self.store.find_lines(pattern, start, start + self.chunk_lines, kinds))
+                for start in range(self.store.first_id, end_id, self.chunk_lines)
+            )
+        else:
+            chunks = (
+                (line_id for line_id, line in self.store.iter_ids(candidates[start:start + self.chunk_lines])
+                 if pattern.search(line))
+                for start in range(0, len(candidates), self.chunk_lines)
+            )
+        for chunk in chunks:
+            if cancel.is_set():
+                return
+            matches = list(chunk)
+            if matches:
+                self.matches_found.emit(generation, matches)
+        if not cancel.is_set():
+            self.scan_finished.emit(generation)
+
+    def _on_matches_found(self, generation, line_ids):
+        if generation != self._generation:
+            return  # 이미 바뀐 패턴의 결과
+        self.model.append_ids(line_ids)
+        self.model.sync()
+
+    def _on_scan_finished(self, generation):
+        if generation != self._generation:
+            return
+        self._scanning = False
+        self._complete = True
+        self.last_scan_time = time.monotonic() - self._started
+        self.model.append_ids(self._deferred_ids)
+        self.model.sync()
+        self._deferred_ids = []
+        self.status_changed.emit("")
+
+    def cancel(self):
+        """Stops a running scan and ignores any results still in flight."""
+        self.debounce_timer.stop()
+        self._cancel.set()
+        self._generation += 1
+        self._scanning = False
+
+    def set_kinds(self, kinds):
+        """Shows only records whose kind is in ``kinds`` (None for all) and refilters."""
+        self.kinds = kinds
+        self.refresh()
+
+    def refresh(self):
+        """Applies the current text again, e.g. after more of the source became available."""
+        self.keyword = None
+        self._complete = False
+        self._apply()
+
+    def lines_added(self, first_id, lines):
+        """Checks records just appended to the store (ids from ``first_id``) against the filter."""
+        if not self._active:
+            return
+        search, kinds = self.pattern.search if self.pattern is not None else None, self.kinds
+        matches = [
+            first_id + i for i, (_, kind, _, text) in enumerate(lines)
+            if (kinds is None or kind in kinds) and (search is None or search(record_text(kind, text)))
+        ]
+        if self._scanning:
+            # 스캔 결과보다 앞에 붙으면 순서가 깨지므로 스캔이 끝날 때까지 모아둔다
+            self._deferred_ids.extend(matches)
+        else:
+            self.model.append_ids(matches)
+
+
+class HighlightDelegate(QStyledItemDelegate):
+    """Paints log rows in the color and weight of their cached highlight style id.
+
+    The style id comes from the model (STYLE_ROLE); no regex runs at paint time
+    for the live log.
+    """
+
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.update_styles(rules)
+
+    def update_styles(self, rules):
+        """Rebuilds the per-style color and weight table from ``rules`` (a HighlightRules)."""
+        self._styles = [None] + [(QColor(color), bold) for _, color, bold, _ in rules.rules]
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        style = index.data(STYLE_ROLE)
+        if style:
+            color, bold = self._styles[style]
+            option.palette.setColor(QPalette.Text, color)
+            option.palette.setColor(QPalette.HighlightedText, color)
+            if bold:
+                option.font.setBold(True)
+
+
+class LogView(QTableView):
+    """Read-only log view that renders only the visible rows.
+
+    A single-column QTableView with fixed row heights: unlike QListView it does not
+    lay out every row again when rows are added, so following the tail stays cheap
+    however long the log is.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 2)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setStyleSheet("background-color: black; color: gray;")
+
+    def setModel(self, model):
+        old_model = self.model()
+        if old_model is not None:
+            old_model.rowsAboutToBeInserted.disconnect(self._check_tail)
+            old_model.rowsInserted.disconnect(self._follow_tail)
+            old_model.modelReset.disconnect(self.scrollToBottom)
+        super().setModel(model)
+        # 사용자가 맨 아래를 보고 있을 때만 새 줄을 따라간다
+        model.rowsAboutToBeInserted.connect(self._check_tail)
+        model.rowsInserted.connect(self._follow_tail)
+        model.modelReset.connect(self.scrollToBottom)
+        self._at_tail = True
+
+    def is_at_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum()
+
+    def _check_tail(self):
+        self._at_tail = self.is_at_bottom()
+
+    def _follow_tail(self):
+        if self._at_tail:
+            self.scrollToBottom()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            # 선택한 줄들을 클립보드로 복사
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QApplication.clipboard().setText("\n".join(self.model().data(self.model().index(row)) or "" for row in rows))
+        else:
+            super().keyPressEvent(event)
+
+class StatsPanel(QWidget):
+    """Live counters of the RX/TX path and the GUI, for the Extra tab.
+
+    Nothing is measured here: the engine (PortCounters), the RenderScheduler, the
+    filters and the search keep plain counters as they work, and a QTimer reads
+    them once per interval. While the tab is hidden and no export runs, the timer
+    does nothing. Each sample can also be appended to a CSV or JSON-lines file.
+    """
+    port_columns = ["Port", "RX bytes/s", "RX lines/s", "RX lines", "TX queue", "TX sent", "TX dropped", "Errors"]
+
+    def __init__(self, main_window, interval_ms=1000, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.writer = None
+        self._previous = {}  # port id -> 이전 PortCounters snapshot
+        self._last_sample = time.monotonic()
+        self._last_frames = 0
+
+        self.port_table = QTableWidget(0, len(self.port_columns))
+        self.port_table.setHorizontalHeaderLabels(self.port_columns)
+        self.port_table.verticalHeader().hide()
+        self.port_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.port_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.labels = {}
+        form = QFormLayout()
+        for key, title in [("render_pending", "Render backlog"), ("frames", "Frames"),
+                           ("store", "Log store"), ("filter", "Last filter"), ("search", "Last search")]:
+            self.labels[key] = QLabel("-")
+            form.addRow(title, self.labels[key])
+
+        self.interval_input = QSpinBox()
+        self.interval_input.setRange(100, 60000)
+        self.interval_input.setSingleStep(100)
+        self.interval_input.setSuffix(" ms")
+        self.interval_input.setValue(interval_ms)
+        self.interval_input.valueChanged.connect(lambda value: self.timer.setInterval(value))
+        self.export_button = QPushButton("Export...")
+        self.export_button.clicked.connect(self.toggle_export)
+        self.export_label = QLabel()
+        export_layout = QHBoxLayout()
+        export_layout.addWidget(QLabel("Sample every"))
+        export_layout.addWidget(self.interval_input)
+        export_layout.addWidget(self.export_button)
+        export_layout.addWidget(self.export_label, 1)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.port_table)
+        layout.addLayout(form)
+        layout.addLayout(export_layout)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.sample)
+        self.timer.start()
+
+    def toggle_export(self):
+        """Starts appending every sample to a file, or stops it."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.export_button.setText("Export...")
+            self.export_label.clear()
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Stats", "stats.csv",
+                                              "CSV Files (*.csv);;JSON Lines (*.jsonl);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.writer = StatsWriter(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Stats", f"Cannot open {path}: {e}")
+            return
+        self.export_button.setText("Stop Export")
+        self.export_label.setText(path)
+
+    def sample(self):
+        if self.writer is None and not self.isVisible():
+            return
+        window = self.main_window
+        now = time.monotonic()
+        seconds = max(now - self._last_sample, 1e-6)
+        self._last_sample = now
+
+        scheduler = window.render_scheduler
+        tabs = window.log_tabs()
+        store_lines = sum(len(tab.log_store) for tab in tabs)
+        store_bytes = sum(tab.log_store.nbytes() for tab in tabs)
+        current = window.current_tab()
+        gui = {
+            "render_pending": scheduler.pending_count(),
+            "frames_per_s": round((scheduler.frames - self._last_frames) / seconds, 1),
+            "frame_ms": round(scheduler.frame_time * 1000, 2),
+            "max_frame_ms": round(scheduler.max_frame_time * 1000, 2),
+            "store_lines": store_lines,
+            "store_mb": round(store_bytes / 1e6, 2),
+            "filter_ms": round(current.view_filter.last_scan_time * 1000, 2) if current is not None else 0,
+            "search_ms": round(window.last_search_time * 1000, 2),
+        }
+        self._last_frames = scheduler.frames
+
+        rows = []
+        for port_id, tab in window.sessions.items():
+            thread = tab.serial_thread
+            counters = thread.engine.counters(port_id)
+            previous = self._previous.get(port_id) or counters.snapshot()
+            port_sample, self._previous[port_id] = counters.sample(previous, seconds)
+            rows.append((port_label(thread.port), thread.tx_pending(), port_sample))
+
+        if self.isVisible():
+            self.show_sample(gui, rows)
+        if self.writer is not None:
+            wall = round(time.time(), 3)
+            for port, tx_queue, port_sample in rows:
+                self.writer.write({"time": wall, "port": port, "tx_queue": tx_queue, **port_sample, **gui})
+
+    def show_sample(self, gui, rows):
+        table = self.port_table
+        table.setRowCount(len(rows))
+        for row, (port, tx_queue, port_sample) in enumerate(rows):
+            values = [port, f"{port_sample['rx_bytes_per_s']:,.0f}", f"{port_sample['rx_lines_per_s']:,.0f}",
+                      f"{port_sample['rx_lines']:,}", str(tx_queue), f"{port_sample['tx_commands']:,}",
+                      str(port_sample['tx_dropped']), str(port_sample['errors'])]
+            for column, value in enumerate(values):
+                item = table.item(row, column)
+                if item is None:
+                    table.setItem(row, column, QTableWidgetItem(value))
+                else:
+                    item.setText(value)
+        self.labels["render_pending"].setText(f"{gui['render_pending']:,} lines")
+        self.labels["frames"].setText(f"{gui['frames_per_s']:g}/s, last {gui['frame_ms']:g} ms, "
+                                      f"max {gui['max_frame_ms']:g} ms")
+        self.labels["store"].setText(f"{gui['store_lines']:,} lines, {gui['store_mb']:g} MB")
+        self.labels["filter"].setText(f"{gui['filter_ms']:g} ms")
+        self.labels["search"].setText(f"{gui['search_ms']:g} ms")
+
+    def stop_export(self):
+        if self.writer is not None:
+            self.toggle_export()
+
+
+def port_label(port):
+    """Short name of a port for tab titles, e.g. "ttyUSB0" for "/dev/ttyUSB0"."""
+    return port.removeprefix("/dev/")
+
+
+class LogTab(QWidget):
+    """One log pane: a LogStore shown through a filtered LogView, with its filter bar.
+
+    A port tab owns the SerialThread of its port and has a send line; the merged tab
+    (``serial_thread`` None) shows the records of every port in receive-time order.
+    The pane can also show a capture file instead of its live log (File > Open Log).
+    """
+    search_index_built = Signal(int, object, int)
+    log_index_progress = Signal(object, float)
+
+    def __init__(self, main_window, max_lines, serial_thread=None, completer_model=None, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        self.serial_thread = serial_thread
+        self.port_id = serial_thread.port_id if serial_thread is not None else None
+
+        # Received lines, bounded by max_lines
+        self.log_store = LogStore(max_lines)
+        # Optional trigram index for the Ctrl+F search (View > Index Search)
+        self.search_index = None
+        self._search_index_generation = 0
+        self.search_index_built.connect(self._on_search_index_built, Qt.QueuedConnection)
+        self.log_index_progress.connect(self._on_log_index_progress, Qt.QueuedConnection)
+
+        # Create the virtualized view for log output
+        self.log_model = LogListModel(self.log_store, self)
+        self.log_output = LogView()
+        self.log_output.setModel(self.log_model)
+        self.highlight_delegate = HighlightDelegate(main_window.highlight_rules, self.log_output)
+        self.log_output.setItemDelegate(self.highlight_delegate)
+        self.log_filter = LogFilter(self.log_store, self.log_model, parent=self)
+        self.log_filter.status_changed.connect(main_window.statusBar().showMessage)
+        # 화면에 보이는 로그 (실시간 로그 또는 File > Open Log로 연 파일)
+        self.view_model, self.view_filter = self.log_model, self.log_filter
+        self.mapped_log = None
+        self._goto_line = None
+
+        # Create the keyword filter input field
+        self.keyword_input = QLineEdit()
+        self.keyword_input.setPlaceholderText("Enter keyword to filter...")
+        # Connect the keyword input to filter updates
+        self.keyword_input.textChanged.connect(lambda text: self.view_filter.set_text(text))
+
+        # 레코드 종류 필터 (수신/송신/오류/시스템)
+        self.kind_input = QComboBox()
+        self.kind_input.addItems(["All"] + [name.capitalize() for name in KIND_NAMES])
+        self.kind_input.currentIndexChanged.connect(lambda _: self.view_filter.set_kinds(self.selected_kinds()))
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.keyword_input)
+        filter_layout.addWidget(self.kind_input)
+
+        layout = QVBoxLayout()
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.log_output)
+
+        self.data_input = None
+        if serial_thread is not None:
+            # Create the QLineEdit for data input
+            completer = QCompleter(completer_model, self)
+            completer.setCaseSensitivity(Qt.CaseInsensitive)
+
+            self.data_input = QLineEdit()
+            self.data_input.setPlaceholderText("Enter data to send...")
+            self.data_input.setCompleter(completer)
+            self.data_input.returnPressed.connect(lambda: main_window.send_data(self))
+            layout.addWidget(self.data_input)
+
+        self.setLayout(layout)
+
+    def add_records(self, records):
+        """Appends a batch of ``(timestamp, kind, port, text)`` records to the log in one go."""
+        first_new_id = self.log_store.next_id
+        # 하이라이트는 들어올 때 한 번만 분류해서 줄마다 스타일 id로 저장한다
+        self.log_store.extend_records(records, self.main_window.highlight_rules.classify_records(records))
+        self.log_model.sync()
+        self.log_filter.lines_added(first_new_id, records)  # 필터가 걸려 있으면 일치하는 줄만 추가
+        if self.search_index is not None:
+            self.search_index.add_lines(first_new_id, [record_text(record[1], record[3]) for record in records])
+            self.search_index.trim(self.log_store.first_id)
+
+    def clear(self):
+        self.log_store.clear()  # 로그 클리어
+        self.log_model.sync()
+        if self.search_index is not None:
+            self.search_index.trim(self.log_store.first_id, force=True)
+
+    def set_max_lines(self, max_lines):
+        self.log_store.set_max_lines(max_lines)
+        self.log_model.sync()
+
+    def restyle(self):
+        """Reclassifies the stored lines after the highlight rules changed."""
+        rules = self.main_window.highlight_rules
+        self.log_store.restyle(rules.classify)
+        self.highlight_delegate.update_styles(rules)
+        self.log_output.viewport().update()
+
+    def selected_kinds(self):
+        """Returns the record kinds chosen in the filter bar, or None for all."""
+        index = self.kind_input.currentIndex()
+        return None if index == 0 else {index - 1}
+
+    def set_time_columns(self, timestamps, deltas):
+        for model in {self.log_model, self.view_model}:
+            model.set_time_columns(timestamps, deltas)
+
+    def search_log(self, keyword):
+        """Returns an iterator of ``(line_id, text)`` for lines containing ``keyword``, ignoring case.
+
+        Uses the trigram index when it is enabled and the keyword is long enough;
+        otherwise the store is scanned, lazily, as results are pulled.
+        """
+        source = self.view_model.store
+        if source is self.log_store and self.search_index is not None and len(keyword) >= 3:
+            return self.search_index.search(keyword, self.log_store)
+        return source.find_lines(re.compile(re.escape(keyword), re.IGNORECASE))
+
+    def set_search_indexing(self, enabled):
+        """Turns the Ctrl+F trigram index on or off; it is built in a background thread."""
+        self._search_index_generation += 1
+        self.search_index = None
+        if not enabled:
+            return
+        self.main_window.statusBar().showMessage("Building search index...")
+        generation, end_id = self._search_index_generation, self.log_store.next_id
+        threading.Thread(target=self._build_search_index, args=(generation, end_id), daemon=True).start()
+
+    def _build_search_index(self, generation, end_id):
+        index = TrigramIndex()
+        for line_id, line in self.log_store.iter_lines(end_id=end_id):
+            index.add(line_id, line)
+        self.search_index_built.emit(generation, index, end_id)
+
+    def _on_search_index_built(self, generation, index, end_id):
+        if generation != self._search_index_generation:
+            return  # 그 사이에 꺼졌거나 다시 켜졌다
+        # 인덱스를 만드는 동안 들어온 줄들을 마저 넣는다
+        for line_id, line in self.log_store.iter_lines(end_id):
+            index.add(line_id, line)
+        index.trim(self.log_store.first_id)
+        self.search_index = index
+        self.main_window.statusBar().showMessage("Search index ready.", 3000)
+
+    def show_log_file(self, mapped, line_id=None):
+        """Shows the capture file ``mapped`` instead of the live log and indexes it in the background.
+
+        With ``line_id`` the view moves to that line as soon as it is indexed.
+        """
+        self.close_log_file()
+        self.mapped_log = mapped
+        self._goto_line = line_id
+        model = LogListModel(mapped)
+        model.highlight_rules = self.main_window.highlight_rules
+        log_filter = LogFilter(mapped, model)
+        log_filter.status_changed.connect(self.main_window.statusBar().showMessage)
+        self.set_view_source(model, log_filter)
+        threading.Thread(
+            target=mapped.build_index,
+            args=(lambda fraction: self.log_index_progress.emit(mapped, fraction),),
+            daemon=True,
+        ).start()
+
+    def close_log_file(self):
+        """Returns the pane to the live log."""
+        if self.mapped_log is None:
+            return
+        self.mapped_log.close()
+        self.mapped_log = None
+        self.set_view_source(self.log_model, self.log_filter)
+
+    def set_view_source(self, model, log_filter):
+        """Shows ``model`` in the log view, filtered through ``log_filter``."""
+        if self.view_filter is not self.log_filter:
+            self.view_filter.cancel()  # 파일용 모델/필터는 참조가 없어지면 정리된다
+        self.view_model, self.view_filter = model, log_filter
+        self.log_output.setModel(model)
+        model.set_time_columns(self.log_model.show_timestamps, self.log_model.show_deltas)
+        log_filter.kinds = self.selected_kinds()
+        log_filter.set_text(self.keyword_input.text())
+
+    def _on_log_index_progress(self, mapped, fraction):
+        if mapped is not self.mapped_log:
+            return  # 이미 닫은 파일
+        self.view_model.sync()
+        if self._goto_line is not None and (self._goto_line < len(mapped) or fraction >= 1.0):
+            self.move_to_line(self._goto_line)
+            self._goto_line = None
+        status_bar = self.main_window.statusBar()
+        if fraction < 1.0:
+            status_bar.showMessage(f"Indexing {os.path.basename(mapped.path)}: {fraction:.0%}")
+        else:
+            status_bar.showMessage(f"{os.path.basename(mapped.path)}: {len(mapped)} lines", 5000)
+            if self.view_model.is_filtered():
+                self.view_filter.refresh()  # 인덱싱 중에 시작한 필터는 앞부분만 훑었다
+
+    def move_to_line(self, line_number):
+        """Scroll the log output to the line with id ``line_number`` and select it."""
+        row = self.view_model.row_for_line(line_number)
+        if row is None:
+            return  # 이미 밀려났거나 필터에 걸러진 줄
+        index = self.view_model.index(row)
+        self.log_output.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self.log_output.setCurrentIndex(index)
+        self.log_output.setFocus()
+
 
 class MainWindow(QMainWindow):
+    macro_finished = Signal(str)
+    archive_hits_found = Signal(int, list)
+    archive_search_done = Signal(int, object)
+    incident_started = Signal(str, str)
+    # SendHistory를 저장하지 못했을 때
+    history_error = Signal(str)
+    # ShareServer가 엔진 스레드에서 알려 온 메시지
+    share_event = Signal(str)
+
     def __init__(self):
         super().__init__()
         self.max_log_lines = 10000
+        self.render_fps = 30
         self.output_file = "output_log.txt"
+        self.capture_writer = None
+        # 트리거가 걸렸을 때만 앞뒤 줄을 incident 파일로 쓴다
+        self.trigger_capture = None
+        self.trigger_settings = None
+        self.incident_started.connect(self._on_incident, Qt.QueuedConnection)
+        # 다른 프로그램도 같은 포트를 보도록 TCP로 나눠 준다
+        self.share_server = None
+        self.share_settings = None
+        self.share_event.connect(self.update_log, Qt.QueuedConnection)
         self.last_cursor_position = None
         self.search_text = ""
         self.current_match_index = -1
-        self.send_data_history = []
         self.data_file = ".send_data_history.txt"
-        self.load_send_data_history()
+        # 창을 띄운 뒤 _finish_startup()에서 읽는다; 저장 오류는 쓰는 스레드에서 알려 온다
+        self.send_history = SendHistory(self.data_file, on_error=self.history_error.emit)
+        self.history_error.connect(self.statusBar().showMessage, Qt.QueuedConnection)
+        self.send_data_history_dialog = None
+        self.highlight_rules = HighlightRules(".highlight_rules.txt")
+        self.highlight_rules.load()
+        # 수신 스레드에서 key=value 같은 필드를 뽑아 둔다 (File > Save Log의 필드 저장)
+        self.field_extractor = FieldExtractor(".field_rules.txt")
+        self.field_extractor.load()
+        self.field_table = FieldTable(self.field_extractor)
+        # 모든 포트의 입력창이 같은 자동완성 목록을 쓴다
+        self.history_model = SendHistoryModel(self.send_history, self)
+
+        # 매크로 실행기 (File > Run Macro)
+        self.macro_runner = None
+        self.macro_finished.connect(self._on_macro_finished, Qt.QueuedConnection)
+
+        # Open ports by port id, each with its own tab and log
+        self.sessions = {}
+        self._next_port_id = 0
+        self.search_indexing = False
+        self.last_search_time = 0.0
+        self.search_dialog = None
+        # Ctrl+F의 아카이브 검색 (지난 캡처 파일들)
+        self.archive_directory = ""
+        self.archive_search = None
+        self._archive_generation = 0
+        self.archive_hits_found.connect(self._on_archive_hits, Qt.QueuedConnection)
+        self.archive_search_done.connect(self._on_archive_search_done, Qt.QueuedConnection)
+        # 포트가 둘 이상이면 모든 포트를 수신 시각 순으로 합친 탭을 보여준다
+        self.merged_tab = None
+        self.merger = StreamMerger()
+        self.merge_timer = QTimer(self)
+        self.merge_timer.setSingleShot(True)
+        self.merge_timer.setInterval(int(self.merger.window * 1000))
+        self.merge_timer.timeout.connect(self.flush_merged)
+        # Lines of every port reach the views through one scheduler, at most render_fps times a second
+        self.render_scheduler = RenderScheduler(self.update_log_lines, fps=self.render_fps, parent=self)
 
         self.setWindowTitle("Serial Logger V0.2")
 
@@ -301,125 +1826,263 @@ class MainWindow(QMainWindow):
 
         # Tab Widget
         self.tab_widget = QTabWidget()
+        self._last_log_tab = None
 
-        # Tab 1: Serial Logger
-        self.log_tab = QWidget()
-        self.setup_log_tab()
-        self.tab_widget.addTab(self.log_tab, "Logger")
-
-        # Tab 2: Placeholder for additional functionality
+        # Placeholder for additional functionality, after the log tabs
+        # (통계 패널은 탭을 처음 열 때 만든다)
         self.extra_tab = QWidget()
-        self.setup_extra_tab()
+        self.stats_panel = None
         self.tab_widget.addTab(self.extra_tab, "Extra")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
         # Set central widget
         self.setCentralWidget(self.tab_widget)
 
-        # Initial Serial Thread (default settings)
-        self.serial_thread = SerialThread(port="/dev/ttyV1", baudrate=115200)
-        self.serial_thread.data_received.connect(self.update_log)
-        self.serial_thread.start()
+        # 아직 화면에 그리지 못한 줄 수 표시
+        self.pending_label = QLabel()
+        self.pending_label.hide()
+        self.statusBar().addPermanentWidget(self.pending_label)
+        self.render_scheduler.pending_changed.connect(self.update_pending_label)
+
+        # 명령을 보낸 뒤 큐가 빌 때까지 TX 지연 시간을 보여준다
+        self.tx_label = QLabel()
+        self.tx_label.hide()
+        self.statusBar().addPermanentWidget(self.tx_label)
+        self.tx_timer = QTimer(self)
+        self.tx_timer.setInterval(250)
+        self.tx_timer.timeout.connect(self.update_tx_label)
 
-        # Store the original log text for restoring
-        self.original_log = []
+        # Initial port (default settings), opened once the window is up
+        self.add_port("/dev/ttyV1", 115200, start=False)
 
         # Ctrl + F 단축키 설정
         self.shortcut = QShortcut(QKeySequence("Ctrl+F"), self)
         self.shortcut.activated.connect(self.show_search_dialog)
 
-    def setup_log_tab(self):
-        # Create the keyword filter input field
-        self.keyword_input = QLineEdit()
-        self.keyword_input.setPlaceholderText("Enter keyword to filter...")
-        # Connect the keyword input to filter updates
-        self.keyword_input.textChanged.connect(self.filtered_log)
-
-        # Create the QTextEdit for log output
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
-        self.log_output.setStyleSheet("background-color: black; color: gray;")
-
-        # Create the QLineEdit for data input
-        completer = QCompleter(self.send_data_history)
-        completer.setCaseSensitivity(Qt.CaseInsensitive)
-
-        self.data_input = QLineEdit()
-        self.data_input.setPlaceholderText("Enter data to send...")
-        self.data_input.setCompleter(completer)
-        self.data_input.returnPressed.connect(self.send_data)
-
-        # Layout setup
-        layout = QVBoxLayout()
-        layout.addWidget(self.keyword_input)
-        layout.addWidget(self.log_output)
-        layout.addWidget(self.data_input)
-
-        self.log_tab.setLayout(layout)
+        QTimer.singleShot(0, self._finish_startup)
+        trace_startup("main window built")
+
+    def _finish_startup(self):
+        """Does what the first frame does not need: reads the send history and opens the ports."""
+        trace_startup("event loop running")
+        self.send_history.load()
+        self.history_model.reload()
+        trace_startup("send history loaded")
+        for tab in self.sessions.values():
+            if not tab.serial_thread.running:
+                tab.serial_thread.start()
+        trace_startup("ports opening")
+
+    def add_port(self, port, baudrate, start=True):
+        """Opens ``port`` in a new tab with its own log (later, with start() of its thread, if not ``start``)."""
+        serial_thread = SerialThread(port, baudrate, port_id=self._next_port_id)
+        self._next_port_id += 1
+        tab = LogTab(self, self.max_log_lines, serial_thread, self.history_model)
+        self.init_log_tab(tab)
+        self.sessions[serial_thread.port_id] = tab
+        self.tab_widget.insertTab(len(self.sessions) - 1, tab, port_label(port))
+        if len(self.sessions) > 1 and self.merged_tab is None:
+            self.setup_merged_tab()
+        self.update_port_labels()
+        self.connect_serial_thread(serial_thread)
+        if start:
+            serial_thread.start()
+        self.tab_widget.setCurrentWidget(tab)
+        return tab
+
+    def close_port(self, tab):
+        """Stops the port of ``tab`` and removes its tab; the last port stays open."""
+        if tab.serial_thread is None or len(self.sessions) == 1:
+            return
+        self.stop_serial_thread(tab.serial_thread)
+        tab.close_log_file()
+        tab.log_filter.cancel()
+        del self.sessions[tab.port_id]
+        if self._last_log_tab is tab:
+            self._last_log_tab = None
+        self.tab_widget.removeTab(self.tab_widget.indexOf(tab))
+        tab.deleteLater()
+
+    def init_log_tab(self, tab):
+        """Applies the current view settings to a new tab."""
+        tab.set_time_columns(self.show_timestamps_action.isChecked(), self.show_deltas_action.isChecked())
+        if self.search_indexing:
+            tab.set_search_indexing(True)
+
+    def setup_merged_tab(self):
+        self.merged_tab = LogTab(self, self.max_log_lines)
+        self.init_log_tab(self.merged_tab)
+        self.merged_tab.log_model.port_labels = {}
+        self.tab_widget.insertTab(len(self.sessions), self.merged_tab, "All Ports")
+
+    def update_port_labels(self):
+        if self.merged_tab is not None:
+            self.merged_tab.log_model.port_labels.update(
+                (port_id, port_label(tab.serial_thread.port)) for port_id, tab in self.sessions.items())
+
+    def log_tabs(self):
+        """Returns every log tab, the merged one last."""
+        tabs = list(self.sessions.values())
+        if self.merged_tab is not None:
+            tabs.append(self.merged_tab)
+        return tabs
+
+    def current_tab(self):
+        """Returns the log tab on screen, or the last one shown while another tab is open."""
+        widget = self.tab_widget.currentWidget()
+        if isinstance(widget, LogTab):
+            return widget
+        return self._last_log_tab or next(iter(self.sessions.values()))
+
+    def current_port_tab(self):
+        """Returns the port of the current tab, or the first port for the merged tab."""
+        tab = self.current_tab()
+        return tab if tab.serial_thread is not None else next(iter(self.sessions.values()))
+
+    def on_tab_changed(self, index):
+        widget = self.tab_widget.widget(index)
+        if widget is self.extra_tab and self.stats_panel is None:
+            self.setup_extra_tab()
+        if not isinstance(widget, LogTab):
+            return
+        self._last_log_tab = widget
+        self.live_log_action.setEnabled(widget.mapped_log is not None)
+        if widget.mapped_log is not None:
+            self.setWindowTitle(f"Serial Logger - {os.path.basename(widget.mapped_log.path)}")
+        else:
+            self.update_window_title()
 
     def setup_extra_tab(self):
-        """추가 탭을 설정합니다."""
+        """추가 탭을 설정합니다: 실시간 성능 통계."""
         layout = QVBoxLayout()
-        placeholder = QTextEdit()
-        placeholder.setReadOnly(True)
-        placeholder.setText("This tab can be used for additional functionality.")
-        layout.addWidget(placeholder)
+        self.stats_panel = StatsPanel(self)
+        layout.addWidget(self.stats_panel)
         self.extra_tab.setLayout(layout)
 
-    def filtered_log(self):
-        """Filters the log output based on the regular expression entered in QLineEdit."""
-        keyword = self.keyword_input.text()  # Get the keyword entered by the user
-        self.log_output.clear()  # Clear the existing output
-
-        if keyword:  # If a keyword is entered, apply regex filter
-            try:
-                # Compile the regex pattern (with case insensitivity by default)
-                pattern = re.compile(keyword, re.IGNORECASE)
-                # Filter the logs based on the compiled regex
-                filtered_text = [
-                    line for line in self.original_log if pattern.search(line['text'])
-                ]
-                # Display each filtered line
-                for line in filtered_text:
-                    self.display_line(line)
-
-            except re.error:  # Catch invalid regex patterns
-                self.log_output.append("Invalid regex pattern.")
-        else:  # No keyword entered, display all logs
-            for line in self.original_log:
-                self.display_line(line)
-
-    def display_line(self, line):
-        """Display a single line."""
-        text = line['text']
-        self.log_output.append(text)  # Display each line in QTextEdit
-
     def show_search_dialog(self):
         """검색 다이얼로그를 표시합니다."""
-        self.search_dialog = SearchDialog(self)
-        self.search_dialog.search_input.textChanged.connect(self.filter_log)
-        self.search_dialog.resize(700, 200)
+        self.cancel_archive_search()
+        if self.search_dialog is None:  # 처음 한 번만 만들고 다시 쓴다
+            self.search_dialog = SearchDialog(self)
+            self.search_dialog.search_input.textChanged.connect(self.filter_log)
+            self.search_dialog.resize(700, 200)
+        elif self.search_dialog.search_input.text():
+            self.filter_log()  # 닫혀 있는 동안 로그가 바뀌었을 수 있다
         self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+        self.search_dialog.search_input.selectAll()
+        self.search_dialog.search_input.setFocus()
 
     def filter_log(self):
-        """Filters the log output based on the keyword entered in the search dialog."""
+        """Shows the lines containing the keyword entered in the search dialog."""
+        if self.search_dialog.is_archive_mode():
+            return  # 아카이브는 Enter를 눌렀을 때만 검색한다
         keyword = self.search_dialog.search_input.text()  # Get the keyword from the search dialog
         if keyword:  # If a keyword is entered, apply filter
-            filtered_data = []
-            for index, line in enumerate(self.original_log):
-                if keyword.lower() in line['text'].lower():
-                    # 필터링된 데이터를 하이퍼링크 형식으로 추가
-                    filtered_data.append(f'<a href="{index}">{line["text"]}</a>')
-
-            # 필터링된 데이터를 검색 다이얼로그의 QTextBrowser에 표시
-            self.search_dialog.update_filtered_log(filtered_data)
+            start = time.monotonic()
+            self.search_dialog.update_filtered_log(self.search_log(keyword))
+            self.last_search_time = time.monotonic() - start  # 첫 페이지까지 걸린 시간
         else:
             # 키워드가 없으면 필터링된 로그를 숨김
-            self.search_dialog.update_filtered_log([])
-
-    def update_log(self, message):
-        """Appends message to the log output area."""
-        self.original_log.append({'text': message})  # Store the text in the original log
-        self.log_output.append(message)  # Display the log in QTextEdit
+            self.search_dialog.update_filtered_log(None)
+
+    def search_log(self, keyword):
+        """Searches the log of the current tab; see LogTab.search_log."""
+        return self.current_tab().search_log(keyword)
+
+    def search_archives(self, directory, keyword):
+        """Searches the capture files under ``directory`` in worker processes, streaming hits to the search dialog."""
+        self.cancel_archive_search()
+        self.archive_directory = directory
+        search = self.archive_search = ArchiveSearch(directory, keyword)
+        threading.Thread(target=self._run_archive_search, args=(self._archive_generation, search),
+                         daemon=True).start()
+
+    def _run_archive_search(self, generation, search):
+        start = time.monotonic()
+        try:
+            # 워커가 이 스크립트(PySide6)를 다시 불러오지 않도록 별도 프로세스에서 검색한다
+            search.run_isolated(lambda hits: self.archive_hits_found.emit(generation, hits))
+        except OSError as e:
+            search.errors.append((search.directory, str(e)))
+        files = len(archive_files(search.directory))
+        self.archive_search_done.emit(generation, (search.hits, files, time.monotonic() - start, search.errors))
+
+    def cancel_archive_search(self):
+        """Stops the running archive search; hits still in flight are ignored."""
+        if self.archive_search is not None:
+            self.archive_search.cancel()
+            self.archive_search = None
+        self._archive_generation += 1
+
+    def _on_archive_hits(self, generation, hits):
+        if generation == self._archive_generation and self.search_dialog is not None:
+            self.search_dialog.add_archive_hits(hits)
+
+    def _on_archive_search_done(self, generation, result):
+        if generation == self._archive_generation and self.search_dialog is not None:
+            self.search_dialog.archive_search_finished(*result)
+            self.archive_search = None
+
+    def open_archive_hit(self, path, line_id):
+        """Opens an archived capture file in the current tab at ``line_id``."""
+        if path.endswith((".gz", ".zst")):
+            self.statusBar().showMessage(f"Decompressing {os.path.basename(path)}...")
+            QApplication.processEvents()
+        self.show_log_file(path, line_id)
+
+    def set_search_indexing(self, enabled):
+        """Turns the Ctrl+F trigram index of every tab on or off."""
+        self.search_indexing = enabled
+        for tab in self.log_tabs():
+            tab.set_search_indexing(enabled)
+
+    def update_log(self, message, kind=KIND_SYSTEM, port=None):
+        """Appends message to the log of ``port`` (by default the port of the current tab)."""
+        if port is None:
+            port = self.current_port_tab().port_id
+        records = [(time.monotonic(), kind, port, message)]
+        self.render_scheduler.submit(records)  # 수신된 줄들과 순서를 맞추기 위해 같은 큐를 거친다
+        if self.capture_writer is not None:
+            self.capture_writer.submit(records)
+        if self.trigger_capture is not None:
+            self.trigger_capture.submit(records)
+
+    def update_pending_label(self, count):
+        """Shows how many lines are queued but not rendered yet."""
+        self.pending_label.setText(f"{count} lines pending")
+        self.pending_label.setVisible(count > 0)
+
+    def update_log_lines(self, records):
+        """Hands a batch of ``(timestamp, kind, port, text)`` records to the tabs of their ports."""
+        if self.merged_tab is None and len(self.sessions) == 1:
+            tab = next(iter(self.sessions.values()))
+            if records[0][2] == records[-1][2] == tab.port_id:
+                tab.add_records(records)
+                return
+        by_port = {}
+        for record in records:
+            port_records = by_port.get(record[2])
+            if port_records is None:
+                port_records = by_port[record[2]] = []
+            port_records.append(record)
+        for port, port_records in by_port.items():
+            tab = self.sessions.get(port)
+            if tab is not None:  # 닫힌 포트에서 늦게 도착한 줄은 버린다
+                tab.add_records(port_records)
+        if self.merged_tab is not None:
+            self.merger.push(records)
+            if not self.merge_timer.isActive():
+                self.merge_timer.start()
+
+    def flush_merged(self):
+        """Moves the records that can no longer be overtaken into the merged tab."""
+        records = self.merger.pop_ready()
+        if records:
+            self.merged_tab.add_records(records)
+        if self.merger.pending():
+            self.merge_timer.start()
 
     # 나머지 메서드는 그대로 유지
     def keyPressEvent(self, event):
@@ -430,44 +2093,33 @@ class MainWindow(QMainWindow):
             self.stop_serial_connection()  # 통신 연결 해지
             self.setWindowTitle(f"Serial Logger - Disconnected")
         elif event.key() == Qt.Key_F5:  # F5 키 확인 (로그 클리어)
-            self.log_output.clear()  # 로그 클리어
+            self.current_tab().clear()
         else:
             super().keyPressEvent(event)  # 다른 키는 기본 동작 수행
 
     def start_serial_connection(self):
         """Start serial connection using the current serial settings."""
-        if not self.serial_thread.running:
-            self.serial_thread.start()
+        serial_thread = self.current_port_tab().serial_thread
+        if not serial_thread.running:
+            serial_thread.start()
             self.update_log("Serial connection established.")
         else:
             self.update_log("Serial connection already active.")
 
     def stop_serial_connection(self):
         """Stop the serial connection."""
-        if self.serial_thread.running:
-            self.serial_thread.stop()
+        serial_thread = self.current_port_tab().serial_thread
+        if serial_thread.running:
+            serial_thread.stop()
             self.update_log("Serial connection stopped.")
         else:
             self.update_log("No active serial connection to stop.")
 
-    def load_send_data_history(self):
-        """파일에서 send_data_history를 로드합니다."""
-        if os.path.exists(self.data_file):
-            with open(self.data_file, "r", encoding="utf-8") as file:
-                self.send_data_history = [line.strip() for line in file.readlines()]
-        else:
-            self.send_data_history = []
-
-    def save_send_data_history(self):
-        """send_data_history를 파일에 저장합니다."""
-        with open(self.data_file, "w", encoding="utf-8") as file:
-            for data in self.send_data_history:
-                file.write(f"{data}\n")
-
     def update_window_title(self):
         """Updates the window title with the current serial port and baud rate."""
-        serial_port = self.serial_thread.port
-        baud_rate = self.serial_thread.baudrate
+        serial_thread = self.current_port_tab().serial_thread
+        serial_port = serial_thread.port
+        baud_rate = serial_thread.baudrate
         self.setWindowTitle(f"Serial Logger - {serial_port} @ {baud_rate} baud")
 
     def create_menu(self):
@@ -480,6 +2132,43 @@ class MainWindow(QMainWindow):
         save_log_action.triggered.connect(self.save_log_to_file)
         file_menu.addAction(save_log_action)
 
+        self.capture_action = QAction('Capture to File...', self)
+        self.capture_action.setCheckable(True)
+        self.capture_action.toggled.connect(self.toggle_capture)
+        file_menu.addAction(self.capture_action)
+
+        self.trigger_action = QAction('Capture on Trigger...', self)
+        self.trigger_action.setCheckable(True)
+        self.trigger_action.toggled.connect(self.toggle_trigger_capture)
+        file_menu.addAction(self.trigger_action)
+
+        self.share_action = QAction('Share over TCP...', self)
+        self.share_action.setCheckable(True)
+        self.share_action.toggled.connect(self.toggle_share)
+        file_menu.addAction(self.share_action)
+
+        send_file_action = QAction('Send File...', self)
+        send_file_action.triggered.connect(self.send_file)
+        file_menu.addAction(send_file_action)
+
+        self.run_macro_action = QAction('Run Macro...', self)
+        self.run_macro_action.triggered.connect(self.run_macro_file)
+        file_menu.addAction(self.run_macro_action)
+
+        self.stop_macro_action = QAction('Stop Macro', self)
+        self.stop_macro_action.setEnabled(False)
+        self.stop_macro_action.triggered.connect(self.stop_macro)
+        file_menu.addAction(self.stop_macro_action)
+
+        open_log_action = QAction('Open Log...', self)
+        open_log_action.triggered.connect(self.open_log_file)
+        file_menu.addAction(open_log_action)
+
+        self.live_log_action = QAction('Back to Live Log', self)
+        self.live_log_action.setEnabled(False)
+        self.live_log_action.triggered.connect(self.close_log_file)
+        file_menu.addAction(self.live_log_action)
+
         set_max_lines_action = QAction("Set Max Log Lines", self)
         set_max_lines_action.triggered.connect(self.set_max_log_lines)
         file_menu.addAction(set_max_lines_action)
@@ -491,17 +2180,94 @@ class MainWindow(QMainWindow):
         # Add the 'Settings' action to the menu
         configure_menu.addAction(settings_action)
 
+        add_port_action = QAction('Add Port...', self)
+        add_port_action.triggered.connect(self.show_add_port)
+        configure_menu.addAction(add_port_action)
+
+        close_port_action = QAction('Close Port', self)
+        close_port_action.triggered.connect(lambda: self.close_port(self.current_tab()))
+        configure_menu.addAction(close_port_action)
+
+        pacing_action = QAction('TX Pacing...', self)
+        pacing_action.triggered.connect(self.show_tx_pacing)
+        configure_menu.addAction(pacing_action)
+
+        framing_action = QAction('RX Framing...', self)
+        framing_action.triggered.connect(self.show_framing)
+        configure_menu.addAction(framing_action)
+
+        frame_rate_action = QAction('Render Frame Rate', self)
+        frame_rate_action.triggered.connect(self.set_render_fps)
+        configure_menu.addAction(frame_rate_action)
+
         view_menu = menubar.addMenu('View')
         send_history = QAction('send data history', self)
         send_history.triggered.connect(self.send_history_fn)
         # Add the 'Settings' action to the menu
         view_menu.addAction(send_history)
 
+        self.show_timestamps_action = QAction('Show Timestamps', self)
+        self.show_timestamps_action.setCheckable(True)
+        self.show_timestamps_action.toggled.connect(self.update_time_columns)
+        view_menu.addAction(self.show_timestamps_action)
+
+        self.show_deltas_action = QAction('Show Time Deltas', self)
+        self.show_deltas_action.setCheckable(True)
+        self.show_deltas_action.toggled.connect(self.update_time_columns)
+        view_menu.addAction(self.show_deltas_action)
+
+        index_search_action = QAction('Index Search', self)
+        index_search_action.setCheckable(True)
+        index_search_action.toggled.connect(self.set_search_indexing)
+        view_menu.addAction(index_search_action)
+
+        highlight_action = QAction('Highlight Rules...', self)
+        highlight_action.triggered.connect(self.show_highlight_rules)
+        view_menu.addAction(highlight_action)
+
+        fields_action = QAction('Field Extraction...', self)
+        fields_action.triggered.connect(self.show_field_rules)
+        view_menu.addAction(fields_action)
+
+    def show_highlight_rules(self):
+        """Edits the highlight rules and reclassifies every log with them."""
+        dialog = HighlightRulesDialog(self.highlight_rules.rules, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        try:
+            self.highlight_rules.set_rules(dialog.get_rules())
+        except ValueError as e:
+            QMessageBox.warning(self, "Highlight Rules", str(e))
+            return
+        try:
+            self.highlight_rules.save()
+        except OSError as e:
+            self.statusBar().showMessage(f"Cannot save highlight rules: {e}")
+        for tab in self.log_tabs():
+            tab.restyle()
+
+    def show_field_rules(self):
+        """Edits the field extraction rules; lines received from now on use them."""
+        dialog = FieldRulesDialog(self.field_extractor.rules, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        try:
+            self.field_extractor.set_rules(dialog.get_rules())
+        except ValueError as e:
+            QMessageBox.warning(self, "Field Extraction", str(e))
+            return
+        try:
+            self.field_extractor.save()
+        except OSError as e:
+            self.statusBar().showMessage(f"Cannot save field rules: {e}")
+
     def send_history_fn(self):
         """ history of send data """
-        self.send_data_history_dialog = SendHistoryDialog(self)
-        self.send_data_history_dialog.setModal(False)
+        if self.send_data_history_dialog is None:  # 보낼 때마다 command_used()로 맞춰 두므로 다시 쓴다
+            self.send_data_history_dialog = SendHistoryDialog(self.send_history, self)
+            self.send_data_history_dialog.setModal(False)
         self.send_data_history_dialog.show()
+        self.send_data_history_dialog.raise_()
 
     def show_settings(self):
         """Show the serial settings dialog when the user clicks 'Settings'."""
@@ -511,44 +2277,289 @@ class MainWindow(QMainWindow):
             port, baudrate = settings_dialog.get_settings()
             self.update_serial_settings(port, baudrate)
 
+    def show_add_port(self):
+        """Asks for another port and opens it in a new tab."""
+        settings_dialog = SerialSettingsDialog(self)
+        settings_dialog.setWindowTitle("Add Serial Port")
+        if settings_dialog.exec() == QDialog.Accepted:
+            port, baudrate = settings_dialog.get_settings()
+            self.add_port(port, baudrate)
+            self.update_log(f"Port added: Port = {port}, Baudrate = {baudrate}")
+
     def update_serial_settings(self, port, baudrate):
-        """Update the serial connection settings and restart the serial thread."""
-        self.serial_thread.stop()  # Stop the old thread
-        self.serial_thread = SerialThread(port, baudrate)
-        self.serial_thread.data_received.connect(self.update_log)
-        self.serial_thread.start()  # Restart the serial thread with new settings
-        self.update_log(f"Serial settings updated: Port = {port}, Baudrate = {baudrate}")
-
-    def send_data(self):
-        data = self.data_input.text()
+        """Update the serial connection settings of the current port and restart its serial thread."""
+        tab = self.current_port_tab()
+        self.stop_serial_thread(tab.serial_thread)  # Stop the old thread
+        pacing, framing = tab.serial_thread.pacing, tab.serial_thread.framing
+        tab.serial_thread = SerialThread(port, baudrate, port_id=tab.port_id)
+        # 엔진은 포트 번호별로 pacing과 framing을 기억한다
+        tab.serial_thread.pacing, tab.serial_thread.framing = pacing, framing
+        self.tab_widget.setTabText(self.tab_widget.indexOf(tab), port_label(port))
+        self.update_port_labels()
+        self.connect_serial_thread(tab.serial_thread)
+        tab.serial_thread.start()  # Restart the serial thread with new settings
+        self.update_log(f"Serial settings updated: Port = {port}, Baudrate = {baudrate}", port=tab.port_id)
+
+    def stop_serial_thread(self, serial_thread):
+        """Stops a serial thread and, once its last lines went out, disconnects it from the sinks."""
+        # 닫으면서 내보내는 줄도 캡처 파일과 트리거까지 가도록 다 나온 뒤에 끊는다
+        concurrent.futures.wait([serial_thread.stop()], timeout=5)
+        serial_thread.lines_received.disconnect(self.render_scheduler.submit)
+        serial_thread.lines_received.disconnect(self.field_table.submit)
+        if self.capture_writer is not None:
+            serial_thread.lines_received.disconnect(self.capture_writer.submit)
+        if self.trigger_capture is not None:
+            serial_thread.lines_received.disconnect(self.trigger_capture.submit)
+
+    def connect_serial_thread(self, serial_thread):
+        """Connects a serial thread to the log views and, if capturing, the capture file."""
+        # 수신 스레드에서 바로 큐에 넣는다
+        serial_thread.lines_received.connect(self.render_scheduler.submit, Qt.DirectConnection)
+        serial_thread.lines_received.connect(self.field_table.submit, Qt.DirectConnection)
+        if self.capture_writer is not None:
+            serial_thread.lines_received.connect(self.capture_writer.submit, Qt.DirectConnection)
+        if self.trigger_capture is not None:
+            serial_thread.lines_received.connect(self.trigger_capture.submit, Qt.DirectConnection)
+
+    def toggle_capture(self, checked):
+        """Starts or stops streaming received lines of every port to the capture file."""
+        if not checked:
+            self.stop_capture()
+            return
+        dialog = CaptureSettingsDialog(self.output_file, self)
+        if dialog.exec() != QDialog.Accepted:
+            self.capture_action.setChecked(False)
+            return
+        try:
+            self.start_capture(dialog.get_settings())
+        except (RuntimeError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to start capture: {e}")
+            self.capture_action.setChecked(False)
+
+    def start_capture(self, settings):
+        """Starts a CaptureWriter(**settings) fed by every port; raises RuntimeError/ValueError if invalid."""
+        self.capture_writer = CaptureWriter(**settings)
+        self.output_file = settings['path']
+        self.capture_writer.start()
+        for tab in self.sessions.values():
+            tab.serial_thread.lines_received.connect(self.capture_writer.submit, Qt.DirectConnection)
+        self.update_log(f"Capturing to {self.output_file}")
+
+    def stop_capture(self):
+        if self.capture_writer is None:
+            return
+        for tab in self.sessions.values():
+            tab.serial_thread.lines_received.disconnect(self.capture_writer.submit)
+        self.capture_writer.stop()
+        self.capture_writer = None
+        self.update_log(f"Capture to {self.output_file} stopped.")
+
+    def toggle_trigger_capture(self, checked):
+        """Starts or stops writing incident files around triggers on every port."""
+        if not checked:
+            self.stop_trigger_capture()
+            return
+        settings = self.trigger_settings or {
+            'directory': "incidents", 'patterns': [], 'silence': 0, 'pre_lines': self.max_log_lines,
+            'pre_seconds': 0, 'post_lines': 1000, 'post_seconds': 0,
+        }
+        dialog = TriggerCaptureDialog(settings, self)
+        if dialog.exec() != QDialog.Accepted:
+            self.trigger_action.setChecked(False)
+            return
+        settings = dialog.get_settings()
+        try:
+            self.trigger_capture = TriggerCapture(**settings, on_incident=self.incident_started.emit)
+        except (OSError, ValueError, re.error) as e:
+            QMessageBox.critical(self, "Error", f"Failed to start trigger capture: {e}")
+            self.trigger_action.setChecked(False)
+            return
+        self.trigger_settings = settings
+        self.trigger_capture.start()
+        for tab in self.sessions.values():
+            tab.serial_thread.lines_received.connect(self.trigger_capture.submit, Qt.DirectConnection)
+        self.update_log(f"Waiting for triggers, incidents go to {settings['directory']}")
+
+    def stop_trigger_capture(self):
+        if self.trigger_capture is None:
+            return
+        for tab in self.sessions.values():
+            tab.serial_thread.lines_received.disconnect(self.trigger_capture.submit)
+        self.trigger_capture.stop()
+        incidents = self.trigger_capture.incidents
+        self.trigger_capture = None
+        self.update_log(f"Trigger capture stopped, {incidents} incident(s) written.")
+
+    def toggle_share(self, checked):
+        """Starts or stops serving every port to TCP clients."""
+        if not checked:
+            self.stop_share()
+            return
+        settings = self.share_settings or {
+            'host': "127.0.0.1", 'port': 7777, 'replay': self.max_log_lines, 'max_queue': 1 << 20,
+            'on_slow': "skip", 'allow_tx': True,
+        }
+        dialog = ShareDialog(settings, self)
+        if dialog.exec() != QDialog.Accepted:
+            self.share_action.setChecked(False)
+            return
+        settings = dialog.get_settings()
+        # 앞에 "@N "이 없는 줄은 지금 보고 있는 포트로 보낸다
+        server = ShareServer(shared_engine(), **settings, tx_port=self.current_port_tab().port_id,
+                             on_event=self.share_event.emit)
+        try:
+            server.start()
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to share on {settings['host']}:{settings['port']}: {e}")
+            self.share_action.setChecked(False)
+            return
+        self.share_server = server
+        self.share_settings = settings
+        self.update_log(f"Sharing on {settings['host']}:{settings['port']}")
+
+    def stop_share(self):
+        if self.share_server is None:
+            return
+        self.share_server.stop()
+        self.share_server = None
+        self.update_log("Sharing stopped.")
+
+    def _on_incident(self, path, reason):
+        self.update_log(f"Incident {path}: {reason}")
+        self.statusBar().showMessage(f"Incident {os.path.basename(path)}: {reason}", 10000)
+
+    def closeEvent(self, event):
+        self.stop_share()
+        # 포트를 모두 닫고 (남은 줄은 캡처 파일까지 보낸 뒤) 엔진 스레드를 join한다
+        stop_shared_engine()
+        self.stop_capture()  # 남은 줄을 파일에 쓰고 닫는다
+        self.stop_trigger_capture()
+        self.send_history.close()
+        if self.stats_panel is not None:
+            self.stats_panel.stop_export()
+        super().closeEvent(event)
+
+    def send_data(self, tab=None):
+        tab = tab or self.current_port_tab()
+        data = tab.data_input.text()
         if data:
-            self.serial_thread.send_data(data)
-            self.update_log(f"Sent: {data}")
-            self.data_input.clear()
-
-            # Add the data to the send_data_history
-            if data not in self.send_data_history:
-                self.send_data_history.insert(0, data)
-                # Update the completer's model to include the new data
-                completer = self.data_input.completer()
-                completer.model().setStringList(self.send_data_history)
-            else:
-                self.send_data_history.remove(data)
-                self.send_data_history.insert(0, data)
-            # Save the updated send_data_history to the file
-            self.save_send_data_history()
-            self.send_data_history_dialog.load_history_from_file(self.data_file)
+            self.send_line(data, tab)
+            tab.data_input.clear()
+
+    def send_line(self, data, tab=None):
+        """Sends ``data`` to the port of ``tab`` (by default the current one) and records it in the history."""
+        tab = tab or self.current_port_tab()
+        tab.serial_thread.send_data(data)  # 실제로 쓰인 뒤에 TX 레코드로 로그에 남는다
+        self.watch_tx()
+
+        # 히스토리와 자동완성 목록은 바뀐 줄만 고치고, 파일 기록은 별도 스레드가 한다
+        self.history_model.use(data)
+        if self.send_data_history_dialog is not None:
+            self.send_data_history_dialog.command_used(data, self.send_history.capacity)
+
+    def send_file(self):
+        """Sends every line of a text file to the current port as one burst."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Send File", "", "Text Files (*.txt);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to read {file_path}: {e}")
+            return
+        self.current_port_tab().serial_thread.send_lines(lines)
+        self.watch_tx()
+
+    def run_macro_file(self):
+        """Runs a send/expect/wait/loop macro file on the current port (see parse_macro)."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Run Macro", "", "Macro Files (*.txt *.macro);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                steps = parse_macro(file.read())
+        except (OSError, UnicodeDecodeError, MacroError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to load macro: {e}")
+            return
+        self.run_macro(steps)
+
+    def run_macro(self, steps):
+        if self.macro_runner is not None:
+            return  # 한 번에 하나만
+        serial_thread = self.current_port_tab().serial_thread
+        # 완료 콜백은 엔진 스레드에서 불리므로 시그널로 GUI 스레드에 넘긴다
+        self.macro_runner = MacroRunner(serial_thread.engine, serial_thread.port_id, steps,
+                                        on_finished=lambda error: self.macro_finished.emit(error or ""))
+        self.macro_runner.start()
+        self.run_macro_action.setEnabled(False)
+        self.stop_macro_action.setEnabled(True)
+        self.statusBar().showMessage("Macro running...")
+
+    def stop_macro(self):
+        if self.macro_runner is not None:
+            self.macro_runner.cancel()
+
+    def _on_macro_finished(self, error):
+        runner, self.macro_runner = self.macro_runner, None
+        self.run_macro_action.setEnabled(True)
+        self.stop_macro_action.setEnabled(False)
+        if error:
+            self.statusBar().showMessage(f"Macro failed: {error}")
+        else:
+            self.statusBar().showMessage(
+                f"Macro finished: {runner.iterations} iterations in {runner.elapsed:.3f} s", 10000)
+
+    def watch_tx(self):
+        """Refreshes the TX latency label until the send queue is empty."""
+        if not self.tx_timer.isActive():
+            self.tx_timer.start()
+
+    def update_tx_label(self):
+        serial_thread = self.current_port_tab().serial_thread
+        stats = serial_thread.tx_stats()
+        if stats is not None and stats.count:
+            pending = serial_thread.tx_pending()
+            self.tx_label.setText(f"{stats.summary()}{f', {pending} queued' if pending else ''}")
+            self.tx_label.show()
+        if not serial_thread.tx_pending():
+            self.tx_timer.stop()
+
+    def show_tx_pacing(self):
+        """Sets the pacing of commands sent to the current port."""
+        serial_thread = self.current_port_tab().serial_thread
+        dialog = TxPacingDialog(serial_thread.pacing, self)
+        if dialog.exec() == QDialog.Accepted:
+            serial_thread.set_pacing(*dialog.get_settings())
+
+    def show_framing(self):
+        """Sets how the current port's input is split (text lines or binary frames) and shown."""
+        tab = self.current_port_tab()
+        model = tab.log_model
+        dialog = FramingDialog(tab.serial_thread.framing, model.raw_display, model.encoding, self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        try:
+            framing, raw_display, encoding = dialog.get_settings()
+            tab.serial_thread.set_framing(framing)
+        except ValueError as e:
+            QMessageBox.warning(self, "RX Framing", str(e))
+            return
+        model.set_raw_display(raw_display, encoding)
+        if self.merged_tab is not None:
+            self.merged_tab.log_model.set_raw_display(raw_display, encoding)
 
     def save_log_to_file(self):
-        """log_output의 내용을 사용자가 선택한 파일에 저장"""
+        """현재 탭의 log_output에 보이는 줄들을 사용자가 선택한 파일에 저장"""
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog  # 플랫폼 기본 대화 상자를 사용하지 않음 (선택 사항)
 
-        file_path, _ = QFileDialog.getSaveFileName(
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Save Log File",  # 대화 상자 제목
             "",  # 기본 경로 (빈 문자열이면 현재 경로)
-            "Text Files (*.txt);;All Files (*)",  # 파일 필터
+            "Text Files (*.txt);;CSV with timestamps (*.csv);;Extracted fields, CSV (*.csv);;"
+            "Extracted fields, Parquet (*.parquet);;Extracted fields, Arrow (*.arrow);;All Files (*)",  # 파일 필터
             options=options
         )
 
@@ -557,13 +2568,88 @@ class MainWindow(QMainWindow):
             return  # 아무 동작도 하지 않음
 
         try:
-            # log_output의 내용을 선택한 파일에 저장
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(self.log_output.toPlainText())
+            # log_output에 보이는 줄들을 선택한 파일에 저장
+            if selected_filter.startswith("Extracted fields") or file_path.lower().endswith((".parquet", ".arrow")):
+                self.export_fields(file_path)
+                return
+            if selected_filter.startswith("CSV") or file_path.lower().endswith(".csv"):
+                self.export_csv(file_path)
+            else:
+                with open(file_path, 'w', encoding='utf-8') as file:
+                    for line in self.current_tab().view_model.iter_text():
+                        file.write(f"{line}\n")
             QMessageBox.information(self, "Success", f"Log saved to {file_path}")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save log: {e}")
 
+    def export_csv(self, file_path):
+        """Writes the visible rows as CSV with receive time, delta, kind and port."""
+        view_model = self.current_tab().view_model
+        store = view_model.store
+        port_names = {port_id: tab.serial_thread.port for port_id, tab in self.sessions.items()}
+        import csv  # CSV로 저장할 때만 필요하다
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["time", "monotonic", "delta_ms", "kind", "port", "text"])
+            previous = None
+            for line_id in view_model.iter_ids():
+                try:
+                    timestamp, kind, port, text = store.record(line_id)
+                except IndexError:
+                    continue  # 저장하는 동안 밀려난 줄
+                if timestamp is None:
+                    writer.writerow(["", "", "", KIND_NAMES[kind], "", text])
+                    continue
+                delta = "" if previous is None else f"{(timestamp - previous) * 1000:.3f}"
+                writer.writerow([format_timestamp(timestamp), f"{timestamp:.6f}", delta, KIND_NAMES[kind],
+                                 port_names.get(port, port), text])
+                previous = timestamp
+
+    def export_fields(self, file_path):
+        """Writes the fields extracted from the received lines, or from the capture file on screen."""
+        mapped = self.current_tab().mapped_log
+        if mapped is None:
+            columns = self.field_table.snapshot()
+        elif not mapped.indexed:
+            QMessageBox.information(self, "Save Fields", "The capture file is still being indexed.")
+            return
+        else:
+            table = FieldTable(self.field_extractor, max_rows=len(mapped))
+            table.add_rows(list(self.field_extractor.extract_capture(mapped)))
+            columns = table.snapshot()
+        rows = export_fields(file_path, columns)
+        QMessageBox.information(self, "Success", f"{rows} rows of {len(columns) - 2} fields saved to {file_path}")
+
+    def update_time_columns(self):
+        for tab in self.log_tabs():
+            tab.set_time_columns(self.show_timestamps_action.isChecked(), self.show_deltas_action.isChecked())
+
+    def open_log_file(self):
+        """Shows a capture file in the current tab; the file is memory-mapped and indexed in the background."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open Log File", "", "Text Files (*.txt *.log);;Compressed Captures (*.gz *.zst);;All Files (*)")
+        if file_path:
+            self.show_log_file(file_path)
+
+    def show_log_file(self, file_path, line_id=None):
+        try:
+            mapped = open_capture(file_path)
+        except (OSError, ValueError, RuntimeError, EOFError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to open log: {e}")
+            return
+        self.current_tab().show_log_file(mapped, line_id)
+        self.live_log_action.setEnabled(True)
+        self.setWindowTitle(f"Serial Logger - {os.path.basename(file_path)}")
+
+    def close_log_file(self):
+        """Returns the current tab to its live serial log."""
+        tab = self.current_tab()
+        if tab.mapped_log is None:
+            return
+        tab.close_log_file()
+        self.live_log_action.setEnabled(False)
+        self.update_window_title()
+
     def set_max_log_lines(self):
         max_lines, ok = QInputDialog.getInt(
             self,
@@ -576,37 +2662,33 @@ class MainWindow(QMainWindow):
         )
         if ok:
             self.max_log_lines = max_lines
-            print(f"Max log lines set to: {self.max_log_lines}")
+            for tab in self.log_tabs():
+                tab.set_max_lines(max_lines)
+            self.statusBar().showMessage(f"Max log lines set to {max_lines}", 3000)
 
-    def append_log(self, text):
-        current_logs = self.log_output.toPlainText().split("\n")
-        current_logs.append(text)
-
-        # 최대 라인 제한에 맞게 리스트를 자릅니다.
-        if len(current_logs) > self.max_log_lines:
-            current_logs = current_logs[-self.max_log_lines :]
-
-        # 텍스트 업데이트
-        self.log_output.setPlainText("\n".join(current_logs))
+    def set_render_fps(self):
+        fps, ok = QInputDialog.getInt(
+            self,
+            "Render Frame Rate",
+            "Maximum screen updates per second:",
+            value=self.render_fps,
+            minValue=1,
+            maxValue=120,
+            step=1,
+        )
+        if ok:
+            self.render_fps = fps
+            self.render_scheduler.set_frame_rate(fps)
 
     def move_to_line(self, line_number):
-        """Move the cursor to the specified line in the log output and highlight it."""
-        cursor = self.log_output.textCursor()
-        cursor.movePosition(QTextCursor.Start)  # Move to the start of the document
-        for _ in range(line_number):
-            cursor.movePosition(QTextCursor.Down)  # Move to the target line
-
-        # 커서를 해당 라인의 시작으로 이동
-        cursor.movePosition(QTextCursor.StartOfLine)
-        cursor.movePosition(QTextCursor.EndOfLine, QTextCursor.KeepAnchor)  # 라인 전체 선택
-        self.log_output.setTextCursor(cursor)
-
-        # 커서 위치를 화면에 표시
-        self.log_output.setFocus()
+        """Scroll the current tab's log output to the line with id ``line_number`` and select it."""
+        self.current_tab().move_to_line(line_number)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    trace_startup("QApplication created")
     window = MainWindow()
     window.resize(800, 1300)
     window.show()
+    trace_startup("window shown")
     sys.exit(app.exec())
@@ -0,0 +1,73 @@
+import os
+import sys
+
+# 저장소 최상위의 serial_core를 설치 없이 불러온다
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import select
+import threading
+
+import pytest
+
+from serial_core import CaptureEngine
+
+
+@pytest.fixture
+def engine():
+    engine = CaptureEngine(batch_interval=0.005).start()
+    yield engine
+    engine.stop()
+
+
+@pytest.fixture
+def make_pty():
+    """Returns a function that opens a raw pty and returns ``(master_fd, slave_path)``;
+    the test plays the device on the master side."""
+    pty = pytest.importorskip("pty")
+    tty = pytest.importorskip("tty")
+    fds = []
+
+    def make():
+        master, slave = pty.openpty()
+        tty.setraw(slave)
+        fds.extend((master, slave))
+        return master, os.ttyname(slave)
+
+    yield make
+    for fd in fds:
+        os.close(fd)
+
+
+@pytest.fixture
+def pty_pair(make_pty):
+    return make_pty()
+
+
+class EchoDevice(threading.Thread):
+    """Fake firmware on a pty master: answers every command line with ``OK <command>``."""
+
+    def __init__(self, fd):
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.commands = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        buffer = b""
+        while not self.stopped.is_set():
+            if not select.select([self.fd], [], [], 0.05)[0]:
+                continue
+            buffer += os.read(self.fd, 65536)
+            *commands, buffer = buffer.split(b"\n")
+            self.commands.extend(command.decode() for command in commands)
+            if commands:
+                os.write(self.fd, b"".join(b"OK %s\n" % command for command in commands))
+
+
+@pytest.fixture
+def echo_device(pty_pair):
+    device = EchoDevice(pty_pair[0])
+    device.start()
+    yield device
+    device.stopped.set()
+    device.join()
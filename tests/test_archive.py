@@ -0,0 +1,75 @@
+import gzip
+import subprocess
+import sys
+import textwrap
+
+from serial_core import ArchiveSearch
+
+ROOT = __import__("pathlib").Path(__file__).resolve().parent.parent
+
+
+def lines(count):
+    return [f"2026-01-01 00:00:{i % 60:02d}.000000 RX line {i} {'ÄRGER' if i % 7 == 0 else 'ok'}" for i in range(count)]
+
+
+def run_search(directory, keyword, **options):
+    hits = []
+    search = ArchiveSearch(str(directory), keyword, workers=2, **options)
+    search.run(hits.extend)
+    assert not search.errors
+    return sorted(hits)
+
+
+def test_plain_and_compressed_files_in_ranges(tmp_path):
+    plain = lines(5000)
+    (tmp_path / "a.log").write_text("\n".join(plain) + "\n", encoding="utf-8")
+    with gzip.open(tmp_path / "b.log.gz", "wt", encoding="utf-8") as f:
+        f.write("\n".join(plain[:100]))  # 마지막 줄에 개행이 없다
+    # 구간을 작게 잘라도 줄 번호는 파일 전체 기준이다
+    hits = run_search(tmp_path, "LINE 49", chunk_bytes=4096)
+    expected = [(str(tmp_path / "a.log"), i, plain[i][:26], plain[i]) for i in range(5000) if "line 49" in plain[i]]
+    assert [hit for hit in hits if hit[0].endswith("a.log")] == expected
+    assert [hit[1] for hit in hits if hit[0].endswith(".gz")] == [49]
+
+
+def test_non_ascii_keyword_ignores_case(tmp_path):
+    plain = lines(1000) + ["2026-01-01 00:00:00.000000 RX STRASSE", "straße"]
+    (tmp_path / "a.log").write_text("\r\n".join(plain) + "\r\n", encoding="utf-8")
+    hits = run_search(tmp_path, "ärger", chunk_bytes=4096)
+    assert [hit[1] for hit in hits] == [i for i in range(1000) if i % 7 == 0]
+    assert all(hit[3] == plain[hit[1]] for hit in hits)
+    assert [hit[1] for hit in run_search(tmp_path, "Straße")] == [1000, 1001]
+
+
+def test_isolated_search_does_not_run_the_main_script(tmp_path):
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "logs" / "a.log").write_text("hello\nworld\n")
+    script = tmp_path / "main.py"
+    script.write_text(textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(ROOT)!r})
+        print("main script ran", flush=True)
+        from serial_core import ArchiveSearch
+        if __name__ == "__main__":
+            print(ArchiveSearch({str(tmp_path / "logs")!r}, "WORLD", workers=2).run_isolated(print))
+    """))
+    output = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60).stdout
+    assert output.splitlines() == ["main script ran", f"[({str(tmp_path / 'logs' / 'a.log')!r}, 1, '', 'world')]", "1"]
+
+
+def test_isolated_search_matches_run_and_can_be_cancelled(tmp_path):
+    plain = lines(3000)
+    (tmp_path / "a.log").write_text("\n".join(plain) + "\n", encoding="utf-8")
+    (tmp_path / "b.log").write_text("\n".join(plain[:10]) + "\n", encoding="utf-8")
+    hits = []
+    search = ArchiveSearch(str(tmp_path), "ärger", workers=2, chunk_bytes=4096)
+    assert search.run_isolated(hits.extend) == len(hits)
+    assert not search.errors
+    assert sorted(hits) == run_search(tmp_path, "ärger", chunk_bytes=4096)
+    assert search.bytes_total == sum(path.stat().st_size for path in tmp_path.iterdir())
+
+    cancelled = ArchiveSearch(str(tmp_path), "line", workers=2, chunk_bytes=4096)
+    cancelled.cancel()
+    hits = []
+    cancelled.run_isolated(hits.extend)
+    assert hits == [] and not cancelled.errors
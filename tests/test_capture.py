@@ -0,0 +1,90 @@
+import gzip
+import os
+import time
+
+import pytest
+
+from serial_core import CaptureWriter, KIND_RX, archive_files
+
+
+def read_any(path):
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    if path.endswith(".zst"):
+        import zstandard
+        with open(path, "rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f).read()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_batches(writer, count, pause=0.005):
+    """Submits ``count`` small batches, one at a time so they are not all joined into one write."""
+    lines = []
+    for i in range(count):
+        batch = [(time.monotonic(), KIND_RX, 0, f"batch {i:03d} line {j} " + "x" * 20) for j in range(3)]
+        lines += [record[3] for record in batch]
+        writer.submit(batch)
+        time.sleep(pause)
+    return lines
+
+
+def wait_for_compression(directory, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        names = os.listdir(directory)
+        if not any(name.endswith(".part") or (name != "capture.txt" and name.endswith(".txt")) for name in names):
+            return
+        time.sleep(0.02)
+    raise AssertionError(f"still compressing: {names}")
+
+
+@pytest.mark.parametrize("compress", [None, "gzip", "zstd"])
+def test_size_rotation_keeps_every_line_in_name_order(tmp_path, compress):
+    if compress == "zstd":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / "capture.txt")
+    writer = CaptureWriter(path, max_bytes=1000, compress=compress, timestamps=False)
+    writer.start()
+    lines = write_batches(writer, 60)
+    writer.stop()
+    if compress:
+        wait_for_compression(tmp_path)
+
+    files = archive_files(str(tmp_path))
+    assert files[-1] == path  # 지금 쓰는 파일은 이름 순으로 맨 뒤
+    rotated = files[:-1]
+    assert len(rotated) >= 5
+    suffix = {None: ".txt", "gzip": ".txt.gz", "zstd": ".txt.zst"}[compress]
+    assert all(name.endswith(suffix) for name in rotated)
+    assert all(os.path.getsize(name) <= 1000 for name in rotated if compress is None)
+    # 같은 초에 여러 번 돌려도 이름 순서가 쓴 순서다
+    data = b"".join(read_any(name) for name in files)
+    assert data.decode().splitlines() == lines
+
+
+def test_time_rotation_and_appending_to_an_existing_file(tmp_path):
+    path = tmp_path / "capture.txt"
+    path.write_text("from before\n")
+    writer = CaptureWriter(str(path), max_seconds=0.05, timestamps=False)
+    writer.start()
+    lines = write_batches(writer, 10, pause=0.03)
+    writer.stop()
+    files = archive_files(str(tmp_path))
+    assert len(files) >= 3
+    assert b"".join(read_any(name) for name in files).decode().splitlines() == ["from before"] + lines
+
+
+def test_timestamped_lines():
+    writer = CaptureWriter.__new__(CaptureWriter)
+    writer.timestamps = True
+    line = writer._format([(time.monotonic(), KIND_RX, 2, "hello")])
+    assert line.endswith(" RX@2 hello\n") and line[4] == "-" and line[10] == " "
+
+
+def test_bad_settings():
+    with pytest.raises(ValueError):
+        CaptureWriter("x.txt", compress="bz2")
+    with pytest.raises(ValueError):
+        CaptureWriter("x.txt", fsync="sometimes")
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+from serial_core import CaptureEngine, LineSplitter, StreamMerger, KIND_RX
+
+
+def test_line_splitter_reassembles_lines_across_reads():
+    splitter = LineSplitter(b"\r\n")
+    assert splitter.feed(b"hel") == []
+    assert splitter.feed(b"lo\r") == []
+    assert splitter.feed(b"\nwor") == ["hello"]
+    assert splitter.feed(b"ld\r\n\r\nlast") == ["world", ""]
+    assert splitter.has_partial()
+    assert splitter.flush() == ["last"]
+    assert splitter.flush() == []
+
+
+def test_line_splitter_decodes_after_joining():
+    splitter = LineSplitter()
+    data = "ärger\n".encode("utf-8")
+    assert splitter.feed(data[:1]) == []  # 'ä'의 첫 바이트에서 끊긴다
+    assert splitter.feed(data[1:]) == ["ärger"]
+
+
+class Collector:
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, records):
+        self.records.extend(records)
+
+    def rx(self, port=None):
+        return [record for record in self.records if record[1] == KIND_RX and (port is None or record[2] == port)]
+
+    def wait_for(self, count, port=None, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while len(self.rx(port)) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.rx(port)
+
+
+def test_partial_lines_are_reassembled_over_loop(engine):
+    received = Collector()
+    assert engine.open_port("loop://", 115200, sink=received).result(timeout=5)
+    for chunk in (b"par", b"tial\nsec", b"ond line", b"\n"):
+        engine.write(0, chunk)
+        time.sleep(0.05)  # 조각마다 따로 읽히게 한다
+    assert [record[3] for record in received.wait_for(2)] == ["partial", "second line"]
+
+
+def test_order_is_kept_per_port(engine):
+    received = Collector()
+    engine.subscribe(received)
+    for port_id in (0, 1):
+        assert engine.open_port("loop://", 115200, port_id).result(timeout=5)
+    count = 300  # loop://는 4096 바이트까지만 쌓아 두므로 그보다 적게 보낸다
+    for port_id in (0, 1):
+        data = b"".join(b"%d:%06d\n" % (port_id, i) for i in range(count))
+        for start in range(0, len(data), 97):  # 줄 중간에서 끊긴 조각으로 보낸다
+            engine.write(port_id, data[start:start + 97])
+    for port_id in (0, 1):
+        records = received.wait_for(count, port_id)
+        assert [record[3] for record in records] == [f"{port_id}:{i:06d}" for i in range(count)]
+        times = [record[0] for record in records]
+        assert times == sorted(times)
+
+
+def test_partial_line_is_flushed_after_the_timeout():
+    engine = CaptureEngine(batch_interval=0.005, partial_timeout=0.1).start()
+    try:
+        received = Collector()
+        assert engine.open_port("loop://", 115200, sink=received).result(timeout=5)
+        engine.write(0, b"no newline")
+        assert [record[3] for record in received.wait_for(1)] == ["no newline"]
+    finally:
+        engine.stop()
+
+
+def test_merged_view_of_two_ptys_is_in_time_order(engine, make_pty):
+    merger = StreamMerger(window=0.05)
+    lock = threading.Lock()
+
+    def push(records):
+        with lock:
+            merger.push(records)
+
+    engine.subscribe(push)
+    devices = [make_pty(), make_pty()]
+    for port_id, (_, path) in enumerate(devices):
+        assert engine.open_port(path, 115200, port_id).result(timeout=5)
+    count = 200
+    merged = []
+    for i in range(count):  # 두 장치가 번갈아 보낸다
+        for port_id, (master, _) in enumerate(devices):
+            os.write(master, b"%d:%04d\n" % (port_id, i))
+        time.sleep(0.002)
+        if i % 20 == 0:
+            with lock:
+                merged += merger.pop_ready()  # GUI의 merge timer처럼 도중에 꺼낸다
+    deadline = time.monotonic() + 5
+    while len(merged) < 2 * count and time.monotonic() < deadline:
+        time.sleep(0.02)
+        with lock:
+            merged += merger.pop_ready()
+
+    rx = [record for record in merged if record[1] == KIND_RX]
+    assert len(rx) == 2 * count
+    times = [record[0] for record in rx]
+    assert times == sorted(times)
+    for port_id in (0, 1):
+        assert [record[3] for record in rx if record[2] == port_id] == [f"{port_id}:{i:04d}" for i in range(count)]
+    # 포트별로 몰려 있지 않고 섞여 있다
+    assert sum(a[2] != b[2] for a, b in zip(rx, rx[1:])) > count // 2
@@ -0,0 +1,47 @@
+from serial_core import FieldExtractor, FieldTable, MappedLog, export_fields, format_records, KIND_RX, KIND_TX
+
+
+def test_anchored_rule_matches_every_line_of_a_batch():
+    extractor = FieldExtractor(rules=[r"^temp=(?P<temp>\d+)$"])
+    assert extractor.extract_lines(["temp=1", "temp=2", "temp=3"]) == [
+        (0, {"temp": 1}), (1, {"temp": 2}), (2, {"temp": 3})]
+
+
+def test_negated_class_stops_at_the_end_of_the_line():
+    extractor = FieldExtractor(rules=[r"name:(?P<name>[^,]+)"])
+    assert extractor.extract_lines(["name:a", "name:b,x", "other"]) == [(0, {"name": "a"}), (1, {"name": "b"})]
+
+
+def test_batch_gives_the_same_fields_as_single_lines():
+    extractor = FieldExtractor(rules=[FieldExtractor.KEY_VALUE, r"^(?P<level>[A-Z]+):", r"volt (?P<volt>\S+)$"])
+    lines = ["INFO: seq=1 temp=20.5", "volt 3.3", "WARN: state=ok,", "", "a=1;b=x y=-2"]
+    assert extractor.extract_lines(lines) == [
+        (index, fields) for index, line in enumerate(lines)
+        for _, fields in extractor.extract_lines([line])]
+
+
+def test_extract_keeps_only_rx_records_and_types_values():
+    extractor = FieldExtractor()
+    records = [(1.0, KIND_RX, 0, "a=1 b=2.5 c=hi"), (2.0, KIND_TX, 0, "x=9"), (3.0, KIND_RX, 2, "no fields")]
+    assert extractor.extract(records) == [(1.0, 0, {"a": 1, "b": 2.5, "c": "hi"})]
+
+
+def test_capture_file_rows_and_csv_export(tmp_path):
+    records = [(100.0, KIND_RX, 0, "seq=1"), (101.0, KIND_TX, 0, "seq=9"), (102.0, KIND_RX, 1, "seq=2 v=x")]
+    capture = tmp_path / "capture.txt"
+    capture.write_text(format_records(records), encoding="utf-8")
+    log = MappedLog(str(capture))
+    log.build_index()
+    extractor = FieldExtractor()
+    rows = list(extractor.extract_capture(log))
+    log.close()
+    assert [(port, fields) for _, port, fields in rows] == [(0, {"seq": 1}), (1, {"seq": 2, "v": "x"})]
+    assert abs(rows[1][0] - 102.0) < 1e-3
+
+    table = FieldTable(extractor)
+    table.add_rows(rows)
+    out = tmp_path / "fields.csv"
+    assert export_fields(str(out), table.snapshot()) == 2
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "time,port,seq,v"
+    assert lines[1].endswith(",0,1,") and lines[2].endswith(",1,2,x")
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from serial_core import FrameSplitter, parse_framing
+
+
+def slip_encode(frame):
+    return frame.replace(b"\xdb", b"\xdb\xdd").replace(b"\xc0", b"\xdb\xdc") + b"\xc0"
+
+
+def cobs_encode(frame):
+    out, block = bytearray(), bytearray()
+    for byte in frame:
+        if byte == 0:
+            out += bytes([len(block) + 1]) + block
+            block.clear()
+        else:
+            block.append(byte)
+            if len(block) == 254:
+                out += b"\xff" + block
+                block.clear()
+    out += bytes([len(block) + 1]) + block
+    return bytes(out) + b"\x00"
+
+
+def feed_in_chunks(splitter, data, seed=0):
+    """Feeds ``data`` one byte at a time, then in random chunk sizes; returns the frames of each run."""
+    rng = random.Random(seed)
+    runs = []
+    for sizes in ([1] * len(data), None):
+        position, frames = 0, []
+        while position < len(data):
+            size = sizes[0] if sizes else rng.randint(1, 50)
+            frames += splitter.feed(data[position:position + size])
+            position += size
+        runs.append(frames)
+    return runs
+
+
+FRAMES = [b"", b"a", b"\x00\x01\x02", b"\xc0\xdb\xc0", b"\xdb\xdc", bytes(range(256)), b"\x00" * 3, b"x" * 600]
+
+
+@pytest.mark.parametrize("framing, encode, frames", [
+    ({"mode": "delimiter", "delimiter": b"\r\n"}, lambda frame: frame + b"\r\n", [b"one", b"", b"two\rthree\n"]),
+    ({"mode": "fixed", "length": 5}, lambda frame: frame, [b"12345", b"\x00" * 5, b"\r\n\r\n\r"]),
+    ({"mode": "length", "prefix_size": 1}, lambda frame: bytes([len(frame)]) + frame, [b"", b"abc", b"\x00" * 255]),
+    ({"mode": "length", "prefix_size": 2, "byteorder": "little"},
+     lambda frame: len(frame).to_bytes(2, "little") + frame, [b"x" * 300, b"", b"\x01\x00"]),
+    ({"mode": "length", "prefix_size": 4}, lambda frame: len(frame).to_bytes(4, "big") + frame, [b"y" * 70000, b"z"]),
+    ({"mode": "slip"}, slip_encode, [frame for frame in FRAMES if frame]),
+    ({"mode": "cobs"}, cobs_encode, FRAMES + [b"\x01" * 254, b"\x01" * 508 + b"\x00"]),
+])
+def test_round_trip_in_any_chunks(framing, encode, frames):
+    splitter = FrameSplitter(max_frame=1 << 20, **framing)
+    data = b"".join(encode(frame) for frame in frames)
+    if framing["mode"] == "length":
+        frames = [encode(frame) for frame in frames]  # 길이 프레임은 헤더째 남긴다
+    for received in feed_in_chunks(splitter, data):
+        assert received == frames
+    assert not splitter.has_partial() and splitter.flush() == []
+
+
+@pytest.mark.parametrize("prefix_size, byteorder", [(1, "big"), (2, "big"), (4, "little")])
+def test_oversized_length_frame_is_dropped_and_the_stream_stays_in_sync(prefix_size, byteorder):
+    def frame(payload):
+        return len(payload).to_bytes(prefix_size, byteorder) + payload
+
+    good = [frame(b"before"), frame(b"after"), frame(b"\x00\x05")]
+    data = good[0] + frame(bytes(range(100)) * 2) + good[1] + frame(b"x" * 150) + good[2]
+    splitter = FrameSplitter("length", prefix_size=prefix_size, byteorder=byteorder, max_frame=64)
+    for received in feed_in_chunks(splitter, data, seed=prefix_size):
+        assert received == good
+    assert splitter.dropped == 4  # 두 번씩 (한 바이트씩, 임의 크기로)
+
+
+def test_flush_resyncs_a_frame_being_skipped():
+    splitter = FrameSplitter("length", max_frame=16)
+    assert splitter.feed(b"\xff" + b"x" * 10) == []
+    assert splitter.flush() == []
+    assert splitter.feed(b"\x02ok\x01!") == [b"\x02ok", b"\x01!"]
+    assert splitter.feed(b"\x03ab") == [] and splitter.flush() == [b"\x03ab"]
+
+
+def test_fixed_partial_frame_is_flushed():
+    splitter = FrameSplitter("fixed", length=4)
+    assert splitter.feed(b"abcdef") == [b"abcd"]
+    assert splitter.has_partial() and splitter.flush() == [b"ef"]
+    assert splitter.feed(b"ghij") == [b"ghij"]
+
+
+def test_lost_delimiter_costs_one_frame():
+    splitter = FrameSplitter("delimiter", delimiter=b"\n", max_frame=32)
+    frames = splitter.feed(b"x" * 40) + splitter.feed(b"\nnext\n")
+    assert frames == [b"x" * 40, b"", b"next"]
+
+
+def test_corrupt_slip_and_cobs_input():
+    # SLIP: 빈 프레임(연속 END)은 버리고, 잘못된 escape는 그대로 둔다
+    assert FrameSplitter("slip").feed(b"\xc0\xc0ab\xdb\x01\xc0\xc0") == [b"ab\xdb\x01"]
+    # COBS: 남은 길이보다 큰 code도 있는 만큼만 풀고 다음 프레임은 제대로 읽는다
+    splitter = FrameSplitter("cobs")
+    assert splitter.feed(b"\x09ab\x00\x00" + cobs_encode(b"ok\x00")) == [b"ab", b"ok\x00"]
+
+
+@pytest.mark.parametrize("spec, framing", [
+    ("text", None),
+    ("delimiter:0d0a", {"mode": "delimiter", "delimiter": b"\r\n"}),
+    ("fixed:8", {"mode": "fixed", "length": 8}),
+    ("length:2le", {"mode": "length", "prefix_size": 2, "byteorder": "little"}),
+    ("LENGTH", {"mode": "length", "prefix_size": 1}),
+    ("slip", {"mode": "slip"}),
+    ("cobs", {"mode": "cobs"}),
+])
+def test_parse_framing(spec, framing):
+    assert parse_framing(spec) == framing
+
+
+@pytest.mark.parametrize("spec", ["fixed:0", "length:3", "delimiter:zz", "morse"])
+def test_parse_framing_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_framing(spec)
@@ -0,0 +1,65 @@
+import os
+import time
+
+import pytest
+
+from serial_core import KIND_RX
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 창이 쓰는 기록/설정 파일
+    import serial_log
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    window = serial_log.MainWindow()
+    yield window
+    window.close()
+    serial_log.stop_shared_engine()
+    app.processEvents()
+
+
+def wait_for(condition, timeout=5):
+    app = QtWidgets.QApplication.instance()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_reconfigure_keeps_the_last_line_and_adds_no_duplicates(window, make_pty, tmp_path):
+    import serial_log
+    engine = serial_log.shared_engine()
+    (first, first_path), (second, second_path) = make_pty(), make_pty()
+    tab = window.current_port_tab()
+    window.start_capture({"path": str(tmp_path / "capture.txt"), "timestamps": False})
+    window.update_serial_settings(first_path, 115200)
+    assert wait_for(lambda: engine.is_open(tab.port_id))
+
+    # 마지막 줄은 개행 없이 남아 있다가 포트를 닫을 때 나간다
+    data = b"one\ntwo\nlast without newline"
+    os.write(first, data)
+    assert wait_for(lambda: engine.counters(tab.port_id).rx_bytes == len(data))
+    window.update_serial_settings(second_path, 115200)
+    assert wait_for(lambda: engine.is_open(tab.port_id))
+    os.write(second, b"three\n")
+    assert wait_for(lambda: "three" in list(tab.log_store))
+
+    expected = ["one", "two", "last without newline", "three"]
+    assert [text for _, _, kind, _, text in tab.log_store.iter_records() if kind == KIND_RX] == expected
+    window.stop_capture()
+    with open(tmp_path / "capture.txt", encoding="utf-8") as f:
+        # 그 사이의 시스템 메시지("Serial settings updated ...")는 빼고 본다
+        assert [line for line in f.read().splitlines() if line in expected] == expected
+
+
+@pytest.mark.parametrize("keyword, literal", [
+    ("link up", True), ("a-b: c=d, e/f #1", True), ("link.up", False), ("a|b", False), ("x{2}", False),
+    ("(ok)", False), ("back\\slash", False), ("^start", False), ("end$", False), ("[ab]", False),
+])
+def test_filter_treats_keywords_with_spaces_as_literal(keyword, literal):
+    import serial_log
+    assert serial_log.LogFilter._is_literal(keyword) is literal
@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+import serial_core
+from serial_core import HighlightRules, KIND_RAW, KIND_RX
+
+
+def reference(rules, text):
+    """Style id by searching every rule on its own: first match start wins, then the earlier rule."""
+    found = []
+    for style, (pattern, _, _, ignore_case) in enumerate(rules, 1):
+        match = re.search(pattern, text, re.IGNORECASE if ignore_case else 0)
+        if match:
+            found.append((match.start(), style))
+    return min(found)[1] if found else 0
+
+
+RULES = [
+    (r"\b(ERROR|FATAL)\b", "#ff5555", True, True),
+    (r"(\w)\1{2}", "#ffb86c", False, False),  # 같은 글자 세 번
+    (r"(?P<key>id)=(?P=key)", "#8be9fd", False, False),
+    (r"(?P<key>[a-z]+):", "#50fa7b", False, False),  # 위 규칙과 같은 그룹 이름
+    (r"(<)?tag(?(1)>)", "#bd93f9", False, False),
+    (r"(x)(y)(z)", "#f1fa8c", False, False),
+    (r"(?i)warn", "#ff79c6", False, False),
+]
+
+TEXTS = [
+    "", "nothing here", "an error occurred", "aaa", "xaaa error", "error aaa", "id=id", "id=idx name:",
+    "<tag> and tag", "xyz", "WARN xyz", "zzz WARN", "key: id=id", "bbb:", "tag>", "Fatal", "x y z",
+]
+
+
+def test_backreferences_and_named_groups_classify_like_separate_searches():
+    rules = HighlightRules(rules=RULES)
+    for text in TEXTS:
+        assert rules.classify(KIND_RX, text) == reference(RULES, text), text
+    records = [(0.0, KIND_RX, 0, text) for text in TEXTS]
+    assert rules.classify_records(records) == [reference(RULES, text) for text in TEXTS]
+    assert rules.classify(KIND_RAW, "aaa") == 0
+
+
+def test_combined_rules_only():
+    rules = HighlightRules(rules=[rule for rule in RULES if rule[0] in (r"\b(ERROR|FATAL)\b", r"(x)(y)(z)", "(?i)warn")])
+    assert not rules._separate
+    assert rules.classify_records([(0.0, KIND_RX, 0, text) for text in TEXTS]) == [
+        reference(rules.rules, text) for text in TEXTS]
+
+
+def test_no_rules_and_invalid_rule():
+    rules = HighlightRules(rules=[])
+    assert rules.classify(KIND_RX, "ERROR") == 0
+    assert rules.classify_records([(0.0, KIND_RX, 0, "ERROR")]) is None
+    with pytest.raises(ValueError):
+        HighlightRules(rules=[(r"(a", "#ffffff", False, False)])
+
+
+def test_without_the_regex_parser(monkeypatch):
+    # re의 내부 파서를 쓸 수 없어도 guard만 빠지고 결과는 같다
+    monkeypatch.setattr(serial_core, "_sre_parse", None)
+    rules = HighlightRules(rules=RULES)
+    for text in TEXTS:
+        assert rules.classify(KIND_RX, text) == reference(RULES, text), text
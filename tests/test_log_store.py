@@ -0,0 +1,61 @@
+import pytest
+
+from serial_core import LogStore, KIND_RAW, KIND_RX, KIND_TX
+
+
+def test_append_keeps_text_and_metadata():
+    store = LogStore(chunk_lines=4)
+    store.append("hello", timestamp=1.5, kind=KIND_RX, port=2)
+    store.append("ünïcode \udcff", timestamp=2.0, kind=KIND_TX)  # 깨진 바이트도 그대로 돌려준다
+    store.append(b"\x00\xff", timestamp=3.0, kind=KIND_RAW)
+    assert len(store) == 3 and (store.first_id, store.next_id) == (0, 3)
+    assert store.record(0) == (1.5, KIND_RX, 2, "hello")
+    assert store.line(1) == "ünïcode \udcff" and store.port(1) == 0
+    assert store.data(2) == b"\x00\xff" and store.kind(2) == KIND_RAW
+    assert store[-1] == store.line(2) != ""
+
+
+def test_eviction_at_max_lines_releases_whole_chunks():
+    store = LogStore(max_lines=10, chunk_lines=4)
+    for i in range(25):
+        store.append(f"line {i}", timestamp=float(i))
+    assert len(store) == 10 and (store.first_id, store.next_id) == (15, 25)
+    assert list(store) == [f"line {i}" for i in range(15, 25)]
+    assert len(store._chunks) == 4  # 12..15(앞 셋은 지워졌다), 16..19, 20..23, 24
+    with pytest.raises(IndexError):
+        store.line(14)
+    store.extend([f"more {i}" for i in range(7)], timestamp=30.0)
+    assert store.first_id == 22 and store[0] == "line 22" and store[-1] == "more 6"
+    store.set_max_lines(3)
+    assert list(store) == ["more 4", "more 5", "more 6"]
+
+
+def test_slices_and_iteration_across_chunk_boundaries():
+    store = LogStore(max_lines=100, chunk_lines=3)
+    lines = [f"{i}" * (i % 4) for i in range(20)]  # 빈 줄도 있다
+    store.extend_records([(float(i), KIND_RX, 0, text) for i, text in enumerate(lines)])
+    assert store[2:11] == lines[2:11]
+    assert store[::4] == lines[::4] and store[-5:] == lines[-5:] and store[5:2] == []
+    assert [text for _, text in store.iter_lines(4, 13)] == lines[4:13]
+    assert list(store.iter_ids([1, 2, 3, 99])) == [(1, lines[1]), (2, lines[2]), (3, lines[3])]
+    assert store.id_for_time(7.5) == 8 and store.id_for_time(100.0) == 20
+
+
+def test_iteration_snapshot_survives_eviction():
+    store = LogStore(max_lines=6, chunk_lines=2)
+    store.extend([f"old {i}" for i in range(6)])
+    lines = store.iter_lines()
+    assert next(lines) == (0, "old 0")
+    store.extend([f"new {i}" for i in range(6)])  # 읽는 도중 전부 밀려났다
+    assert [text for _, text in lines] == [f"old {i}" for i in range(1, 6)]
+
+
+def test_clear_keeps_counting_ids():
+    store = LogStore(max_lines=10, chunk_lines=4)
+    store.extend(["a", "b", "c", "d", "e"])
+    store.clear()
+    assert len(store) == 0 and list(store) == [] and store.first_id == store.next_id == 5
+    with pytest.raises(IndexError):
+        store[0]
+    store.append("f")
+    assert (store.first_id, store.next_id) == (5, 6) and store.line(5) == "f" and store[:] == ["f"]
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from serial_core import MacroError, MacroRunner, parse_macro
+
+
+def test_parse_macro_steps_and_errors():
+    steps = parse_macro("timeout 2\n# comment\nloop 3\nsend AT \nexpect ^OK$\nend\nwait 0.5\n")
+    assert steps[0][0] == "loop" and steps[0][1] == 3
+    assert steps[0][2][0] == ("send", "AT ")
+    assert steps[0][2][1][1].pattern == "^OK$" and steps[0][2][1][2] == 2.0
+    assert steps[1] == ("wait", 0.5)
+    for bad in ("loop 2\nsend x\n", "end\n", "jump 3\n", "expect (\n"):
+        with pytest.raises(MacroError):
+            parse_macro(bad)
+
+
+def open_port(engine, path):
+    assert engine.open_port(path, 115200).result(timeout=5)
+
+
+def test_send_expect_round_trips(engine, pty_pair, echo_device):
+    open_port(engine, pty_pair[1])
+    runner = MacroRunner(engine, 0, parse_macro("timeout 2\nloop 20\nsend ping\nexpect ^OK ping$\nend\n"))
+    assert runner.start().result(timeout=10) is None
+    assert runner.iterations == 20
+    assert echo_device.commands == ["ping"] * 20
+
+
+def test_reply_before_expect_is_not_missed(engine, pty_pair, echo_device):
+    open_port(engine, pty_pair[1])
+    # 답이 wait 동안 이미 와 있다
+    runner = MacroRunner(engine, 0, parse_macro("timeout 1\nsend go\nwait 0.3\nexpect ^OK go$\n"))
+    assert runner.start().result(timeout=5) is None
+
+
+def test_expect_times_out(engine, pty_pair):
+    open_port(engine, pty_pair[1])
+    runner = MacroRunner(engine, 0, parse_macro("timeout 0.2\nsend ping\nexpect ^OK\n"))
+    start = time.monotonic()
+    error = runner.start().result(timeout=5)
+    assert error == "line 3: no line matching '^OK' within 0.2 s"
+    assert 0.15 < time.monotonic() - start < 2
+
+
+def test_cancel_stops_a_waiting_expect(engine, pty_pair):
+    open_port(engine, pty_pair[1])
+    finished = []
+    runner = MacroRunner(engine, 0, parse_macro("timeout 30\nexpect never\n"), on_finished=finished.append)
+    done = runner.start()
+    time.sleep(0.2)
+    start = time.monotonic()
+    runner.cancel()
+    assert done.result(timeout=5) == "stopped"
+    assert time.monotonic() - start < 1
+    assert finished == ["stopped"]
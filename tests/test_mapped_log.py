@@ -0,0 +1,95 @@
+import re
+
+import pytest
+
+from serial_core import MappedLog
+
+
+def open_indexed(path):
+    log = MappedLog(str(path))
+    log.build_index(block_bytes=1 << 20)
+    assert log.indexed
+    return log
+
+
+def str_matches(lines, pattern):
+    return [(line_id, line) for line_id, line in enumerate(lines) if pattern.search(line)]
+
+
+LINES = [
+    "boot ok",
+    "ÄRGER here",
+    "foo",
+    "bar",
+    "foo  bar",
+    "AT+RST\r",
+    "KELVIN 5K",
+    "disk full",
+    "end",
+]
+
+
+@pytest.fixture
+def synthetic(tmp_path):
+    path = tmp_path / "capture.txt"
+    path.write_bytes("\n".join(LINES).encode("utf-8"))  # 마지막 줄에 개행이 없다
+    log = open_indexed(path)
+    yield log
+    log.close()
+
+
+def test_index_without_trailing_newline(synthetic):
+    expected = [line.rstrip("\r") for line in LINES]
+    assert len(synthetic) == len(LINES)
+    assert [synthetic.line(i) for i in range(len(LINES))] == expected
+    assert list(synthetic.iter_lines(2, 4)) == [(2, "foo"), (3, "bar")]
+    assert list(synthetic) == expected
+    with pytest.raises(IndexError):
+        synthetic.line(len(LINES))
+
+
+@pytest.mark.parametrize("pattern", [
+    re.compile("ärger", re.IGNORECASE),
+    re.compile(r"foo\s+bar"),
+    re.compile("foo"),
+    re.compile("o$"),
+    re.compile("^bar"),
+    re.compile("k", re.IGNORECASE),
+    re.compile(re.escape("DISK full"), re.IGNORECASE),
+    re.compile(r"RST\r?$"),
+    re.compile("a.g", re.IGNORECASE),
+    re.compile(r"\w+ \d"),
+])
+def test_find_lines_agrees_with_the_str_regex(synthetic, pattern):
+    lines = [line.rstrip("\r") for line in LINES]
+    assert list(synthetic.find_lines(pattern)) == str_matches(lines, pattern)
+    assert list(synthetic.find_lines(pattern, 2, 5)) == [hit for hit in str_matches(lines, pattern) if 2 <= hit[0] < 5]
+
+
+def test_generated_file_search(tmp_path):
+    path = tmp_path / "big.txt"
+    lines = [f"{i:08d} {'needle' if i % 997 == 0 else 'hay'} {'é' * (i % 3)}" for i in range(200000)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    log = open_indexed(path)
+    assert len(log) == len(lines)
+    for pattern in (re.compile("NEEDLE", re.IGNORECASE), re.compile("needle é+$"), re.compile(r"^0001\d+ hay")):
+        assert list(log.find_lines(pattern)) == str_matches(lines, pattern)
+    log.close()
+
+
+def test_sparse_multi_gb_file(tmp_path):
+    path = tmp_path / "sparse.txt"
+    hole = 3 << 30  # 4 GB 미만이어도 32비트 offset을 넘는다
+    with open(path, "wb") as f:
+        f.write(b"first line\nsecond needle\n")
+        f.seek(hole)
+        f.write(b"\nafter the hole\nlast needle")
+    log = open_indexed(path)
+    assert len(log) == 5
+    assert log.line(0) == "first line"
+    assert log.line(2) == "\0" * log.max_line_bytes  # 구멍은 개행 없는 한 줄, 보여줄 만큼만 읽는다
+    assert log.line(3) == "after the hole"
+    assert log.line(4) == "last needle"
+    assert list(log.find_lines(re.compile("needle"))) == [(1, "second needle"), (4, "last needle")]
+    assert list(log.find_lines(re.compile("hole"), 3)) == [(3, "after the hole")]
+    log.close()
@@ -0,0 +1,129 @@
+import os
+import shutil
+import time
+
+import pytest
+
+import serial_core
+from serial_core import CaptureEngine, KIND_ERROR, KIND_RX, KIND_SYSTEM
+
+pty = pytest.importorskip("pty")
+tty = pytest.importorskip("tty")
+
+
+class Adapter:
+    """A pty that can be unplugged and plugged back in at a fixed device path (a symlink)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.master = self.slave = None
+
+    def plug(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        os.symlink(os.ttyname(self.slave), self.path)
+
+    def unplug(self):
+        # udev가 /dev/serial/by-id 디렉터리째 지우는 것처럼
+        shutil.rmtree(os.path.dirname(self.path))
+        os.close(self.master)
+        os.close(self.slave)
+        self.master = self.slave = None
+
+
+class Records(list):
+    def __call__(self, records):
+        self.extend(records)
+
+    def texts(self, kind):
+        return [record[3] for record in self if record[1] == kind]
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    adapter = Adapter(str(tmp_path / "by-id" / "usb-adapter"))
+    adapter.plug()
+    yield adapter
+    if adapter.master is not None:
+        adapter.unplug()
+
+
+def test_capture_resumes_when_the_device_comes_back(engine, adapter):
+    records = Records()
+    assert engine.open_port(adapter.path, 115200, sink=records, reconnect=True).result(timeout=5)
+    os.write(adapter.master, b"before\n")
+    assert records.wait_for(lambda: records.texts(KIND_RX) == ["before"])
+
+    adapter.unplug()
+    assert records.wait_for(lambda: records.texts(KIND_ERROR))
+    assert records.texts(KIND_ERROR)[0].endswith("(waiting for the device)")
+    assert engine.is_reconnecting(0) and not engine.is_open(0)
+    time.sleep(0.3)
+    assert engine.counters(0).errors == 1  # 장치가 없는 동안 다시 열어 보지 않는다
+
+    adapter.plug()
+    assert records.wait_for(lambda: engine.is_open(0))
+    os.write(adapter.master, b"after\n")
+    assert records.wait_for(lambda: records.texts(KIND_RX) == ["before", "after"])
+    assert records.texts(KIND_SYSTEM) == [f"Reconnected to {adapter.path}"]
+
+
+def test_capture_resumes_with_backoff_where_there_is_no_inotify(adapter, monkeypatch):
+    monkeypatch.setattr(serial_core.DeviceWatcher, "watch", lambda self, path, callback: None)
+    engine = CaptureEngine(batch_interval=0.005, reconnect_delay=0.02, max_reconnect_delay=0.05).start()
+    try:
+        records = Records()
+        assert engine.open_port(adapter.path, 115200, sink=records, reconnect=True).result(timeout=5)
+        os.write(adapter.master, b"before\n")
+        assert records.wait_for(lambda: records.texts(KIND_RX) == ["before"])
+
+        adapter.unplug()
+        assert records.wait_for(lambda: engine.counters(0).errors >= 4)  # 계속 다시 열어 본다
+        errors = records.texts(KIND_ERROR)
+        assert errors[0].endswith("(retrying in 0.02 s)") and len(errors) == 2  # 같은 오류는 한 번만 보여 준다
+
+        adapter.plug()
+        assert records.wait_for(lambda: engine.is_open(0))
+        os.write(adapter.master, b"after\n")
+        assert records.wait_for(lambda: records.texts(KIND_RX) == ["before", "after"])
+        assert records.texts(KIND_SYSTEM)[0].startswith(f"Reconnected to {adapter.path} (the last error repeated")
+    finally:
+        engine.stop()
+
+
+def test_partial_line_is_completed_across_split_reads_and_a_reconnect(adapter):
+    engine = CaptureEngine(batch_interval=0.005, partial_timeout=0.5).start()
+    try:
+        records = Records()
+        assert engine.open_port(adapter.path, 115200, sink=records, reconnect=True).result(timeout=5)
+        for chunk in (b"sp", b"lit ", b"read\nfirst half"):
+            os.write(adapter.master, chunk)
+            time.sleep(0.02)  # 조각마다 따로 읽힌다
+        assert records.wait_for(lambda: engine.counters(0).rx_bytes == 21)
+        assert engine.counters(0).rx_reads == 3
+
+        adapter.unplug()
+        time.sleep(0.7)  # partial_timeout이 지나도 끊기기 전에 받다 만 줄은 내보내지 않는다
+        assert records.texts(KIND_RX) == ["split read"]
+        adapter.plug()
+        assert records.wait_for(lambda: engine.is_open(0))
+        os.write(adapter.master, b" and second half\n")
+        assert records.wait_for(lambda: len(records.texts(KIND_RX)) == 2)
+        assert records.texts(KIND_RX) == ["split read", "first half and second half"]
+
+        # 다시 끊긴 채로 포트를 닫으면 받다 만 줄을 그대로 내보낸다
+        os.write(adapter.master, b"cut off")
+        assert records.wait_for(lambda: engine.counters(0).rx_bytes == 21 + 17 + 7)
+        adapter.unplug()
+        assert records.wait_for(lambda: len(records.texts(KIND_ERROR)) == 2)
+        engine.close_port(0).result(timeout=5)
+        assert records.texts(KIND_RX) == ["split read", "first half and second half", "cut off"]
+    finally:
+        engine.stop()
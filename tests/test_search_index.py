@@ -0,0 +1,55 @@
+from itertools import islice
+
+from serial_core import LogStore, TrigramIndex
+
+
+def indexed_store(lines, max_lines=1000, sweep_lines=1):
+    store = LogStore(max_lines=max_lines, chunk_lines=4)
+    index = TrigramIndex(sweep_lines=sweep_lines)
+    first_id = store.next_id
+    store.extend(lines)
+    index.add_lines(first_id, lines)
+    index.trim(store.first_id)
+    return store, index
+
+
+def test_search_ignores_case_and_drops_trigram_false_positives():
+    store, index = indexed_store(["Link UP", "link down", "uplink", "nothing here", "kinu pl"])
+    assert list(index.search("link", store)) == [(0, "Link UP"), (1, "link down"), (2, "uplink")]
+    assert list(index.search("K u", store)) == [(0, "Link UP")]
+    # "kinu pl"에도 "nk "를 뺀 trigram이 다 있지만 그런 줄은 없다
+    assert list(index.candidates("up")) == []  # 세 글자보다 짧은 질의
+    assert list(index.search("missing", store)) == []
+    assert list(index.candidates("ink")) == [0, 1, 2]
+
+
+def test_trim_forgets_evicted_lines():
+    store, index = indexed_store([f"line {i}" for i in range(10)], max_lines=4)
+    assert store.first_id == 6
+    assert [line_id for line_id, _ in index.search("line", store)] == [6, 7, 8, 9]
+    assert all(ids[0] >= 6 for ids in index._postings.values())
+    assert "e 0" not in index._postings and "e 6" in index._postings
+
+
+def test_trim_sweeps_only_every_sweep_lines():
+    index = TrigramIndex(sweep_lines=100)
+    index.add_lines(0, ["abc"] * 150)
+    index.trim(50)
+    assert len(index._postings["abc"]) == 150  # 아직 쓸지 않았지만
+    assert list(index.candidates("abc"))[0] == 50  # 지워진 줄은 내놓지 않는다
+    index.trim(60, force=True)
+    assert len(index._postings["abc"]) == 90
+
+
+def test_paged_candidates_survive_trim_and_add():
+    index = TrigramIndex(sweep_lines=1)
+    index.add_lines(0, ["error code", "code error", "fine", "error without", "code"] * 20)
+    pages = index.candidates("error code")
+    first_page = list(islice(pages, 5))
+    # 결과를 다 읽기 전에 앞쪽 줄이 지워지고 새 줄이 들어온다
+    index.trim(50)
+    index.add_lines(100, ["error code"] * 5)
+    rest = list(pages)
+    expected = list(range(0, 100, 5))  # "code error"에는 "r c"가 없다
+    assert first_page + rest == expected
+    assert list(index.candidates("error code")) == [line_id for line_id in expected if line_id >= 50] + list(range(100, 105))
@@ -0,0 +1,33 @@
+from serial_core import SendHistory
+
+
+def test_damaged_journal_lines_are_skipped_and_compacted(tmp_path):
+    path = tmp_path / "history.txt"
+    path.write_text(f"{SendHistory.HEADER}\n100.0 2 AT\nnot-a-key 1 X\n101.5 one Y\n1950.2 1", encoding="utf-8")
+    history = SendHistory(str(path))
+    history.load()
+    history.close()
+    assert history.recent() == ["AT"]
+    assert history.entries["AT"][0] == 2
+    assert path.read_text(encoding="utf-8") == f"{SendHistory.HEADER}\n100.0 2 AT\n"
+
+
+def test_use_is_journaled_and_read_back(tmp_path):
+    path = str(tmp_path / "history.txt")
+    history = SendHistory(path)
+    history.use("AT+RST", now=1000.0)
+    history.use("AT", now=1001.0)
+    history.use("AT+RST", now=1002.0)
+    history.close()
+    again = SendHistory(path)
+    again.load()
+    assert again.ranked == history.ranked == ["AT+RST", "AT"]
+    assert again.entries["AT+RST"][0] == 2
+
+
+def test_save_errors_go_to_on_error(tmp_path):
+    errors = []
+    history = SendHistory(str(tmp_path / "missing" / "history.txt"), on_error=errors.append)
+    history.use("AT")
+    history.close()
+    assert errors and errors[0].startswith("Cannot save send history")
@@ -0,0 +1,123 @@
+import os
+import select
+import selectors
+import socket
+import threading
+import time
+
+from serial_core import ShareServer
+
+
+class Readers(threading.Thread):
+    """Reads every client socket with one selector and keeps what each one got."""
+
+    def __init__(self, sockets):
+        super().__init__(daemon=True)
+        self.data = {sock: bytearray() for sock in sockets}
+        self.closed = set()
+        self.stopped = threading.Event()
+
+    def run(self):
+        selector = selectors.DefaultSelector()
+        for sock in self.data:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+        while not self.stopped.is_set() and len(self.closed) < len(self.data):
+            for key, _ in selector.select(0.05):
+                try:
+                    chunk = key.fileobj.recv(1 << 20)
+                except ConnectionError:
+                    chunk = b""
+                if chunk:
+                    self.data[key.fileobj] += chunk
+                else:
+                    selector.unregister(key.fileobj)
+                    self.closed.add(key.fileobj)
+
+    def texts(self, sock):
+        # "2026-01-01 00:00:00.000000 RX text" -> "text"
+        return [line.split(" ", 3)[3] for line in self.data[sock].decode().splitlines()]
+
+
+def connect(server, count, receive_buffer=None):
+    expected = len(server.clients) + count
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket()
+        if receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.connect(("127.0.0.1", server.port))
+        sockets.append(sock)
+    deadline = time.monotonic() + 5
+    while len(server.clients) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(server.clients) == expected
+    return sockets
+
+
+def device_lines(master, count, chunk=500, pause=0.005):
+    for start in range(0, count, chunk):
+        os.write(master, b"".join(b"line %06d %s\n" % (i, b"x" * 40) for i in range(start, min(count, start + chunk))))
+        time.sleep(pause)
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_many_clients_get_the_whole_stream_and_a_slow_one_is_dropped(engine, pty_pair):
+    master, path = pty_pair
+    assert engine.open_port(path, 115200).result(timeout=5)
+    server = ShareServer(engine, port=0, replay=0, max_queue=128 * 1024, on_slow="drop").start()
+    try:
+        fast = connect(server, 110)
+        slow = connect(server, 1, receive_buffer=4096)[0]  # 연결만 하고 읽지 않는다
+        readers = Readers(fast)
+        readers.start()
+        # 느린 client에는 큐와 커널 버퍼를 합친 것(수백 KB)보다 훨씬 많이 쌓이고,
+        # 읽는 client는 한 스레드가 110개를 돌며 읽어도 따라올 만한 속도로 보낸다
+        count = 12000
+        expected = [f"line {i:06d} {'x' * 40}" for i in range(count)]
+        device_lines(master, count, chunk=100, pause=0.01)
+        total = sum(len(line) + 28 for line in expected)  # 28 = 시각과 "RX "와 개행
+        assert wait_for(lambda: all(len(readers.data[sock]) >= total for sock in fast))
+        readers.stopped.set()
+        readers.join()
+        for sock in fast:
+            assert readers.texts(sock) == expected
+        assert server.dropped == 1
+        assert wait_for(lambda: len(server.clients) == len(fast))
+        slow.close()
+        for sock in fast:
+            sock.close()
+    finally:
+        server.stop()
+
+
+def test_replay_tx_and_replay_cap(engine, pty_pair):
+    master, path = pty_pair
+    assert engine.open_port(path, 115200).result(timeout=5)
+    server = ShareServer(engine, port=0, replay=1000, max_queue=16 * 1024, on_slow="drop").start()
+    try:
+        device_lines(master, 1000)
+        assert wait_for(lambda: len(server._recent) == 1000)
+        client = connect(server, 1)[0]
+        client.settimeout(2)
+        replay = b""
+        while not replay.endswith(b"line 000999 " + b"x" * 40 + b"\n"):
+            replay += client.recv(1 << 16)
+        assert len(replay) <= 16 * 1024
+        texts = [line.split(" ", 3)[3] for line in replay.decode().splitlines()]
+        first = int(texts[0].split()[1])
+        assert texts == [f"line {i:06d} {'x' * 40}" for i in range(first, 1000)]
+        assert server.dropped == 0
+
+        client.sendall(b"AT+GMR\r\n")
+        assert select.select([master], [], [], 5)[0]
+        assert os.read(master, 100) == b"AT+GMR\n"
+        client.close()
+    finally:
+        server.stop()
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+from serial_core import TriggerCapture, KIND_RX, KIND_TX
+
+
+def rx(texts, start=0.0, step=0.001, port=0):
+    return [(start + i * step, KIND_RX, port, text) for i, text in enumerate(texts)]
+
+
+def read_incident(path, count, timeout=5):
+    """Returns the ``KIND[@port] text`` part of the lines of ``path`` once it has ``count`` of them."""
+    deadline = time.monotonic() + timeout
+    lines = []
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                lines = [line.split(" ", 2)[2] for line in f.read().splitlines()]
+            if len(lines) >= count:
+                break
+        time.sleep(0.01)
+    return lines
+
+
+def test_pattern_trigger_writes_the_context_around_it(tmp_path):
+    incidents = []
+    trigger = TriggerCapture(str(tmp_path), patterns=["FAULT \\d+"], pre_lines=3, post_lines=2,
+                             on_incident=lambda path, reason: incidents.append((path, reason)))
+    trigger.start()
+    try:
+        trigger.submit(rx([f"line {i}" for i in range(10)]))
+        trigger.submit(rx(["FAULT 1", "after 1"], start=1.0) + [(1.1, KIND_TX, 0, "Sent: reset")])
+        trigger.submit(rx(["after 2", "not written"], start=2.0))
+        first = str(tmp_path / "incident-0001.txt")
+        assert incidents == [(first, "/FAULT \\d+/ matched on port 0")]
+        # 링의 pre_lines 줄에는 트리거한 줄도 들어간다
+        assert read_incident(first, 6) == [
+            "RX line 8", "RX line 9", "RX FAULT 1", "SYSTEM Trigger: /FAULT \\d+/ matched on port 0",
+            "RX after 1", "TX Sent: reset"]
+        # 창이 닫힌 뒤의 줄은 다시 링에 쌓인다
+        trigger.submit(rx(["x", "FAULT 2", "y"], start=3.0, port=1))
+    finally:
+        trigger.stop()
+    second = str(tmp_path / "incident-0002.txt")
+    assert trigger.incidents == 2 and incidents[1] == (second, "/FAULT \\d+/ matched on port 1")
+    assert read_incident(second, 5) == [
+        "RX not written", "RX@1 x", "RX@1 FAULT 2", "SYSTEM@1 Trigger: /FAULT \\d+/ matched on port 1",
+        "RX@1 y"]
+
+
+def test_trigger_inside_the_window_extends_it(tmp_path):
+    trigger = TriggerCapture(str(tmp_path), patterns=["ERR"], pre_lines=1, post_lines=2)
+    trigger.submit(rx(["a", "ERR", "b", "ERR", "c", "d", "e"]))
+    trigger.stop()
+    assert trigger.incidents == 1
+    assert read_incident(str(tmp_path / "incident-0001.txt"), 7) == [
+        "RX ERR", "SYSTEM Trigger: /ERR/ matched on port 0", "RX b", "RX ERR",
+        "SYSTEM Trigger: /ERR/ matched on port 0", "RX c", "RX d"]
+
+
+def test_pre_seconds_and_numbering_after_old_files(tmp_path):
+    (tmp_path / "incident-0007.txt").write_text("from an earlier run\n")
+    trigger = TriggerCapture(str(tmp_path), patterns=["ERR"], pre_lines=100, pre_seconds=1.0, post_lines=0)
+    trigger.submit(rx(["old", "older"], start=0.0) + rx(["recent", "ERR"], start=5.0))
+    trigger.stop()
+    assert read_incident(str(tmp_path / "incident-0008.txt"), 3) == [
+        "RX recent", "RX ERR", "SYSTEM Trigger: /ERR/ matched on port 0"]
+    assert (tmp_path / "incident-0007.txt").read_text() == "from an earlier run\n"
+
+
+def test_silence_trigger_with_post_seconds(tmp_path):
+    incidents = []
+    trigger = TriggerCapture(str(tmp_path), silence=0.1, pre_lines=2, post_lines=100, post_seconds=0.3,
+                             on_incident=lambda path, reason: incidents.append(reason))
+    trigger.start()
+    try:
+        now = time.monotonic()
+        trigger.submit(rx(["one", "two", "three"], start=now))
+        deadline = time.monotonic() + 5
+        while not incidents and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert incidents == ["no data on port 0 for 0.1 s"]
+        trigger.submit(rx(["back"], start=time.monotonic()))
+        path = str(tmp_path / "incident-0001.txt")
+        # post_seconds가 지나면 파일을 닫는다
+        deadline = time.monotonic() + 5
+        while trigger.path is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert trigger.path is None
+        # "back" 뒤에 다시 조용해진 것은 열려 있는 창을 늘린다
+        silent = "SYSTEM Trigger: no data on port 0 for 0.1 s"
+        assert read_incident(path, 5) == ["RX two", "RX three", silent, "RX back", silent]
+    finally:
+        trigger.stop()
+    assert trigger.incidents == 1 and len(incidents) == 1
+
+
+def test_no_trigger_is_an_error(tmp_path):
+    with pytest.raises(ValueError):
+        TriggerCapture(str(tmp_path))
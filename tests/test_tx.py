@@ -0,0 +1,124 @@
+import os
+import select
+import threading
+import time
+
+import pytest
+
+from serial_core import KIND_ERROR, KIND_TX
+
+
+class Device(threading.Thread):
+    """Reads a pty master and keeps ``(time, bytes)`` of every read; ``reading`` can hold it back."""
+
+    def __init__(self, fd):
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.reads = []
+        self.reading = threading.Event()
+        self.reading.set()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            if not self.reading.wait(0.05) or not select.select([self.fd], [], [], 0.05)[0]:
+                continue
+            self.reads.append((time.monotonic(), os.read(self.fd, 1 << 16)))
+
+    def data(self):
+        return b"".join(data for _, data in self.reads)
+
+    def wait_for(self, data, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not self.data().endswith(data) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return self.data()
+
+
+class Records(list):
+    def __call__(self, records):
+        self.extend(records)
+
+    def of(self, kind):
+        return [record for record in self if record[1] == kind]
+
+
+@pytest.fixture
+def device(engine, pty_pair):
+    """A Device on the master side of port 0; ``device.records`` gets the port's records."""
+    master, path = pty_pair
+    device = Device(master)
+    device.records = Records()
+    assert engine.open_port(path, 115200, sink=device.records).result(timeout=5)
+    device.start()
+    yield device
+    device.stopped.set()
+    device.join()
+
+
+def test_line_delay_spaces_the_commands(engine, device):
+    records = device.records
+    engine.set_pacing(0, line_delay=0.05)
+    engine.send(0, ["one", "two", "three", "four"])
+    assert device.wait_for(b"four\n") == b"one\ntwo\nthree\nfour\n"
+    assert [data for _, data in device.reads] == [b"one\n", b"two\n", b"three\n", b"four\n"]
+    arrivals = [t for t, _ in device.reads]
+    assert all(b - a >= 0.04 for a, b in zip(arrivals, arrivals[1:]))
+    deadline = time.monotonic() + 2
+    while len(records.of(KIND_TX)) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    written = [record[0] for record in records.of(KIND_TX)]
+    assert all(b - a >= 0.05 for a, b in zip(written, written[1:]))
+    stats = engine.tx_stats(0)
+    assert stats.count == 4 and stats.last >= 3 * 0.05  # 마지막 명령은 앞의 세 간격만큼 기다렸다
+
+
+def test_sending_waits_for_the_prompt(engine, pty_pair, device):
+    master = pty_pair[0]
+    engine.set_pacing(0, prompt="> ", prompt_timeout=5)
+    engine.send(0, ["first", "second", "third"])
+    assert device.wait_for(b"first\n") == b"first\n"
+    time.sleep(0.2)
+    assert device.data() == b"first\n"  # 프롬프트가 올 때까지 다음 명령은 나가지 않는다
+    os.write(master, b"ok\r\n> ")
+    assert device.wait_for(b"second\n") == b"first\nsecond\n"
+    os.write(master, b">")  # 두 번에 나뉘어 온 프롬프트
+    time.sleep(0.1)
+    assert device.data() == b"first\nsecond\n"
+    os.write(master, b" ")
+    assert device.wait_for(b"third\n") == b"first\nsecond\nthird\n"
+
+
+def test_prompt_timeout_sends_on_with_an_error(engine, device):
+    records = device.records
+    engine.set_pacing(0, prompt="> ", prompt_timeout=0.1)
+    engine.send(0, ["a", "b"])
+    assert device.wait_for(b"b\n") == b"a\nb\n"
+    deadline = time.monotonic() + 2
+    while not records.of(KIND_ERROR) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert records.of(KIND_ERROR)[0][3] == "No prompt within 0.1 s, sending on"
+    assert device.reads[1][0] - device.reads[0][0] >= 0.09
+
+
+def test_commands_queued_during_a_write_are_coalesced(engine, device):
+    records = device.records
+    device.reading.clear()  # 장치가 읽지 않으니 큰 쓰기가 끝나지 않는다
+    blob = b"x" * (1 << 18) + b"\n"
+    engine.write(0, blob)
+    time.sleep(0.1)
+    for i in range(50):
+        engine.send(0, [f"cmd {i}"])
+    time.sleep(0.1)
+    assert engine.tx_pending(0) == 51
+    device.reading.set()
+    commands = b"".join(b"cmd %d\n" % i for i in range(50))
+    assert device.wait_for(commands) == blob + commands
+    deadline = time.monotonic() + 2
+    while len(records.of(KIND_TX)) < 50 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sent = records.of(KIND_TX)
+    assert [record[3] for record in sent] == [f"Sent: cmd {i}" for i in range(50)]
+    assert len({record[0] for record in sent}) == 1  # 한 번의 쓰기로 나갔다
+    stats = engine.tx_stats(0)
+    assert stats.count == 51 and engine.tx_pending(0) == 0